@@ -0,0 +1,123 @@
+# app/__init__.py
+import os
+
+import click
+from dotenv import load_dotenv
+from flask import Flask
+from flask_cors import CORS
+
+
+def create_app(config=None):
+    """Application factory.
+
+    Builds the Flask app without touching the database schema or the AI
+    client; run `flask --app app init-db` (or init_db(app)) to create tables.
+    """
+    load_dotenv()
+
+    app = Flask(__name__)
+    CORS(app)
+
+    # Configure database
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///rcm_platform.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    if config:
+        app.config.update(config)
+
+    # Decode JSON columns with the same fast backend as responses (JSON_BACKEND)
+    from app.services.serializers import engine_json_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(engine_json_options(),
+                                                   **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+
+    # Initialize database
+    from app.models.models import db
+    db.init_app(app)
+
+    # Background job queue for long-running batch endpoints
+    from app.services.job_queue import job_queue
+    job_queue.init_app(app)
+
+    # Keep the dashboard rollup table in step with ORM writes
+    from app.services.dashboard_rollups import register_rollup_hooks, start_rollup_refresher
+    register_rollup_hooks()
+
+    # Bump data version counters with ORM writes, so every worker's provider registry and
+    # the ETags of cached responses follow changes
+    from app.services.data_versions import register_data_version_hooks
+    register_data_version_hooks()
+
+    # orjson-backed JSON encoding when available (JSON_BACKEND)
+    from app.services.serializers import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # Rendered bodies of @conditional routes, keyed by ETag
+    from app.services.http_cache import init_http_cache
+    init_http_cache(app)
+
+    # Dashboard payloads prebuilt by a background refresher
+    from app.services.dashboard_snapshots import init_dashboard_snapshots
+    init_dashboard_snapshots(app)
+
+    # Request timing, split into DB, AI and serialization time, served at /metrics
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+
+    register_blueprints(app)
+
+    @app.route('/')
+    def health_check():
+        return {'status': 'healthy', 'message': 'AI-native RCM Platform API is running'}
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create tables and indexes and build the dashboard rollups"""
+        init_db(app)
+        click.echo('Database initialized')
+
+    start_rollup_refresher(app)
+    return app
+
+
+def register_blueprints(app):
+    from app.routes.auth import auth_bp
+    from app.routes.eligibility import eligibility_bp
+    from app.routes.prior_auth import prior_auth_bp
+    from app.routes.claims import claims_bp
+    from app.routes.clinical_docs import clinical_docs_bp
+    from app.routes.medical_coding import medical_coding_bp
+    from app.routes.remittance import remittance_bp
+    from app.routes.dashboard import dashboard_bp
+    from app.routes.jobs import jobs_bp
+    from app.routes.exports import exports_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(eligibility_bp, url_prefix='/eligibility')
+    app.register_blueprint(prior_auth_bp, url_prefix='/prior-auth')
+    app.register_blueprint(claims_bp, url_prefix='/claims')
+    app.register_blueprint(clinical_docs_bp, url_prefix='/clinical-docs')
+    app.register_blueprint(medical_coding_bp, url_prefix='/medical-coding')
+    app.register_blueprint(remittance_bp, url_prefix='/remittance')
+    app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
+    app.register_blueprint(exports_bp, url_prefix='/exports')
+
+
+def init_db(app):
+    """Create database tables and missing indexes, and build the dashboard rollups"""
+    from app.models.models import db, ensure_columns, ensure_column_lengths, ensure_indexes
+    from app.services.dashboard_rollups import ensure_rollups_populated
+
+    with app.app_context():
+        db.create_all()
+        print("Database tables created successfully!")
+        added_columns = ensure_columns()
+        if added_columns:
+            print(f"Added columns: {', '.join(added_columns)}")
+        widened_columns = ensure_column_lengths()
+        if widened_columns:
+            print(f"Widened columns: {', '.join(widened_columns)}")
+        created_indexes = ensure_indexes()
+        if created_indexes:
+            print(f"Created indexes: {', '.join(created_indexes)}")
+        ensure_rollups_populated()
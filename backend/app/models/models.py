@@ -1,8 +1,9 @@
 # Database models for the RCM platform
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
 from datetime import datetime, date
-import json
+import uuid
 
 db = SQLAlchemy()
 
@@ -26,7 +27,7 @@ class Patient(db.Model):
     address = db.Column(db.Text)
     emergency_contact = db.Column(db.String(100))
     emergency_phone = db.Column(db.String(20))
-    insurance_provider = db.Column(db.String(100))
+    insurance_provider = db.Column(db.String(100), index=True)
     insurance_id = db.Column(db.String(50))
     policy_status = db.Column(db.String(20), default='active')
     coverage_details = db.Column(db.JSON)  # Store deductible, copay, etc.
@@ -61,24 +62,32 @@ class Patient(db.Model):
 
 class Claim(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False, index=True)
     status = db.Column(db.String(20), nullable=False)
     amount = db.Column(db.Float, nullable=False)
-    submitted_date = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     diagnosis_codes = db.Column(db.JSON)
     procedure_codes = db.Column(db.JSON)
     notes = db.Column(db.Text)
+    
+    __table_args__ = (
+        db.Index('ix_claim_status_submitted_date', 'status', 'submitted_date'),
+    )
 
 class PriorAuthorization(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False, index=True)
     service_type = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), nullable=False)
-    submitted_date = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     approved_date = db.Column(db.DateTime)
     expiration_date = db.Column(db.DateTime)
     notes = db.Column(db.Text)
     
+    __table_args__ = (
+        db.Index('ix_prior_authorization_status_submitted_date', 'status', 'submitted_date'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -96,12 +105,18 @@ class EligibilityCheck(db.Model):
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
     service_type = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), nullable=False)  # eligible, not_eligible, pending
-    check_date = db.Column(db.DateTime, default=datetime.utcnow)
+    check_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     coverage_details = db.Column(db.JSON)
     ai_prediction = db.Column(db.JSON)
     recommendations = db.Column(db.JSON)
     provider_response = db.Column(db.JSON)
     
+    __table_args__ = (
+        # Patient eligibility history: WHERE patient_id = ? ORDER BY check_date DESC
+        db.Index('ix_eligibility_check_patient_check_date', 'patient_id', 'check_date'),
+        db.Index('ix_eligibility_check_status_check_date', 'status', 'check_date'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -122,6 +137,8 @@ class InsuranceProvider(db.Model):
     country = db.Column(db.String(50), nullable=False)
     contact_info = db.Column(db.JSON)
     api_endpoint = db.Column(db.String(200))
+    # Per-service overrides for coverage prediction: {'service_costs': {...}, 'coverage_likelihood': {...}}
+    coverage_rules = db.Column(db.JSON)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -133,5 +150,324 @@ class InsuranceProvider(db.Model):
             'country': self.country,
             'contact_info': self.contact_info,
             'api_endpoint': self.api_endpoint,
+            'coverage_rules': self.coverage_rules,
             'is_active': self.is_active
         }
+
+def parse_date(value):
+    """Parse an ISO date string (YYYY-MM-DD) from request data, passing dates through"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def new_record_id(prefix):
+    """Primary key for a new record: `prefix` and a full random UUID in upper-case hex"""
+    return f"{prefix}{uuid.uuid4().hex.upper()}"
+
+class ClaimSubmission(db.Model):
+    """Claims submitted through the claims blueprint (scrubbed, tracked through payment)"""
+    id = db.Column(db.String(40), primary_key=True)  # CLM001, CLM + 32 hex digits
+    patient_id = db.Column(db.String(20), nullable=False, index=True)
+    patient_name = db.Column(db.String(120))
+    provider = db.Column(db.String(120), index=True)
+    facility = db.Column(db.String(120))
+    service_date = db.Column(db.Date)
+    submission_date = db.Column(db.Date, nullable=False, default=date.today, index=True)
+    claim_amount = db.Column(db.Float, nullable=False, default=0.0)
+    allowed_amount = db.Column(db.Float, default=0.0)
+    paid_amount = db.Column(db.Float, default=0.0)
+    patient_responsibility = db.Column(db.Float, default=0.0)
+    status = db.Column(db.String(20), nullable=False)
+    insurance_provider = db.Column(db.String(100))
+    diagnosis_codes = db.Column(db.JSON)
+    procedure_codes = db.Column(db.JSON)
+    ai_scrubbing = db.Column(db.JSON)
+    denial_reason = db.Column(db.String(200))
+    payment_date = db.Column(db.Date)
+    
+    __table_args__ = (
+        db.Index('ix_claim_submission_status_submission_date', 'status', 'submission_date'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'patient_name': self.patient_name,
+            'provider': self.provider,
+            'facility': self.facility,
+            'service_date': self.service_date.isoformat() if self.service_date else None,
+            'submission_date': self.submission_date.isoformat() if self.submission_date else None,
+            'claim_amount': self.claim_amount,
+            'allowed_amount': self.allowed_amount,
+            'paid_amount': self.paid_amount,
+            'patient_responsibility': self.patient_responsibility,
+            'status': self.status,
+            'insurance_provider': self.insurance_provider,
+            'diagnosis_codes': self.diagnosis_codes or [],
+            'procedure_codes': self.procedure_codes or [],
+            'ai_scrubbing': self.ai_scrubbing,
+            'denial_reason': self.denial_reason,
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None
+        }
+
+class PriorAuthRequest(db.Model):
+    """Prior authorization requests submitted through the prior-auth blueprint"""
+    id = db.Column(db.String(40), primary_key=True)  # PA001, PA + 32 hex digits
+    patient_id = db.Column(db.String(20), nullable=False, index=True)
+    patient_name = db.Column(db.String(120))
+    procedure_code = db.Column(db.String(20))
+    procedure_name = db.Column(db.String(200))
+    diagnosis = db.Column(db.String(200))
+    provider = db.Column(db.String(120), index=True)
+    facility = db.Column(db.String(120))
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    submitted_date = db.Column(db.Date, nullable=False, default=date.today, index=True)
+    decision_date = db.Column(db.Date)
+    estimated_cost = db.Column(db.Float, default=0.0)
+    ai_analysis = db.Column(db.JSON)
+    documents = db.Column(db.JSON)
+    
+    __table_args__ = (
+        db.Index('ix_prior_auth_request_status_submitted_date', 'status', 'submitted_date'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'patient_name': self.patient_name,
+            'procedure_code': self.procedure_code,
+            'procedure_name': self.procedure_name,
+            'diagnosis': self.diagnosis,
+            'provider': self.provider,
+            'facility': self.facility,
+            'status': self.status,
+            'submitted_date': self.submitted_date.isoformat() if self.submitted_date else None,
+            'decision_date': self.decision_date.isoformat() if self.decision_date else None,
+            'estimated_cost': self.estimated_cost,
+            'ai_analysis': self.ai_analysis,
+            'documents': self.documents or []
+        }
+
+class CodingSession(db.Model):
+    """Medical coding sessions saved from the medical-coding blueprint"""
+    id = db.Column(db.String(40), primary_key=True)  # CS001, CS + 32 hex digits
+    patient_id = db.Column(db.String(20), index=True)
+    patient_name = db.Column(db.String(120))
+    encounter_date = db.Column(db.Date)
+    provider = db.Column(db.String(120), index=True)
+    chief_complaint = db.Column(db.Text)
+    diagnosis_codes = db.Column(db.JSON)
+    procedure_codes = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='draft')
+    ai_confidence = db.Column(db.Float)
+    created_date = db.Column(db.Date, nullable=False, default=date.today)
+    last_modified = db.Column(db.Date, nullable=False, default=date.today, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_coding_session_status_last_modified', 'status', 'last_modified'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'patient_name': self.patient_name,
+            'encounter_date': self.encounter_date.isoformat() if self.encounter_date else None,
+            'provider': self.provider,
+            'chief_complaint': self.chief_complaint,
+            'diagnosis_codes': self.diagnosis_codes or [],
+            'procedure_codes': self.procedure_codes or [],
+            'status': self.status,
+            'ai_confidence': self.ai_confidence,
+            'created_date': self.created_date.isoformat() if self.created_date else None,
+            'last_modified': self.last_modified.isoformat() if self.last_modified else None
+        }
+
+class ClinicalDocument(db.Model):
+    """Clinical documents saved from the clinical-docs blueprint"""
+    id = db.Column(db.String(40), primary_key=True)  # DOC001, DOC + 32 hex digits
+    template_id = db.Column(db.String(50))
+    patient_id = db.Column(db.String(20))
+    patient_name = db.Column(db.String(120))
+    provider = db.Column(db.String(120), index=True)
+    date_created = db.Column(db.Date, nullable=False, default=date.today)
+    last_modified = db.Column(db.Date, nullable=False, default=date.today, index=True)
+    status = db.Column(db.String(20), nullable=False, default='draft', index=True)
+    content = db.Column(db.JSON)
+    ai_confidence = db.Column(db.Float)
+    compliance_score = db.Column(db.Float)
+    
+    __table_args__ = (
+        db.Index('ix_clinical_document_patient_last_modified', 'patient_id', 'last_modified'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'template_id': self.template_id,
+            'patient_id': self.patient_id,
+            'patient_name': self.patient_name,
+            'provider': self.provider,
+            'date_created': self.date_created.isoformat() if self.date_created else None,
+            'last_modified': self.last_modified.isoformat() if self.last_modified else None,
+            'status': self.status,
+            'content': self.content or {},
+            'ai_confidence': self.ai_confidence,
+            'compliance_score': self.compliance_score
+        }
+
+class RemittancePayment(db.Model):
+    """Payments posted through the remittance blueprint"""
+    id = db.Column(db.String(40), primary_key=True)  # PAY001, PAY + 32 hex digits
+    claim_id = db.Column(db.String(40), index=True)
+    patient_name = db.Column(db.String(120))
+    payer = db.Column(db.String(120))
+    amount_billed = db.Column(db.Float, nullable=False, default=0.0)
+    amount_paid = db.Column(db.Float, nullable=False, default=0.0)
+    payment_date = db.Column(db.Date)
+    status = db.Column(db.String(20), nullable=False, default='posted')
+    denial_reason = db.Column(db.String(200))
+    adjustment_codes = db.Column(db.JSON)
+    adjustment_amount = db.Column(db.Float, default=0.0)
+    posted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_remittance_payment_status_posted_at', 'status', 'posted_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'claim_id': self.claim_id,
+            'patient_name': self.patient_name,
+            'payer': self.payer,
+            'amount_billed': self.amount_billed,
+            'amount_paid': self.amount_paid,
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
+            'status': self.status,
+            'denial_reason': self.denial_reason,
+            'adjustment_codes': self.adjustment_codes or [],
+            'adjustment_amount': self.adjustment_amount
+        }
+
+class DashboardRollup(db.Model):
+    """Daily counts and amounts per status and insurer for the dashboard tables.
+    
+    Maintained incrementally by app.services.dashboard_rollups on every flush
+    and rebuilt in full by its periodic refresher.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # claim, prior_auth, eligibility
+    status = db.Column(db.String(20), nullable=False)
+    insurance_provider = db.Column(db.String(100), nullable=False, default='')
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('day', 'entity', 'status', 'insurance_provider', name='uq_dashboard_rollup_key'),
+        db.Index('ix_dashboard_rollup_entity_day', 'entity', 'day'),
+    )
+
+
+class DataVersion(db.Model):
+    """Change counter per reference table, bumped in the same transaction as the change.
+    
+    Process-wide caches of rarely-changing tables compare it with the version
+    they loaded, so every worker process notices a commit made by another.
+    """
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Single-column indexes that duplicate the leading column of a composite index
+REDUNDANT_INDEXES = {
+    'claim_submission': ('ix_claim_submission_status',),
+    'prior_auth_request': ('ix_prior_auth_request_status',),
+    'coding_session': ('ix_coding_session_status',),
+    'clinical_document': ('ix_clinical_document_patient_id',),
+}
+
+
+def ensure_indexes(engine=None):
+    """Create any model index missing from an existing database.
+    
+    db.create_all() only creates indexes together with new tables, so
+    databases created before an index was declared are upgraded here, and
+    REDUNDANT_INDEXES left by earlier versions are dropped.
+    Returns the names of the indexes created.
+    """
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for name in REDUNDANT_INDEXES.get(table.name, ()):
+            if name in existing:
+                with engine.begin() as connection:
+                    connection.exec_driver_sql(f'DROP INDEX "{name}"')
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+                created.append(index.name)
+    return created
+
+
+def ensure_columns(engine=None):
+    """Add nullable model columns missing from existing tables.
+    
+    db.create_all() never alters a table that already exists, so columns
+    declared after a database was created are added here. Returns the
+    "table.column" names added.
+    """
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def ensure_column_lengths(engine=None):
+    """Widen VARCHAR columns declared longer than they are in existing tables.
+    
+    SQLite does not enforce VARCHAR lengths, so this only alters tables on
+    other databases. Returns the "table.column" names widened.
+    """
+    engine = engine or db.engine
+    if engine.dialect.name == 'sqlite':
+        return []
+    inspector = inspect(engine)
+    widened = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            length = getattr(column.type, 'length', None)
+            current = getattr(existing.get(column.name), 'length', None)
+            if length is None or current is None or current >= length:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ALTER COLUMN "{column.name}" TYPE {column_type}')
+            widened.append(f'{table.name}.{column.name}')
+    return widened
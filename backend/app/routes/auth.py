@@ -4,7 +4,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 import datetime
 import os
-from models.models import db, User
+from app.models.models import db, User
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -6,7 +6,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.services.ai_service import ai_service
-import random
+from app.models.models import db, ClinicalDocument, new_record_id
+from app.services.pagination import paginate_query, page_args, InvalidCursor
+from app.services.http_cache import conditional, content_version
 
 clinical_docs_bp = Blueprint('clinical_docs', __name__)
 
@@ -71,49 +73,11 @@ DOCUMENTATION_TEMPLATES = {
     }
 }
 
-# Mock saved documents
-SAVED_DOCUMENTS = {
-    'DOC001': {
-        'id': 'DOC001',
-        'template_id': 'progress_note',
-        'patient_id': 'P001',
-        'patient_name': 'Ahmed Al-Rashid',
-        'provider': 'Dr. Sarah Ahmed',
-        'date_created': '2024-01-15',
-        'last_modified': '2024-01-15',
-        'status': 'completed',
-        'content': {
-            'subjective': 'Patient presents with chest pain, 7/10 severity, radiating to left arm. Started 2 hours ago.',
-            'objective': 'BP: 140/90, HR: 88, RR: 18, Temp: 98.6°F. Alert and oriented. Chest clear to auscultation.',
-            'assessment': 'Chest pain, rule out acute coronary syndrome. Consider musculoskeletal etiology.',
-            'plan': 'EKG, cardiac enzymes, chest X-ray. Monitor vitals. Cardiology consult if indicated.'
-        },
-        'ai_confidence': 0.92,
-        'compliance_score': 0.95
-    },
-    'DOC002': {
-        'id': 'DOC002',
-        'template_id': 'discharge_summary',
-        'patient_id': 'P002',
-        'patient_name': 'Fatima Al-Zahra',
-        'provider': 'Dr. Omar Hassan',
-        'date_created': '2024-01-18',
-        'last_modified': '2024-01-19',
-        'status': 'draft',
-        'content': {
-            'admission_diagnosis': 'Acute appendicitis',
-            'discharge_diagnosis': 'Status post laparoscopic appendectomy',
-            'hospital_course': 'Patient underwent uncomplicated laparoscopic appendectomy. Post-operative course unremarkable.',
-            'discharge_instructions': 'Wound care instructions provided. Return if fever, increased pain, or wound concerns.',
-            'medications': 'Ibuprofen 400mg q6h PRN pain',
-            'follow_up': 'Surgery clinic in 2 weeks'
-        },
-        'ai_confidence': 0.88,
-        'compliance_score': 0.91
-    }
-}
+# Templates only change with a deploy; their ETags come from this hash
+TEMPLATES_VERSION = content_version(DOCUMENTATION_TEMPLATES)
 
 @clinical_docs_bp.route('/templates', methods=['GET'])
+@conditional(lambda: TEMPLATES_VERSION, cache_control='public, max-age=3600')
 def get_templates():
     """Get available documentation templates"""
     try:
@@ -132,6 +96,7 @@ def get_templates():
         return jsonify({'error': 'Failed to retrieve templates'}), 500
 
 @clinical_docs_bp.route('/templates/<template_id>', methods=['GET'])
+@conditional(lambda: TEMPLATES_VERSION, cache_control='public, max-age=3600')
 def get_template(template_id):
     """Get specific template details"""
     try:
@@ -201,27 +166,28 @@ def save_document():
         data = request.get_json()
         
         # Generate document ID
-        doc_id = f"DOC{str(uuid.uuid4())[:6].upper()}"
+        doc_id = new_record_id('DOC')
         
         # Validate document completeness
         validation_result = validate_document(data)
         
-        document = {
-            'id': doc_id,
-            'template_id': data.get('template_id'),
-            'patient_id': data.get('patient_id'),
-            'patient_name': data.get('patient_name'),
-            'provider': data.get('provider'),
-            'date_created': datetime.datetime.now().strftime('%Y-%m-%d'),
-            'last_modified': datetime.datetime.now().strftime('%Y-%m-%d'),
-            'status': data.get('status', 'draft'),
-            'content': data.get('content', {}),
-            'ai_confidence': validation_result['ai_confidence'],
-            'compliance_score': validation_result['compliance_score']
-        }
+        today = datetime.now().date()
+        document = ClinicalDocument(
+            id=doc_id,
+            template_id=data.get('template_id'),
+            patient_id=data.get('patient_id'),
+            patient_name=data.get('patient_name'),
+            provider=data.get('provider'),
+            date_created=today,
+            last_modified=today,
+            status=data.get('status', 'draft'),
+            content=data.get('content', {}),
+            ai_confidence=validation_result['ai_confidence'],
+            compliance_score=validation_result['compliance_score']
+        )
         
-        # Store in mock database
-        SAVED_DOCUMENTS[doc_id] = document
+        db.session.add(document)
+        db.session.commit()
         
         return jsonify({
             'message': 'Document saved successfully',
@@ -240,26 +206,30 @@ def get_documents():
         provider = request.args.get('provider')
         status = request.args.get('status')
         
-        documents = list(SAVED_DOCUMENTS.values())
+        query = ClinicalDocument.query
         
         # Apply filters
         if patient_id:
-            documents = [d for d in documents if d['patient_id'] == patient_id]
+            query = query.filter(ClinicalDocument.patient_id == patient_id)
         
         if provider:
-            documents = [d for d in documents if provider.lower() in d['provider'].lower()]
+            query = query.filter(ClinicalDocument.provider.ilike(f'%{provider}%'))
         
         if status:
-            documents = [d for d in documents if d['status'] == status]
+            query = query.filter(ClinicalDocument.status == status)
         
-        # Sort by last modified
-        documents.sort(key=lambda x: x['last_modified'], reverse=True)
+        # Most recently modified first, one page at a time
+        page = paginate_query(query, [ClinicalDocument.last_modified, ClinicalDocument.id],
+                              **page_args(request, include_total=True))
         
         return jsonify({
-            'documents': documents,
-            'total_count': len(documents)
+            'documents': page['items'],
+            'total_count': page['pagination'].get('total'),
+            'pagination': page['pagination']
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve documents'}), 500
 
@@ -267,11 +237,11 @@ def get_documents():
 def get_document(doc_id):
     """Get specific document"""
     try:
-        if doc_id not in SAVED_DOCUMENTS:
+        document = db.session.get(ClinicalDocument, doc_id)
+        if document is None:
             return jsonify({'error': 'Document not found'}), 404
         
-        document = SAVED_DOCUMENTS[doc_id]
-        return jsonify(document), 200
+        return jsonify(document.to_dict()), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve document'}), 500
@@ -280,25 +250,26 @@ def get_document(doc_id):
 def update_document(doc_id):
     """Update existing document"""
     try:
-        if doc_id not in SAVED_DOCUMENTS:
+        document = db.session.get(ClinicalDocument, doc_id)
+        if document is None:
             return jsonify({'error': 'Document not found'}), 404
         
         data = request.get_json()
-        document = SAVED_DOCUMENTS[doc_id]
         
         # Update document fields
-        document['content'] = data.get('content', document['content'])
-        document['status'] = data.get('status', document['status'])
-        document['last_modified'] = datetime.datetime.now().strftime('%Y-%m-%d')
+        document.content = data.get('content', document.content)
+        document.status = data.get('status', document.status)
+        document.last_modified = datetime.now().date()
         
         # Re-validate document
         validation_result = validate_document(data)
-        document['ai_confidence'] = validation_result['ai_confidence']
-        document['compliance_score'] = validation_result['compliance_score']
+        document.ai_confidence = validation_result['ai_confidence']
+        document.compliance_score = validation_result['compliance_score']
+        db.session.commit()
         
         return jsonify({
             'message': 'Document updated successfully',
-            'document': document,
+            'document': document.to_dict(),
             'validation': validation_result
         }), 200
         
@@ -1,16 +1,27 @@
 #routes/eligibility.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from datetime import datetime, timedelta
+import json
 import random
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.services.ai_service import ai_service
-from app.models.models import db, Patient, InsuranceProvider, EligibilityCheck
+from app.models.models import db, Patient, EligibilityCheck
+from app.services.pagination import paginate_query, page_args, InvalidCursor
+from app.services.coverage import (predict_coverage, predict_coverage_batch, attach_insights_async,
+                                   attach_insights_batch_async)
+from app.services.provider_registry import provider_registry
+from app.services.http_cache import conditional
 import os
 
 eligibility_bp = Blueprint('eligibility', __name__)
 
+# Largest appointment list accepted by /check-batch, and IDs per IN (...) query
+BATCH_MAX_CHECKS = int(os.getenv('ELIGIBILITY_BATCH_MAX_CHECKS', 20000))
+BATCH_QUERY_CHUNK = 500
+# Result lines per streamed response chunk
+BATCH_STREAM_CHUNK = 500
+
 # Service types for eligibility checks
 SERVICE_TYPES = [
     'general_consultation', 'specialist_consultation', 'emergency', 'surgery',
@@ -37,12 +48,12 @@ def check_eligibility():
                 'recommendations': ['Verify patient information', 'Contact insurance provider']
             }), 404
         
-        # Get insurance provider info
-        provider = InsuranceProvider.query.filter_by(code=patient.insurance_provider).first()
+        # Get insurance provider info from the in-process registry
+        provider = provider_registry.get(patient.insurance_provider)
         provider_info = provider.to_dict() if provider else {'name': patient.insurance_provider, 'country': 'Unknown'}
         
-        # AI-powered coverage prediction 
-        ai_prediction = get_ai_coverage_prediction(patient, service_type)
+        # Coverage prediction from the provider tables; AI insights are attached by a background job
+        ai_prediction = predict_coverage(patient, service_type)
         
         # Create eligibility check record
         eligibility_check = EligibilityCheck(
@@ -62,6 +73,12 @@ def check_eligibility():
         db.session.add(eligibility_check)
         db.session.commit()
         
+        try:
+            insights_job_id = attach_insights_async(eligibility_check.id, patient, service_type)
+        except Exception as queue_error:
+            print(f"AI Insights Queue Error: {queue_error}")
+            insights_job_id = None
+        
         eligibility_result = {
             'eligible': patient.policy_status == 'active',
             'patient_info': {
@@ -76,7 +93,11 @@ def check_eligibility():
             'ai_prediction': ai_prediction,
             'verification_date': datetime.now().isoformat(),
             'recommendations': generate_recommendations(patient, service_type),
-            'check_id': eligibility_check.id
+            'check_id': eligibility_check.id,
+            'ai_insights_job': {
+                'job_id': insights_job_id,
+                'status_url': f'/jobs/{insights_job_id}'
+            } if insights_job_id else None
         }
         
         return jsonify(eligibility_result), 200
@@ -84,6 +105,124 @@ def check_eligibility():
     except Exception as e:
         return jsonify({'error': 'Eligibility check failed', 'details': str(e)}), 500
 
+def _load_by_keys(column, keys):
+    """Rows whose column is in keys, fetched with chunked IN (...) queries"""
+    model = column.class_
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), BATCH_QUERY_CHUNK):
+        rows.extend(model.query.filter(column.in_(keys[start:start + BATCH_QUERY_CHUNK])).all())
+    return rows
+
+def _ndjson_lines(records):
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, default=str))
+        if len(lines) >= BATCH_STREAM_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+@eligibility_bp.route('/check-batch', methods=['POST'])
+def check_eligibility_batch():
+    """Check eligibility for a whole appointment list, streaming one NDJSON line per entry.
+    
+    Body: {"checks": [{"patient_id": ..., "service_type": ...}, ...]} or
+    {"patient_ids": [...], "service_type": ...}; "include_insights": true queues
+    one background job that attaches AI insights to every stored check.
+    All checks are stored in one transaction before the first line is sent;
+    the last line is a {"summary": ...} object.
+    """
+    try:
+        data = request.get_json() or {}
+        default_service = data.get('service_type', 'general_consultation')
+        include_insights = bool(data.get('include_insights'))
+        checks = data.get('checks')
+        if checks is None:
+            checks = [{'patient_id': patient_id} for patient_id in data.get('patient_ids', [])]
+        
+        if not checks:
+            return jsonify({'error': 'No checks provided'}), 400
+        if len(checks) > BATCH_MAX_CHECKS:
+            return jsonify({'error': f'At most {BATCH_MAX_CHECKS} checks per batch'}), 400
+        
+        # One IN query for the patients instead of a lookup per patient; providers come from the registry
+        patients = {patient.patient_id: patient
+                    for patient in _load_by_keys(Patient.patient_id, {c.get('patient_id') for c in checks})}
+        
+        found = [(index, patients[check.get('patient_id')], check.get('service_type') or default_service)
+                 for index, check in enumerate(checks) if check.get('patient_id') in patients]
+        predictions = predict_coverage_batch([patient for _, patient, _ in found],
+                                             [service_type for _, _, service_type in found],
+                                             insights_status='pending' if include_insights else 'not_requested')
+        
+        results = [None] * len(checks)
+        records = []
+        for (index, patient, service_type), prediction in zip(found, predictions):
+            provider = provider_registry.get(patient.insurance_provider)
+            status = 'eligible' if patient.policy_status == 'active' else 'not_eligible'
+            recommendations = generate_recommendations(patient, service_type)
+            records.append(EligibilityCheck(
+                patient_id=patient.id,
+                service_type=service_type,
+                status=status,
+                coverage_details=patient.coverage_details,
+                ai_prediction=prediction,
+                recommendations=recommendations,
+                provider_response={
+                    'verification_method': 'Batch',
+                    'reference_number': f"REF-{random.randint(100000, 999999)}"
+                }
+            ))
+            results[index] = {
+                'patient_id': patient.patient_id,
+                'eligible': status == 'eligible',
+                'service_type': service_type,
+                'insurance_provider': {'code': patient.insurance_provider,
+                                       'name': provider.name if provider else patient.insurance_provider},
+                'ai_prediction': prediction,
+                'recommendations': recommendations
+            }
+        
+        # One transaction for the whole list; IDs are read before the commit expires the rows
+        db.session.add_all(records)
+        db.session.flush()
+        check_ids = [record.id for record in records]
+        db.session.commit()
+        
+        for (index, _, _), check_id in zip(found, check_ids):
+            results[index]['check_id'] = check_id
+        for index, check in enumerate(checks):
+            if results[index] is None:
+                results[index] = {
+                    'patient_id': check.get('patient_id'),
+                    'eligible': False,
+                    'reason': 'Patient not found in system'
+                }
+        
+        insights_job_id = None
+        if include_insights and check_ids:
+            insights_job_id = attach_insights_batch_async(check_ids)
+        
+        summary = {
+            'total': len(checks),
+            'checked': len(check_ids),
+            'eligible': sum(1 for result in results if result['eligible']),
+            'not_found': len(checks) - len(check_ids),
+            'insights_job': {'job_id': insights_job_id, 'status_url': f'/jobs/{insights_job_id}'}
+                            if insights_job_id else None
+        }
+        
+        return Response(
+            stream_with_context(_ndjson_lines(results + [{'summary': summary}])),
+            mimetype='application/x-ndjson'
+        )
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Batch eligibility check failed', 'details': str(e)}), 500
+
 @eligibility_bp.route('/history/<patient_id>', methods=['GET'])
 def get_eligibility_history(patient_id):
     try:
@@ -118,137 +257,6 @@ def get_eligibility_history(patient_id):
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve history', 'details': str(e)}), 500
 
-def get_ai_coverage_prediction(patient, service_type):
-    """AI-powered coverage prediction using Gemini"""
-    
-    # Use real Gemini AI service for coverage prediction
-    try:
-        eligibility_data = {
-            'patient_info': {
-                'name': f'{patient.first_name} {patient.last_name}',
-                'dob': patient.dob.isoformat() if patient.dob else None,
-                'insurance_provider': patient.insurance_provider,
-                'policy_status': patient.policy_status
-            },
-            'service_type': service_type,
-            'insurance_provider': patient.insurance_provider,
-            'coverage_details': patient.coverage_details or {}
-        }
-        
-        # Call the AI service to get structured insights
-        ai_insights = ai_service.generate_insights("eligibility", eligibility_data)
-        
-        # Calculate predictions based on service type and coverage
-        coverage_percentage = patient.coverage_details.get('coverage_percentage', 80) if patient.coverage_details else 80
-        
-        # Calculate predictions based on service type and coverage
-        base_costs = {
-            'general_consultation': 200,
-            'specialist_consultation': 500,
-            'surgery': 15000,
-            'emergency': 1000,
-            'diagnostic_imaging': 800,
-            'laboratory_tests': 300,
-            'physiotherapy': 150,
-            'dental': 400,
-            'maternity': 8000,
-            'pediatric': 250,
-            'cardiology': 1200,
-            'orthopedic': 2000,
-            'dermatology': 350
-        }
-        
-        total_cost = base_costs.get(service_type, 200)
-        patient_cost = total_cost * (1 - coverage_percentage / 100)
-        
-        # Determine coverage likelihood based on service type
-        coverage_likelihood = {
-            'general_consultation': 95,
-            'specialist_consultation': 85,
-            'surgery': 70,
-            'emergency': 98,
-            'diagnostic_imaging': 80,
-            'laboratory_tests': 90,
-            'physiotherapy': 75,
-            'dental': 70,
-            'maternity': 85,
-            'pediatric': 95,
-            'cardiology': 80,
-            'orthopedic': 75,
-            'dermatology': 85
-        }.get(service_type, 90)
-        
-        # Check if AI insights are structured (list of dicts) or simple strings
-        confidence_score = 0.85
-        if ai_insights and isinstance(ai_insights, list) and len(ai_insights) > 0:
-            if isinstance(ai_insights[0], dict):
-                # We have structured insights
-                confidence_score = 0.95
-                print(f"Generated {len(ai_insights)} structured AI insights for {service_type}")
-            else:
-                # We have string insights (fallback mode)
-                confidence_score = 0.70
-                print(f"Generated {len(ai_insights)} basic AI insights for {service_type}")
-        else:
-            print("No AI insights generated, using fallback predictions")
-            ai_insights = [f"Basic analysis for {service_type} - AI service may be unavailable"]
-        
-        return {
-            'coverage_likelihood': coverage_likelihood,
-            'estimated_patient_cost': round(patient_cost, 2),
-            'estimated_total_cost': total_cost,
-            'confidence_score': confidence_score,
-            'ai_insights': ai_insights
-        }
-            
-    except Exception as ai_error:
-        print(f"AI Coverage Prediction Error: {ai_error}")
-        # Continue with fallback logic below
-    
-    # Fallback to mock predictions if AI fails
-    base_costs = {
-        'general_consultation': 200,
-        'specialist_consultation': 500,
-        'surgery': 15000,
-        'emergency': 1000,
-        'diagnostic_imaging': 800,
-        'laboratory_tests': 300,
-        'physiotherapy': 150,
-        'dental': 400,
-        'maternity': 8000,
-        'pediatric': 250,
-        'cardiology': 1200,
-        'orthopedic': 2000,
-        'dermatology': 350
-    }
-    
-    coverage_likelihood_map = {
-        'general_consultation': 95,
-        'specialist_consultation': 85,
-        'surgery': 70,
-        'emergency': 98,
-        'diagnostic_imaging': 80,
-        'laboratory_tests': 90,
-        'physiotherapy': 75,
-        'dental': 70,
-        'maternity': 85,
-        'pediatric': 95,
-        'cardiology': 80,
-        'orthopedic': 75,
-        'dermatology': 85
-    }
-    
-    total_cost = base_costs.get(service_type, 200)
-    coverage_percentage = patient.coverage_details.get('coverage_percentage', 80) if patient.coverage_details else 80
-    patient_cost = total_cost * (1 - coverage_percentage / 100)
-    
-    return {
-        'coverage_likelihood': coverage_likelihood_map.get(service_type, 90),
-        'estimated_patient_cost': round(patient_cost, 2),
-        'estimated_total_cost': total_cost,
-        'confidence_score': 0.7,
-        'ai_insights': ['Fallback prediction - AI service unavailable']
-    }
 def generate_recommendations(patient, service_type):
     """Generate AI-powered recommendations"""
     recommendations = []
@@ -274,11 +282,11 @@ def generate_recommendations(patient, service_type):
     return recommendations
 
 @eligibility_bp.route('/providers', methods=['GET'])
+@conditional(lambda: provider_registry.snapshot().version, cache_control='public, max-age=60')
 def get_insurance_providers():
     """Get list of supported GCC insurance providers"""
     try:
-        providers = InsuranceProvider.query.filter_by(is_active=True).all()
-        providers_data = {provider.code: provider.to_dict() for provider in providers}
+        providers_data = {provider.code: provider.to_dict() for provider in provider_registry.active()}
         
         return jsonify({
             'providers': providers_data,
@@ -291,26 +299,23 @@ def get_insurance_providers():
 def get_patients():
     """Get list of patients for testing purposes"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        
-        patients = Patient.query.paginate(
-            page=page, per_page=per_page, error_out=False
+        page = paginate_query(
+            Patient.query, [Patient.id], descending=False, **page_args(request, include_total=True),
+            serialize=lambda patient: {
+                'patient_id': patient.patient_id,
+                'name': f'{patient.first_name} {patient.last_name}',
+                'insurance_provider': patient.insurance_provider,
+                'policy_status': patient.policy_status,
+                'insurance_id': patient.insurance_id
+            }
         )
         
-        patients_data = [{
-            'patient_id': patient.patient_id,
-            'name': f'{patient.first_name} {patient.last_name}',
-            'insurance_provider': patient.insurance_provider,
-            'policy_status': patient.policy_status,
-            'insurance_id': patient.insurance_id
-        } for patient in patients.items]
-        
         return jsonify({
-            'patients': patients_data,
-            'total': patients.total,
-            'pages': patients.pages,
-            'current_page': page
+            'patients': page['items'],
+            'total': page['pagination'].get('total'),
+            'pagination': page['pagination']
         }), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve patients', 'details': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,181 @@
+# routes/exports.py
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from datetime import datetime, timedelta
+import csv
+import io
+import json
+import os
+from app.models.models import db, ClaimSubmission, RemittancePayment, EligibilityCheck, Patient, parse_date
+
+exports_bp = Blueprint('exports', __name__)
+
+# Rows fetched from the database per round-trip and written per response chunk
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+CLAIM_FIELDS = (
+    'id', 'patient_id', 'patient_name', 'provider', 'facility', 'service_date', 'submission_date',
+    'claim_amount', 'allowed_amount', 'paid_amount', 'patient_responsibility', 'status',
+    'insurance_provider', 'diagnosis_codes', 'procedure_codes', 'ai_scrubbing', 'denial_reason', 'payment_date'
+)
+
+PAYMENT_FIELDS = (
+    'id', 'claim_id', 'patient_name', 'payer', 'amount_billed', 'amount_paid', 'payment_date', 'status',
+    'denial_reason', 'adjustment_codes', 'adjustment_amount'
+)
+
+ELIGIBILITY_FIELDS = (
+    'id', 'patient_id', 'patient_external_id', 'service_type', 'status', 'check_date', 'coverage_details',
+    'ai_prediction', 'recommendations', 'provider_response'
+)
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'))
+    return value
+
+
+def _ndjson_chunks(records):
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, default=str))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_chunks(records, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    pending = 0
+    for record in records:
+        writer.writerow([_csv_value(record.get(field)) for field in fields])
+        pending += 1
+        if pending >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def stream_export(name, records, fields):
+    """Stream records (an iterator of dicts) as NDJSON or CSV per ?format="""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format '{export_format}'",
+                        'supported_formats': list(EXPORT_FORMATS)}), 400
+
+    chunks = _csv_chunks(records, fields) if export_format == 'csv' else _ndjson_chunks(records)
+    filename = f"{name}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def _iter_rows(query, serialize):
+    """Yield serialized rows, fetching EXPORT_CHUNK_SIZE rows per round-trip"""
+    for row in query.yield_per(EXPORT_CHUNK_SIZE):
+        yield serialize(row)
+
+
+@exports_bp.route('/claims', methods=['GET'])
+def export_claims():
+    """Stream claim submissions, oldest first"""
+    try:
+        query = ClaimSubmission.query
+        
+        status = request.args.get('status')
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        
+        if status:
+            query = query.filter(ClaimSubmission.status == status)
+        if date_from:
+            query = query.filter(ClaimSubmission.submission_date >= parse_date(date_from))
+        if date_to:
+            query = query.filter(ClaimSubmission.submission_date <= parse_date(date_to))
+        
+        query = query.order_by(ClaimSubmission.submission_date, ClaimSubmission.id)
+        return stream_export('claims', _iter_rows(query, lambda claim: claim.to_dict()), CLAIM_FIELDS)
+    
+    except ValueError as e:
+        return jsonify({'error': 'Invalid filter', 'details': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to export claims', 'details': str(e)}), 500
+
+@exports_bp.route('/payments', methods=['GET'])
+def export_payments():
+    """Stream remittance payments in posting order"""
+    try:
+        query = RemittancePayment.query
+        
+        status = request.args.get('status')
+        payer = request.args.get('payer')
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        
+        if status:
+            query = query.filter(RemittancePayment.status == status)
+        if payer:
+            query = query.filter(RemittancePayment.payer.ilike(f'%{payer}%'))
+        if date_from:
+            query = query.filter(RemittancePayment.payment_date >= parse_date(date_from))
+        if date_to:
+            query = query.filter(RemittancePayment.payment_date <= parse_date(date_to))
+        
+        query = query.order_by(RemittancePayment.posted_at, RemittancePayment.id)
+        return stream_export('payments', _iter_rows(query, lambda payment: payment.to_dict()), PAYMENT_FIELDS)
+    
+    except ValueError as e:
+        return jsonify({'error': 'Invalid filter', 'details': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to export payments', 'details': str(e)}), 500
+
+@exports_bp.route('/eligibility-checks', methods=['GET'])
+def export_eligibility_checks():
+    """Stream eligibility check history, oldest first"""
+    try:
+        query = db.session.query(EligibilityCheck, Patient.patient_id)\
+                          .join(Patient, Patient.id == EligibilityCheck.patient_id)
+        
+        patient_id = request.args.get('patient_id')
+        status = request.args.get('status')
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        
+        if patient_id:
+            query = query.filter(Patient.patient_id == patient_id)
+        if status:
+            query = query.filter(EligibilityCheck.status == status)
+        if date_from:
+            query = query.filter(EligibilityCheck.check_date >= datetime.combine(parse_date(date_from), datetime.min.time()))
+        if date_to:
+            # Inclusive of the whole final day
+            day_after = datetime.combine(parse_date(date_to), datetime.min.time()) + timedelta(days=1)
+            query = query.filter(EligibilityCheck.check_date < day_after)
+        
+        query = query.order_by(EligibilityCheck.check_date, EligibilityCheck.id)
+        
+        def serialize(row):
+            check, patient_external_id = row
+            record = check.to_dict()
+            record['patient_external_id'] = patient_external_id
+            return record
+        
+        return stream_export('eligibility-checks', _iter_rows(query, serialize), ELIGIBILITY_FIELDS)
+    
+    except ValueError as e:
+        return jsonify({'error': 'Invalid filter', 'details': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to export eligibility checks', 'details': str(e)}), 500
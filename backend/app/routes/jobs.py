@@ -0,0 +1,21 @@
+# routes/jobs.py
+from flask import Blueprint, request, jsonify
+from app.services.job_queue import job_queue
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get progress, partial results and errors for a background job"""
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = min(request.args.get('limit', 500, type=int), 5000)
+
+        job = job_queue.get(job_id, item_offset=offset, item_limit=limit)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        return jsonify(job), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to retrieve job status', 'details': str(e)}), 500
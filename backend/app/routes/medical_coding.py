@@ -2,10 +2,14 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 import random
 import sys
+import threading
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.services.ai_service import ai_service
-import random
+from app.models.models import db, CodingSession, parse_date, new_record_id
+from app.services.pagination import paginate_query, page_args, InvalidCursor
+from app.services.http_cache import conditional
+from sqlalchemy import func
 
 medical_coding_bp = Blueprint('medical_coding', __name__)
 
@@ -36,66 +40,46 @@ CPT_CODES = {
     '36415': {'code': '36415', 'description': 'Collection of venous blood by venipuncture', 'category': 'Laboratory', 'rvu': 0.2}
 }
 
-# Mock coding sessions
-CODING_SESSIONS = {
-    'CS001': {
-        'id': 'CS001',
-        'patient_id': 'P001',
-        'patient_name': 'Ahmed Al-Rashid',
-        'encounter_date': '2024-01-15',
-        'provider': 'Dr. Sarah Ahmed',
-        'chief_complaint': 'Chest pain',
-        'diagnosis_codes': ['I25.10', 'Z87.891'],
-        'procedure_codes': ['99214', '93000'],
-        'status': 'completed',
-        'ai_confidence': 0.94,
-        'created_date': '2024-01-15',
-        'last_modified': '2024-01-15'
-    },
-    'CS002': {
-        'id': 'CS002',
-        'patient_id': 'P002',
-        'patient_name': 'Fatima Al-Zahra',
-        'encounter_date': '2024-01-18',
-        'provider': 'Dr. Omar Hassan',
-        'chief_complaint': 'Headache',
-        'diagnosis_codes': ['G43.909'],
-        'procedure_codes': ['99213'],
-        'status': 'draft',
-        'ai_confidence': 0.87,
-        'created_date': '2024-01-18',
-        'last_modified': '2024-01-19'
-    }
-}
+# Ranked ICD-10/CPT search, opened on first use (full code sets via ICD10_CODES_PATH / CPT_CODES_PATH)
+_code_search = None
+_code_search_lock = threading.Lock()
+
+def get_code_search():
+    global _code_search
+    if _code_search is None:
+        with _code_search_lock:
+            if _code_search is None:
+                from app.services.code_search import build_code_search_engine
+                _code_search = build_code_search_engine(ICD10_CODES, CPT_CODES)
+    return _code_search
+
+def _search_response(query, code_type, limit):
+    code_search = get_code_search()
+    limit = int(limit) if limit not in (None, '') else code_search.DEFAULT_LIMIT
+    results = code_search.search(query, code_type, limit)
+    return jsonify({
+        'results': results,
+        'total_found': len(results['icd10']) + len(results['cpt'])
+    }), 200
 
 @medical_coding_bp.route('/search-codes', methods=['POST'])
 def search_codes():
     """Search for ICD-10 and CPT codes based on query"""
     try:
         data = request.get_json()
-        query = data.get('query', '').lower()
-        code_type = data.get('type', 'both')  # 'icd10', 'cpt', or 'both'
+        # 'type' is 'icd10', 'cpt', or 'both'
+        return _search_response(data.get('query', ''), data.get('type', 'both'), data.get('limit'))
         
-        results = {'icd10': [], 'cpt': []}
-        
-        if code_type in ['icd10', 'both']:
-            for code, details in ICD10_CODES.items():
-                if (query in code.lower() or 
-                    query in details['description'].lower() or 
-                    query in details['category'].lower()):
-                    results['icd10'].append(details)
-        
-        if code_type in ['cpt', 'both']:
-            for code, details in CPT_CODES.items():
-                if (query in code.lower() or 
-                    query in details['description'].lower() or 
-                    query in details['category'].lower()):
-                    results['cpt'].append(details)
-        
-        return jsonify({
-            'results': results,
-            'total_found': len(results['icd10']) + len(results['cpt'])
-        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Search failed'}), 500
+
+@medical_coding_bp.route('/search-codes', methods=['GET'])
+@conditional(lambda: get_code_search().version, cache_control='public, max-age=86400')
+def search_codes_get():
+    """Cacheable form of search-codes: ?query=&type=&limit=, with ETags from the loaded code sets"""
+    try:
+        return _search_response(request.args.get('query', ''), request.args.get('type', 'both'),
+                                request.args.get('limit'))
         
     except Exception as e:
         return jsonify({'error': 'Search failed'}), 500
@@ -142,29 +126,31 @@ def save_coding_session():
     try:
         data = request.get_json()
         
-        session_id = f"CS{str(uuid.uuid4())[:6].upper()}"
-        
-        session = {
-            'id': session_id,
-            'patient_id': data.get('patient_id'),
-            'patient_name': data.get('patient_name'),
-            'encounter_date': data.get('encounter_date'),
-            'provider': data.get('provider'),
-            'chief_complaint': data.get('chief_complaint'),
-            'diagnosis_codes': data.get('diagnosis_codes', []),
-            'procedure_codes': data.get('procedure_codes', []),
-            'status': data.get('status', 'draft'),
-            'ai_confidence': calculate_session_confidence(data),
-            'created_date': datetime.datetime.now().strftime('%Y-%m-%d'),
-            'last_modified': datetime.datetime.now().strftime('%Y-%m-%d')
-        }
-        
-        CODING_SESSIONS[session_id] = session
+        session_id = new_record_id('CS')
+        
+        today = datetime.now().date()
+        session = CodingSession(
+            id=session_id,
+            patient_id=data.get('patient_id'),
+            patient_name=data.get('patient_name'),
+            encounter_date=parse_date(data.get('encounter_date')),
+            provider=data.get('provider'),
+            chief_complaint=data.get('chief_complaint'),
+            diagnosis_codes=data.get('diagnosis_codes', []),
+            procedure_codes=data.get('procedure_codes', []),
+            status=data.get('status', 'draft'),
+            ai_confidence=calculate_session_confidence(data),
+            created_date=today,
+            last_modified=today
+        )
+        
+        db.session.add(session)
+        db.session.commit()
         
         return jsonify({
             'message': 'Coding session saved successfully',
             'session_id': session_id,
-            'session': session
+            'session': session.to_dict()
         }), 201
         
     except Exception as e:
@@ -177,22 +163,26 @@ def get_coding_sessions():
         status_filter = request.args.get('status')
         provider_filter = request.args.get('provider')
         
-        sessions = list(CODING_SESSIONS.values())
+        query = CodingSession.query
         
         if status_filter:
-            sessions = [s for s in sessions if s['status'] == status_filter]
+            query = query.filter(CodingSession.status == status_filter)
         
         if provider_filter:
-            sessions = [s for s in sessions if provider_filter.lower() in s['provider'].lower()]
+            query = query.filter(CodingSession.provider.ilike(f'%{provider_filter}%'))
         
-        # Sort by last modified
-        sessions.sort(key=lambda x: x['last_modified'], reverse=True)
+        # Most recently modified first, one page at a time
+        page = paginate_query(query, [CodingSession.last_modified, CodingSession.id],
+                              **page_args(request, include_total=True))
         
         return jsonify({
-            'sessions': sessions,
-            'total_count': len(sessions)
+            'sessions': page['items'],
+            'total_count': page['pagination'].get('total'),
+            'pagination': page['pagination']
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve sessions'}), 500
 
@@ -200,11 +190,11 @@ def get_coding_sessions():
 def get_coding_session(session_id):
     """Get specific coding session"""
     try:
-        if session_id not in CODING_SESSIONS:
+        session = db.session.get(CodingSession, session_id)
+        if session is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session = CODING_SESSIONS[session_id]
-        return jsonify(session), 200
+        return jsonify(session.to_dict()), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve session'}), 500
@@ -213,22 +203,26 @@ def get_coding_session(session_id):
 def get_coding_analytics():
     """Get coding analytics and insights"""
     try:
-        sessions = list(CODING_SESSIONS.values())
-        
         # Calculate analytics
-        total_sessions = len(sessions)
-        completed_sessions = len([s for s in sessions if s['status'] == 'completed'])
-        avg_confidence = sum(s['ai_confidence'] for s in sessions) / total_sessions if total_sessions > 0 else 0
+        total_sessions, completed_sessions, avg_confidence = db.session.query(
+            func.count(CodingSession.id),
+            func.count(CodingSession.id).filter(CodingSession.status == 'completed'),
+            func.coalesce(func.avg(CodingSession.ai_confidence), 0)
+        ).one()
         
-        # Code usage statistics
+        # Code usage statistics (only the code columns are loaded)
         diagnosis_usage = {}
         procedure_usage = {}
+        total_codes = 0
         
-        for session in sessions:
-            for code in session.get('diagnosis_codes', []):
+        for diagnosis_codes, procedure_codes in db.session.query(
+            CodingSession.diagnosis_codes, CodingSession.procedure_codes
+        ):
+            for code in diagnosis_codes or []:
                 diagnosis_usage[code] = diagnosis_usage.get(code, 0) + 1
-            for code in session.get('procedure_codes', []):
+            for code in procedure_codes or []:
                 procedure_usage[code] = procedure_usage.get(code, 0) + 1
+            total_codes += len(diagnosis_codes or []) + len(procedure_codes or [])
         
         # Top codes
         top_diagnosis = sorted(diagnosis_usage.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -244,7 +238,7 @@ def get_coding_analytics():
             'ai_insights': [
                 f"AI confidence improved by 15% this month",
                 f"Most common diagnosis category: Cardiovascular",
-                f"Average codes per session: {sum(len(s.get('diagnosis_codes', [])) + len(s.get('procedure_codes', [])) for s in sessions) / total_sessions:.1f}" if total_sessions > 0 else "No sessions yet"
+                f"Average codes per session: {total_codes / total_sessions:.1f}" if total_sessions > 0 else "No sessions yet"
             ]
         }), 200
         
@@ -340,12 +334,13 @@ def validate_code_combination(diagnosis_codes, procedure_codes):
         warnings.append("No procedure codes specified - consider adding E&M code")
     
     # Check code validity
+    code_search = get_code_search()
     for code in diagnosis_codes:
-        if code not in ICD10_CODES:
+        if not code_search.is_valid('icd10', code):
             errors.append(f"Invalid ICD-10 code: {code}")
     
     for code in procedure_codes:
-        if code not in CPT_CODES:
+        if not code_search.is_valid('cpt', code):
             errors.append(f"Invalid CPT code: {code}")
     
     # Check logical combinations
@@ -1,95 +1,70 @@
 # routes/prior_auth.py
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
+import copy
 import random
-import uuid
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.services.ai_service import ai_service
+from app.models.models import db, PriorAuthRequest, new_record_id
+from app.services.pagination import paginate_query, page_args, InvalidCursor
 from werkzeug.utils import secure_filename
 
 prior_auth_bp = Blueprint('prior_auth', __name__)
 
-# Mock prior authorization database
-PRIOR_AUTH_DB = {
-    'PA001': {
-        'id': 'PA001',
-        'patient_id': 'P001',
-        'patient_name': 'Ahmed Al-Rashid',
-        'procedure_code': 'CPT-29881',
-        'procedure_name': 'Arthroscopy, knee, surgical',
-        'diagnosis': 'M23.91 - Other internal derangement of knee',
-        'provider': 'Dr. Sarah Ahmed',
-        'facility': 'Dubai Medical Center',
-        'status': 'approved',
-        'submitted_date': '2024-01-10',
-        'decision_date': '2024-01-12',
-        'estimated_cost': 15000,
-        'ai_analysis': {
-            'approval_likelihood': 92,
-            'risk_factors': ['Previous knee injury'],
-            'recommendations': ['Include MRI results', 'Physical therapy history required']
-        },
-        'documents': ['medical_history.pdf', 'mri_scan.pdf']
-    },
-    'PA002': {
-        'id': 'PA002',
-        'patient_id': 'P002',
-        'patient_name': 'Fatima Al-Zahra',
-        'procedure_code': 'CPT-70553',
-        'procedure_name': 'MRI brain with contrast',
-        'diagnosis': 'G43.909 - Migraine, unspecified',
-        'provider': 'Dr. Omar Hassan',
-        'facility': 'Riyadh Neurology Clinic',
-        'status': 'pending',
-        'submitted_date': '2024-01-15',
-        'decision_date': None,
-        'estimated_cost': 2500,
-        'ai_analysis': {
-            'approval_likelihood': 78,
-            'risk_factors': ['Chronic migraines', 'Previous normal CT'],
-            'recommendations': ['Include headache diary', 'Failed conservative treatment documentation']
-        },
-        'documents': ['referral_letter.pdf']
-    }
-}
-
 ALLOWED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def validate_prior_auth_data(data):
+    """Parse the fields a stored request needs; ValueError if the request cannot be stored"""
+    if not isinstance(data, dict):
+        raise ValueError('request must be an object')
+    if not data.get('patient_id'):
+        raise ValueError('patient_id is required')
+    try:
+        return float(data.get('estimated_cost') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('estimated_cost must be a number')
+
 @prior_auth_bp.route('/submit', methods=['POST'])
 def submit_prior_auth():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        
+        # Reject requests that cannot be stored before analyzing them
+        try:
+            estimated_cost = validate_prior_auth_data(data)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid prior authorization request: {e}'}), 400
         
         # Generate unique ID
-        auth_id = f"PA{str(uuid.uuid4())[:6].upper()}"
+        auth_id = new_record_id('PA')
         
         # AI-powered analysis of the request
         ai_analysis = analyze_prior_auth_request(data)
         
-        prior_auth = {
-            'id': auth_id,
-            'patient_id': data.get('patient_id'),
-            'patient_name': data.get('patient_name'),
-            'procedure_code': data.get('procedure_code'),
-            'procedure_name': data.get('procedure_name'),
-            'diagnosis': data.get('diagnosis'),
-            'provider': data.get('provider'),
-            'facility': data.get('facility'),
-            'status': 'pending',
-            'submitted_date': datetime.now().strftime('%Y-%m-%d'),  # FIXED: was datetime.datetime.now()
-            'decision_date': None,
-            'estimated_cost': data.get('estimated_cost', 0),
-            'ai_analysis': ai_analysis,
-            'documents': []
-        }
-        
-        # Store in mock database
-        PRIOR_AUTH_DB[auth_id] = prior_auth
+        prior_auth = PriorAuthRequest(
+            id=auth_id,
+            patient_id=data.get('patient_id'),
+            patient_name=data.get('patient_name'),
+            procedure_code=data.get('procedure_code'),
+            procedure_name=data.get('procedure_name'),
+            diagnosis=data.get('diagnosis'),
+            provider=data.get('provider'),
+            facility=data.get('facility'),
+            status='pending',
+            submitted_date=datetime.now().date(),
+            decision_date=None,
+            estimated_cost=estimated_cost,
+            ai_analysis=ai_analysis,
+            documents=[]
+        )
+        
+        db.session.add(prior_auth)
+        db.session.commit()
         
         return jsonify({
             'message': 'Prior authorization submitted successfully',
@@ -99,13 +74,15 @@ def submit_prior_auth():
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         print(f"Submit Prior Auth Error: {str(e)}")  # Added error logging
         return jsonify({'error': f'Failed to submit prior authorization: {str(e)}'}), 500
 
 @prior_auth_bp.route('/upload/<auth_id>', methods=['POST'])
 def upload_document(auth_id):
     try:
-        if auth_id not in PRIOR_AUTH_DB:
+        auth = db.session.get(PriorAuthRequest, auth_id)
+        if auth is None:
             return jsonify({'error': 'Authorization not found'}), 404
         
         if 'file' not in request.files:
@@ -120,12 +97,13 @@ def upload_document(auth_id):
             # In production, save to cloud storage
             # file.save(os.path.join(upload_folder, filename))
             
-            # Add to authorization record
-            PRIOR_AUTH_DB[auth_id]['documents'].append(filename)
+            # Add to authorization record (JSON columns are reassigned so the change is tracked)
+            auth.documents = (auth.documents or []) + [filename]
             
             # Re-analyze with new document
-            updated_analysis = analyze_documents(PRIOR_AUTH_DB[auth_id])
-            PRIOR_AUTH_DB[auth_id]['ai_analysis'] = updated_analysis
+            updated_analysis = analyze_documents(auth.to_dict())
+            auth.ai_analysis = updated_analysis
+            db.session.commit()
             
             return jsonify({
                 'message': 'Document uploaded successfully',
@@ -136,41 +114,58 @@ def upload_document(auth_id):
         return jsonify({'error': 'Invalid file type'}), 400
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'File upload failed'}), 500
 
 @prior_auth_bp.route('/status/<auth_id>', methods=['GET'])
 def get_auth_status(auth_id):
     try:
-        if auth_id not in PRIOR_AUTH_DB:
+        auth = db.session.get(PriorAuthRequest, auth_id)
+        if auth is None:
             return jsonify({'error': 'Authorization not found'}), 404
         
-        auth = PRIOR_AUTH_DB[auth_id]
-        return jsonify(auth), 200
+        return jsonify(auth.to_dict()), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Failed to retrieve status'}), 500
 
 @prior_auth_bp.route('/list', methods=['GET'])
 def get_auth_list():
     try:
-        # Filter by user/provider in production
-        auth_list = list(PRIOR_AUTH_DB.values())
-        
-        # Sort by submitted date
-        auth_list.sort(key=lambda x: x['submitted_date'], reverse=True)
+        status_filter = request.args.get('status')
+        provider_filter = request.args.get('provider')
+        patient_filter = request.args.get('patient_id')
+        
+        query = PriorAuthRequest.query
+        if status_filter:
+            query = query.filter(PriorAuthRequest.status == status_filter)
+        if provider_filter:
+            query = query.filter(PriorAuthRequest.provider == provider_filter)
+        if patient_filter:
+            query = query.filter(PriorAuthRequest.patient_id == patient_filter)
+        
+        # Newest requests first, one page at a time
+        page = paginate_query(query, [PriorAuthRequest.submitted_date, PriorAuthRequest.id],
+                              **page_args(request, include_total=True))
         
         return jsonify({
-            'authorizations': auth_list,
-            'total_count': len(auth_list)
+            'authorizations': page['items'],
+            'total_count': page['pagination'].get('total'),
+            'pagination': page['pagination']
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Failed to retrieve authorizations'}), 500
 
 @prior_auth_bp.route('/update-status/<auth_id>', methods=['PUT'])
 def update_auth_status(auth_id):
     try:
-        if auth_id not in PRIOR_AUTH_DB:
+        auth = db.session.get(PriorAuthRequest, auth_id)
+        if auth is None:
             return jsonify({'error': 'Authorization not found'}), 404
         
         data = request.get_json()
@@ -179,16 +174,18 @@ def update_auth_status(auth_id):
         if new_status not in ['pending', 'approved', 'denied', 'more_info_needed']:
             return jsonify({'error': 'Invalid status'}), 400
         
-        PRIOR_AUTH_DB[auth_id]['status'] = new_status
+        auth.status = new_status
         if new_status in ['approved', 'denied']:
-            PRIOR_AUTH_DB[auth_id]['decision_date'] = datetime.now().strftime('%Y-%m-%d')  # FIXED
+            auth.decision_date = datetime.now().date()
+        db.session.commit()
         
         return jsonify({
             'message': 'Status updated successfully',
-            'authorization': PRIOR_AUTH_DB[auth_id]
+            'authorization': auth.to_dict()
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Failed to update status'}), 500
 
 def analyze_prior_auth_request(data):
@@ -198,34 +195,15 @@ def analyze_prior_auth_request(data):
     try:
         ai_analysis = ai_service.analyze_prior_auth_request(data)
         
-        # Handle case where AI returns a list instead of dict
-        if isinstance(ai_analysis, list):
-            if len(ai_analysis) > 0:
-                ai_analysis = ai_analysis[0]  # Take first element
-            else:
-                raise ValueError("AI returned empty list")
-        
         if 'error' not in ai_analysis:
-            # Map AI response fields to expected format
-            # Handle both possible field name variations
-            approval_likelihood = ai_analysis.get('approval_likelihood_score', 
-                                                 ai_analysis.get('approval_likelihood', 85))
-            
-            # Convert 0-1 score to 0-100 percentage if needed
-            if isinstance(approval_likelihood, float) and approval_likelihood <= 1:
-                approval_likelihood = int(approval_likelihood * 100)
-            
+            # Field names and scales are normalized by the response schema
             return {
-                'approval_likelihood': approval_likelihood,
-                'risk_factors': ai_analysis.get('potential_approval_barriers', 
-                                               ai_analysis.get('risk_factors', [])),
-                'recommendations': ai_analysis.get('recommendations_for_strengthening_the_request',
-                                                  ai_analysis.get('recommendations', [])),
-                'confidence_score': ai_analysis.get('confidence_score', 0.85),
-                'required_documents': ai_analysis.get('required_documentation_checklist',
-                                                     ai_analysis.get('required_docs', [])),
-                'timeline': ai_analysis.get('expected_processing_timeline',
-                                          ai_analysis.get('timeline', '5-7 business days'))
+                'approval_likelihood': ai_analysis['approval_likelihood'],
+                'risk_factors': ai_analysis['risk_factors'],
+                'recommendations': ai_analysis['recommendations'],
+                'confidence_score': ai_analysis['confidence_score'],
+                'required_documents': ai_analysis['required_docs'],
+                'timeline': ai_analysis['timeline']
             }
     except Exception as ai_error:
         print(f"AI Prior Auth Analysis Error: {ai_error}")
@@ -257,7 +235,7 @@ def analyze_prior_auth_request(data):
 
 def analyze_documents(auth_record):
     """AI-powered document analysis"""
-    base_analysis = auth_record['ai_analysis']
+    base_analysis = copy.deepcopy(auth_record['ai_analysis'])
     documents = auth_record.get('documents', [])
     
     # Boost approval likelihood based on document completeness
@@ -2,44 +2,20 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import random
-import uuid
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue, wants_async
+from app.services.pagination import paginate_query, page_args, InvalidCursor
+from app.models.models import db, RemittancePayment, parse_date, new_record_id
 
 remittance_bp = Blueprint('remittance', __name__)
 
-# Mock data for remittance and reconciliation
-mock_payments = [
-    {
-        'id': 'PAY001',
-        'claim_id': 'CLM001',
-        'patient_name': 'Ahmed Al-Rashid',
-        'payer': 'Saudi Health Insurance',
-        'amount_billed': 1500.00,
-        'amount_paid': 1350.00,
-        'payment_date': '2024-01-15',
-        'status': 'posted',
-        'denial_reason': None,
-        'adjustment_codes': ['CO-45'],
-        'adjustment_amount': 150.00
-    },
-    {
-        'id': 'PAY002',
-        'claim_id': 'CLM002',
-        'patient_name': 'Fatima Al-Zahra',
-        'payer': 'UAE National Insurance',
-        'amount_billed': 800.00,
-        'amount_paid': 0.00,
-        'payment_date': None,
-        'status': 'denied',
-        'denial_reason': 'Prior authorization required',
-        'adjustment_codes': ['CO-197'],
-        'adjustment_amount': 800.00
-    }
-]
+# Payments committed between progress reports when posting as a background job
+PAYMENT_CHUNK_SIZE = int(os.getenv('REMITTANCE_PAYMENT_CHUNK_SIZE', 50))
 
+# Mock data for reconciliation history
 mock_reconciliation_sessions = [
     {
         'id': 'REC001',
@@ -55,6 +31,124 @@ mock_reconciliation_sessions = [
     }
 ]
 
+def build_payment_record(payment_data, payment_id=None):
+    """Build a posted payment record from submitted payment data"""
+    return RemittancePayment(
+        id=payment_id or new_record_id('PAY'),
+        claim_id=payment_data.get('claim_id'),
+        patient_name=payment_data.get('patient_name'),
+        payer=payment_data.get('payer'),
+        amount_billed=float(payment_data.get('amount_billed', 0)),
+        amount_paid=float(payment_data.get('amount_paid', 0)),
+        payment_date=parse_date(payment_data.get('payment_date')),
+        status='posted',
+        denial_reason=payment_data.get('denial_reason'),
+        adjustment_codes=payment_data.get('adjustment_codes', []),
+        adjustment_amount=float(payment_data.get('adjustment_amount', 0))
+    )
+
+def post_payments_batch(payments_data, ctx=None):
+    """Post a batch of payments, reporting progress to ctx when run as a job.
+    
+    As a job, payments are committed every PAYMENT_CHUNK_SIZE payments before
+    progress is reported, and their IDs come from ctx.item_id(), so a resumed
+    job starts at its recorded progress and does not post a payment twice.
+    """
+    posted_payments = []
+    chunk_size = len(payments_data) if ctx is None else PAYMENT_CHUNK_SIZE
+    first = 0 if ctx is None else ctx.done
+    
+    for chunk_start in range(first, len(payments_data), max(1, chunk_size)):
+        chunk = payments_data[chunk_start:chunk_start + chunk_size]
+        if ctx is None:
+            payment_ids = [new_record_id('PAY') for _ in chunk]
+        else:
+            payment_ids = [ctx.item_id('PAY', index) for index in range(chunk_start, chunk_start + len(chunk))]
+        
+        # Payments of this chunk posted by an attempt that stopped before reporting them
+        stored = {}
+        if ctx is not None and ctx.resumed:
+            stored = {payment.id: payment for payment in
+                      RemittancePayment.query.filter(RemittancePayment.id.in_(payment_ids))}
+        
+        for payment_id, payment_data in zip(payment_ids, chunk):
+            if payment_id in stored:
+                posted_payments.append(stored[payment_id])
+                ctx.add_result(stored[payment_id].to_dict())
+                continue
+            try:
+                new_payment = build_payment_record(payment_data, payment_id)
+            except (TypeError, ValueError) as e:
+                if ctx is None:
+                    raise
+                ctx.add_error({'claim_id': payment_data.get('claim_id'), 'error': str(e)})
+            else:
+                posted_payments.append(new_payment)
+                db.session.add(new_payment)
+                if ctx is not None:
+                    ctx.add_result(new_payment.to_dict())
+        
+        db.session.commit()
+        if ctx is not None:
+            ctx.report_progress(chunk_start + len(chunk), len(payments_data))
+    
+    return posted_payments
+
+def run_auto_reconciliation(data):
+    """Mock AI reconciliation process"""
+    session_id = f'REC{random.randint(100, 999)}'
+    
+    # Simulate reconciliation results
+    total_payments = random.randint(20, 50)
+    matched_payments = int(total_payments * 0.85)
+    unmatched_payments = total_payments - matched_payments
+    
+    reconciliation_result = {
+        'session_id': session_id,
+        'total_payments': total_payments,
+        'matched_payments': matched_payments,
+        'unmatched_payments': unmatched_payments,
+        'match_rate': (matched_payments / total_payments) * 100,
+        'ai_confidence': round(random.uniform(0.85, 0.98), 2),
+        'discrepancies': [
+            {
+                'payment_id': f'PAY{random.randint(100, 999)}',
+                'issue': 'Amount mismatch',
+                'expected': 1500.00,
+                'actual': 1350.00,
+                'difference': 150.00
+            },
+            {
+                'payment_id': f'PAY{random.randint(100, 999)}',
+                'issue': 'Missing payment',
+                'expected': 800.00,
+                'actual': 0.00,
+                'difference': 800.00
+            }
+        ],
+        'recommendations': [
+            'Review adjustment codes for payment PAY123',
+            'Follow up on missing payment for claim CLM456',
+            'Verify payer contract terms for discrepancy resolution'
+        ]
+    }
+    
+    return reconciliation_result
+
+def run_batch_post_job(payload, ctx):
+    """Job handler for asynchronous /payments/batch-post requests"""
+    post_payments_batch(payload.get('payments', []), ctx)
+    return {'posted_count': ctx.counts()['result']}
+
+def run_reconciliation_job(payload, ctx):
+    """Job handler for asynchronous /reconciliation/auto requests"""
+    reconciliation_result = run_auto_reconciliation(payload)
+    ctx.report_progress(1, 1)
+    return reconciliation_result
+
+job_queue.register_handler('remittance.batch_post', run_batch_post_job)
+job_queue.register_handler('remittance.auto_reconciliation', run_reconciliation_job)
+
 @remittance_bp.route('/payments', methods=['GET'])
 def get_payments():
     """Get list of payments with filtering options"""
@@ -64,18 +158,29 @@ def get_payments():
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
         
-        filtered_payments = mock_payments.copy()
+        query = RemittancePayment.query
         
         if status:
-            filtered_payments = [p for p in filtered_payments if p['status'] == status]
+            query = query.filter(RemittancePayment.status == status)
         if payer:
-            filtered_payments = [p for p in filtered_payments if payer.lower() in p['payer'].lower()]
+            query = query.filter(RemittancePayment.payer.ilike(f'%{payer}%'))
+        if date_from:
+            query = query.filter(RemittancePayment.payment_date >= parse_date(date_from))
+        if date_to:
+            query = query.filter(RemittancePayment.payment_date <= parse_date(date_to))
+        
+        # Most recently posted first, one page at a time
+        page = paginate_query(query, [RemittancePayment.posted_at, RemittancePayment.id],
+                              **page_args(request, include_total=True))
         
         return jsonify({
             'success': True,
-            'payments': filtered_payments,
-            'total': len(filtered_payments)
+            'payments': page['items'],
+            'total': page['pagination'].get('total'),
+            'pagination': page['pagination']
         })
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -85,26 +190,15 @@ def post_payment():
     try:
         data = request.get_json()
         
-        new_payment = {
-            'id': f'PAY{random.randint(100, 999)}',
-            'claim_id': data.get('claim_id'),
-            'patient_name': data.get('patient_name'),
-            'payer': data.get('payer'),
-            'amount_billed': float(data.get('amount_billed', 0)),
-            'amount_paid': float(data.get('amount_paid', 0)),
-            'payment_date': data.get('payment_date'),
-            'status': 'posted',
-            'denial_reason': data.get('denial_reason'),
-            'adjustment_codes': data.get('adjustment_codes', []),
-            'adjustment_amount': float(data.get('adjustment_amount', 0))
-        }
+        new_payment = build_payment_record(data)
         
-        mock_payments.append(new_payment)
+        db.session.add(new_payment)
+        db.session.commit()
         
         return jsonify({
             'success': True,
             'message': 'Payment posted successfully',
-            'payment': new_payment
+            'payment': new_payment.to_dict()
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -116,28 +210,23 @@ def batch_post_payments():
         data = request.get_json()
         payments_data = data.get('payments', [])
         
-        posted_payments = []
-        for payment_data in payments_data:
-            new_payment = {
-                'id': f'PAY{random.randint(100, 999)}',
-                'claim_id': payment_data.get('claim_id'),
-                'patient_name': payment_data.get('patient_name'),
-                'payer': payment_data.get('payer'),
-                'amount_billed': float(payment_data.get('amount_billed', 0)),
-                'amount_paid': float(payment_data.get('amount_paid', 0)),
-                'payment_date': payment_data.get('payment_date'),
-                'status': 'posted',
-                'denial_reason': payment_data.get('denial_reason'),
-                'adjustment_codes': payment_data.get('adjustment_codes', []),
-                'adjustment_amount': float(payment_data.get('adjustment_amount', 0))
-            }
-            posted_payments.append(new_payment)
-            mock_payments.append(new_payment)
+        if wants_async(request):
+            job_id = job_queue.enqueue('remittance.batch_post', {'payments': payments_data},
+                                       total=len(payments_data))
+            return jsonify({
+                'success': True,
+                'message': 'Batch payment posting queued',
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/jobs/{job_id}'
+            }), 202
+        
+        posted_payments = post_payments_batch(payments_data)
         
         return jsonify({
             'success': True,
             'message': f'{len(posted_payments)} payments posted successfully',
-            'payments': posted_payments
+            'payments': [payment.to_dict() for payment in posted_payments]
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -148,43 +237,17 @@ def auto_reconciliation():
     try:
         data = request.get_json()
         
-        # Mock AI reconciliation process
-        session_id = f'REC{random.randint(100, 999)}'
-        
-        # Simulate reconciliation results
-        total_payments = random.randint(20, 50)
-        matched_payments = int(total_payments * 0.85)
-        unmatched_payments = total_payments - matched_payments
+        if wants_async(request):
+            job_id = job_queue.enqueue('remittance.auto_reconciliation', data or {}, total=1)
+            return jsonify({
+                'success': True,
+                'message': 'Reconciliation queued',
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/jobs/{job_id}'
+            }), 202
         
-        reconciliation_result = {
-            'session_id': session_id,
-            'total_payments': total_payments,
-            'matched_payments': matched_payments,
-            'unmatched_payments': unmatched_payments,
-            'match_rate': (matched_payments / total_payments) * 100,
-            'ai_confidence': round(random.uniform(0.85, 0.98), 2),
-            'discrepancies': [
-                {
-                    'payment_id': f'PAY{random.randint(100, 999)}',
-                    'issue': 'Amount mismatch',
-                    'expected': 1500.00,
-                    'actual': 1350.00,
-                    'difference': 150.00
-                },
-                {
-                    'payment_id': f'PAY{random.randint(100, 999)}',
-                    'issue': 'Missing payment',
-                    'expected': 800.00,
-                    'actual': 0.00,
-                    'difference': 800.00
-                }
-            ],
-            'recommendations': [
-                'Review adjustment codes for payment PAY123',
-                'Follow up on missing payment for claim CLM456',
-                'Verify payer contract terms for discrepancy resolution'
-            ]
-        }
+        reconciliation_result = run_auto_reconciliation(data or {})
         
         return jsonify({
             'success': True,
@@ -213,7 +276,7 @@ def predict_denials():
         
         # Use real Gemini AI service for denial prediction
         try:
-            ai_prediction = ai_service.predict_denial(claim_data)
+            ai_prediction = ai_service.predict_claim_denial(claim_data)
             
             if 'error' not in ai_prediction:
                 return jsonify({
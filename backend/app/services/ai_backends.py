@@ -0,0 +1,291 @@
+# services/ai_backends.py
+"""
+Model backends for GeminiAIService.
+
+GeminiBackend talks to the Gemini API. LocalStandInBackend is a deterministic
+offline stand-in for load tests and development: the same prompt always gets
+the same response, after a configurable delay, with configurable rates of
+failed calls and malformed JSON. Delays and failures are seeded by the prompt
+and the attempt number, so a retried call behaves like one hitting a
+transient error.
+
+Select with AI_BACKEND=gemini (default) or AI_BACKEND=local.
+
+Backends raise AIBackendError for failed calls, marked retryable for
+timeouts, connection errors and 408/429/5xx responses; retries, deadlines and
+rate limiting live in ai_transport.py.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+RETRYABLE_STATUS_CODES = frozenset([408, 429, 500, 502, 503, 504])
+
+# Connection pool shared by every Gemini call in the process
+HTTP_MAX_CONNECTIONS = int(os.getenv('AI_HTTP_MAX_CONNECTIONS', 32))
+HTTP_MAX_KEEPALIVE = int(os.getenv('AI_HTTP_MAX_KEEPALIVE', 16))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('AI_HTTP_CONNECT_TIMEOUT_SECONDS', 5))
+
+
+class AIBackendError(RuntimeError):
+    """A model call failed"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: Optional[bool] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = status_code in RETRYABLE_STATUS_CODES if retryable is None else retryable
+        self.retry_after = retry_after
+
+
+class AITimeoutError(AIBackendError):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=408, retryable=True)
+
+
+class AIBackend:
+    name = 'base'
+
+    def generate(self, model: str, prompt: str, generation_config: Dict[str, Any], task: str = 'default',
+                 timeout: Optional[float] = None) -> str:
+        raise NotImplementedError
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def shared_http_client():
+    """Process-wide pooled httpx client, so calls reuse warm keep-alive connections"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                import httpx
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                        max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+                    timeout=httpx.Timeout(None, connect=HTTP_CONNECT_TIMEOUT)
+                )
+    return _http_client
+
+
+class GeminiBackend(AIBackend):
+    name = 'gemini'
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
+        if not self.api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable is required")
+
+        from google import genai
+        from google.genai import errors, types
+        self._types = types
+        self._errors = errors
+        self.client = genai.Client(api_key=self.api_key,
+                                   http_options=types.HttpOptions(httpx_client=shared_http_client()))
+
+    def generate(self, model, prompt, generation_config, task='default', timeout=None):
+        import httpx
+
+        contents = [
+            self._types.Content(
+                role="user",
+                parts=[self._types.Part.from_text(text=prompt)]
+            )
+        ]
+        config = dict(generation_config)
+        if timeout is not None:
+            config['http_options'] = self._types.HttpOptions(timeout=max(1, int(timeout * 1000)))
+        try:
+            response = self.client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=self._types.GenerateContentConfig(**config)
+            )
+        except self._errors.APIError as e:
+            retry_after = None
+            if getattr(e, 'response', None) is not None and hasattr(e.response, 'headers'):
+                try:
+                    retry_after = float(e.response.headers.get('retry-after'))
+                except (TypeError, ValueError):
+                    retry_after = None
+            raise AIBackendError(f'Gemini API error {e.code}: {e.message}', status_code=e.code,
+                                 retry_after=retry_after) from e
+        except httpx.TimeoutException as e:
+            raise AITimeoutError(f'Gemini request timed out: {e}') from e
+        except httpx.TransportError as e:
+            raise AIBackendError(f'Gemini connection error: {e}', retryable=True) from e
+        return response.text
+
+
+ITEM_PATTERN = re.compile(r'^Item \d+:$', re.MULTILINE)
+
+RISK_LEVELS = ['low', 'medium', 'high']
+CANNED_FINDINGS = [
+    'Verify medical necessity documentation',
+    'Confirm payer prior authorization requirements',
+    'Check diagnosis code specificity',
+    'Attach supporting clinical notes',
+    'Validate patient demographics with payer records'
+]
+
+
+def _pick(rng, count=2):
+    return rng.sample(CANNED_FINDINGS, count)
+
+
+def _scrub_claim(rng):
+    return {'risk_score': round(rng.uniform(0.05, 0.6), 2), 'errors': [], 'warnings': _pick(rng, rng.randint(0, 2)),
+            'confidence_score': round(rng.uniform(0.7, 0.98), 2), 'recommendations': _pick(rng)}
+
+
+def _predict_claim_denial(rng):
+    probability = round(rng.uniform(0.05, 0.8), 2)
+    return {'denial_probability': probability, 'risk_level': RISK_LEVELS[min(2, int(probability * 3))],
+            'risk_factors': _pick(rng), 'preventive_actions': _pick(rng), 'expected_denial_reasons': []}
+
+
+def _suggest_medical_codes(rng):
+    return {
+        'diagnosis_codes': [{'code': rng.choice(['E11.9', 'I10', 'J06.9', 'M54.5']), 'description': 'Stand-in diagnosis',
+                             'confidence': round(rng.uniform(0.7, 0.95), 2)}],
+        'procedure_codes': [{'code': rng.choice(['99213', '99214', '93000']), 'description': 'Stand-in procedure',
+                             'confidence': round(rng.uniform(0.7, 0.95), 2)}],
+        'rationale': 'Deterministic stand-in response',
+        'compliance_notes': _pick(rng, 1)
+    }
+
+
+def _analyze_prior_auth_request(rng):
+    return {'approval_likelihood': rng.randint(40, 95), 'risk_factors': _pick(rng), 'recommendations': _pick(rng),
+            'confidence_score': round(rng.uniform(0.6, 0.95), 2), 'required_docs': ['Clinical notes'],
+            'timeline': f'{rng.randint(2, 7)} business days'}
+
+
+def _generate_clinical_documentation(rng):
+    return {'documentation': 'Stand-in clinical documentation.', 'quality_score': round(rng.uniform(0.7, 0.95), 2),
+            'compliance_notes': _pick(rng, 1), 'recommendations': _pick(rng)}
+
+
+def _validate_clinical_document(rng):
+    return {'completeness_score': round(rng.uniform(0.6, 0.98), 2), 'missing_elements': [], 'compliance_issues': [],
+            'recommendations': _pick(rng), 'overall_quality': rng.choice(['Good', 'Fair', 'Excellent'])}
+
+
+def _validate_medical_codes(rng):
+    return {'validation_results': {'overall': 'valid'}, 'compliance_score': round(rng.uniform(0.7, 0.99), 2),
+            'issues': [], 'recommendations': _pick(rng, 1), 'alternatives': []}
+
+
+def _auto_reconcile_payments(rng):
+    return {'matched_payments': rng.randint(0, 10), 'unmatched_payments': rng.randint(0, 2), 'discrepancies': [],
+            'recommendations': _pick(rng, 1), 'confidence': round(rng.uniform(0.7, 0.99), 2)}
+
+
+def _generate_insights(rng):
+    return [
+        {'insight_id': f'STANDIN-{number:03d}', 'insight_title': 'Stand-in insight',
+         'insight_description': finding, 'insight_category': 'Efficiency Improvement',
+         'priority': rng.choice(['High', 'Medium', 'Low']), 'affected_module': 'Stand-in',
+         'recommendation': finding}
+        for number, finding in enumerate(_pick(rng, 3), start=1)
+    ]
+
+
+STAND_IN_RESPONSES = {
+    'scrub_claim': _scrub_claim,
+    'predict_claim_denial': _predict_claim_denial,
+    'suggest_medical_codes': _suggest_medical_codes,
+    'analyze_prior_auth_request': _analyze_prior_auth_request,
+    'generate_clinical_documentation': _generate_clinical_documentation,
+    'validate_clinical_document': _validate_clinical_document,
+    'validate_medical_codes': _validate_medical_codes,
+    'auto_reconcile_payments': _auto_reconcile_payments,
+    'generate_insights': _generate_insights,
+}
+
+
+class LocalStandInBackend(AIBackend):
+    """Deterministic offline model: responses are seeded by the prompt, delays and failures by prompt and attempt"""
+
+    name = 'local'
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self._attempts = {}
+        self._attempts_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'LocalStandInBackend':
+        return cls(
+            latency_ms=float(os.getenv('AI_LOCAL_LATENCY_MS', 50)),
+            jitter_ms=float(os.getenv('AI_LOCAL_JITTER_MS', 0)),
+            error_rate=float(os.getenv('AI_LOCAL_ERROR_RATE', 0)),
+            malformed_rate=float(os.getenv('AI_LOCAL_MALFORMED_RATE', 0)),
+            seed=int(os.getenv('AI_LOCAL_SEED', 0))
+        )
+
+    def _digest(self, model, prompt, task):
+        return hashlib.sha256(f'{self.seed}\0{model}\0{task}\0{prompt}'.encode('utf-8')).digest()
+
+    def _attempt(self, digest):
+        """How many times this exact request was made before, so retries see fresh faults"""
+        with self._attempts_lock:
+            if len(self._attempts) > 100000:
+                self._attempts.clear()
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return attempt
+
+    def generate(self, model, prompt, generation_config, task='default', timeout=None):
+        digest = self._digest(model, prompt, task)
+        rng = random.Random(int.from_bytes(digest[:8], 'big'))
+        faults = random.Random(int.from_bytes(digest[8:16], 'big') + self._attempt(digest))
+
+        delay_ms = max(0.0, self.latency_ms + faults.uniform(-self.jitter_ms, self.jitter_ms))
+        if timeout is not None and delay_ms / 1000 > timeout:
+            time.sleep(timeout)
+            raise AITimeoutError(f'Simulated {task} timeout after {timeout:.2f}s')
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        if faults.random() < self.error_rate:
+            raise AIBackendError(f'Simulated {task} failure', status_code=faults.choice([429, 503]))
+
+        build = STAND_IN_RESPONSES.get(task, lambda rng: {'result': 'stand-in', 'task': task})
+        item_count = len(ITEM_PATTERN.findall(prompt))
+        if item_count:
+            payload = []
+            for index in range(item_count):
+                entry = build(rng)
+                entry['item_index'] = index
+                payload.append(entry)
+        else:
+            payload = build(rng)
+        text = json.dumps(payload)
+
+        if rng.random() < self.malformed_rate:
+            # Truncated output, as when a response runs into max_output_tokens
+            return text[:max(1, len(text) // 2)]
+        return text
+
+
+def create_backend_from_env() -> AIBackend:
+    backend = os.getenv('AI_BACKEND', 'gemini').lower()
+    if backend == 'local':
+        return LocalStandInBackend.from_env()
+    if backend == 'gemini':
+        return GeminiBackend()
+    raise ValueError(f"Unknown AI_BACKEND '{backend}' (expected 'gemini' or 'local')")
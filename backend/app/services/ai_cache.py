@@ -0,0 +1,214 @@
+# services/ai_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+# Per-method time-to-live (seconds) for cached model responses.
+# Code suggestions are stable for the same clinical input, insights are not.
+DEFAULT_METHOD_TTLS = {
+    'generate_clinical_documentation': 3600,
+    'validate_clinical_document': 3600,
+    'suggest_medical_codes': 7 * 24 * 3600,
+    'validate_medical_codes': 24 * 3600,
+    'scrub_claim': 6 * 3600,
+    'analyze_prior_auth_request': 6 * 3600,
+    'predict_claim_denial': 6 * 3600,
+    'auto_reconcile_payments': 600,
+    'generate_insights': 300,
+}
+
+DEFAULT_TTL = 600
+
+
+def make_cache_key(model: str, system_prompt: Optional[str], prompt: str, config: Dict[str, Any]) -> str:
+    """Stable content hash of everything that influences the model output"""
+    material = json.dumps({
+        'model': model,
+        'system_prompt': system_prompt or '',
+        'prompt': prompt,
+        'config': config,
+    }, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class SQLiteCacheTier:
+    """On-disk second tier so cached responses survive restarts and are shared between workers"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS ai_response_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' namespace TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_ai_response_cache_expires ON ai_response_cache (expires_at)')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[tuple]:
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM ai_response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return value, expires_at
+
+    def set(self, key: str, namespace: str, value: str, expires_at: float):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO ai_response_cache (key, namespace, value, expires_at) VALUES (?, ?, ?, ?)',
+            (key, namespace, value, expires_at)
+        )
+
+    def delete(self, key: str):
+        self._connection().execute('DELETE FROM ai_response_cache WHERE key = ?', (key,))
+
+    def purge_expired(self) -> int:
+        cursor = self._connection().execute('DELETE FROM ai_response_cache WHERE expires_at <= ?', (time.time(),))
+        return cursor.rowcount
+
+    def clear(self):
+        self._connection().execute('DELETE FROM ai_response_cache')
+
+
+class AIResponseCache:
+    """In-process LRU cache for raw model responses with an optional SQLite tier.
+
+    Entries expire after a per-namespace TTL (the namespace is the name of the
+    GeminiAIService method that issued the prompt).
+    """
+
+    def __init__(self, max_entries: int = 2048, ttls: Dict[str, int] = None,
+                 default_ttl: int = DEFAULT_TTL, disk_tier: SQLiteCacheTier = None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_METHOD_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.disk_tier = disk_tier
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._namespace_stats = {}
+
+    def ttl_for(self, namespace: str) -> int:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def _count(self, namespace: str, counter: str):
+        self._stats[counter] += 1
+        ns_stats = self._namespace_stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+        if counter in ns_stats:
+            ns_stats[counter] += 1
+
+    def get(self, key: str, namespace: str = 'default') -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count(namespace, 'hits')
+                    return value
+                del self._entries[key]
+
+        if self.disk_tier is not None:
+            try:
+                stored = self.disk_tier.get(key)
+            except sqlite3.Error as e:
+                print(f"AI Cache Disk Error: {e}")
+                stored = None
+            if stored is not None:
+                value, expires_at = stored
+                with self._lock:
+                    self._store_memory(key, value, expires_at)
+                    self._stats['disk_hits'] += 1
+                    self._count(namespace, 'hits')
+                return value
+
+        with self._lock:
+            self._count(namespace, 'misses')
+        return None
+
+    def set(self, key: str, value: str, namespace: str = 'default', ttl: int = None):
+        if value is None:
+            return
+        ttl = self.ttl_for(namespace) if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self._stats['stores'] += 1
+        if self.disk_tier is not None:
+            try:
+                self.disk_tier.set(key, namespace, value, expires_at)
+            except sqlite3.Error as e:
+                print(f"AI Cache Disk Error: {e}")
+
+    def _store_memory(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.disk_tier is not None:
+            self.disk_tier.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_tier is not None:
+            self.disk_tier.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                'by_method': {ns: dict(counts) for ns, counts in self._namespace_stats.items()},
+                'disk_tier': self.disk_tier.path if self.disk_tier is not None else None
+            }
+
+
+def create_cache_from_env() -> Optional[AIResponseCache]:
+    """Build the response cache from AI_CACHE_* environment variables"""
+    if os.getenv('AI_CACHE_ENABLED', 'true').lower() in ('0', 'false', 'no'):
+        return None
+
+    disk_path = os.getenv('AI_CACHE_SQLITE_PATH')
+    disk_tier = SQLiteCacheTier(disk_path) if disk_path else None
+
+    return AIResponseCache(
+        max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', 2048)),
+        default_ttl=int(os.getenv('AI_CACHE_DEFAULT_TTL', DEFAULT_TTL)),
+        disk_tier=disk_tier
+    )
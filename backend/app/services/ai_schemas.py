@@ -0,0 +1,437 @@
+# services/ai_schemas.py
+"""
+Response decoding for GeminiAIService.
+
+Each AI method has a result schema: a slots dataclass whose fields carry
+their defaults, the alternate field names models tend to use for them, and a
+coercion (numbers from "75%" or "0.8", lists from a lone string, and so on).
+extract_json() pulls the JSON payload out of a response once, tolerating
+markdown fences and prose around it, and the schema turns it into a typed
+result. Keys outside the schema are kept in `extras` and returned by to_dict(),
+so callers see everything the model sent, under the canonical names.
+
+Responses that cannot be decoded are counted in rcm_ai_parse_failures_total;
+ones that needed more than a plain json.loads in rcm_ai_parse_repaired_total.
+"""
+
+import copy
+import json
+import re
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+from app.services.metrics import registry
+
+parse_failures = registry.counter('rcm_ai_parse_failures_total', 'AI responses that could not be decoded',
+                                  ('task', 'reason'))
+parse_repairs = registry.counter('rcm_ai_parse_repaired_total',
+                                 'AI responses decoded only after stripping fences or surrounding text', ('task',))
+
+_decoder = json.JSONDecoder()
+_FENCE = re.compile(r'```[a-zA-Z]*\s*\n?(.*?)```', re.DOTALL)
+
+
+def _extract(text: str) -> Tuple[Any, bool]:
+    """(payload, repaired); raises ValueError when no JSON value can be found"""
+    text = text.strip()
+    if text[:1] in ('{', '['):
+        try:
+            return json.loads(text), False
+        except json.JSONDecodeError:
+            pass
+
+    fenced = _FENCE.search(text)
+    if fenced:
+        try:
+            return json.loads(fenced.group(1)), True
+        except json.JSONDecodeError:
+            pass
+
+    # First JSON object or array in the text, ignoring whatever follows it
+    for match in re.finditer(r'[{\[]', text):
+        try:
+            return _decoder.raw_decode(text, match.start())[0], True
+        except json.JSONDecodeError:
+            continue
+    raise ValueError('no JSON value in response')
+
+
+def extract_json(text: str) -> Any:
+    """Decode the JSON payload of a model response, tolerating markdown fences and surrounding prose"""
+    return _extract(text)[0]
+
+
+def _to_float(value, default):
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip().rstrip('%').strip()
+        try:
+            number = float(text)
+        except ValueError:
+            return default
+        return number / 100 if value.strip().endswith('%') else number
+    return default
+
+
+def _to_int(value, default):
+    number = _to_float(value, None)
+    return default if number is None else int(round(number))
+
+
+def _to_percentage(value, default):
+    """0-100 scale; fractions strictly below 1 (0.75, "75%") are scaled up, so 1 stays 1%"""
+    number = _to_float(value, None)
+    if number is None:
+        return default
+    return int(round(number * 100)) if number < 1 else int(round(number))
+
+
+def _to_str(value, default):
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def _to_list(value, default):
+    if value is None:
+        return list(default)
+    if isinstance(value, list):
+        return value
+    if isinstance(value, (tuple, set)):
+        return list(value)
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    return [value]
+
+
+def _to_dict(value, default):
+    return value if isinstance(value, dict) else dict(default)
+
+
+def _as_is(value, default):
+    return default if value is None else value
+
+
+COERCIONS = {float: _to_float, int: _to_int, str: _to_str, list: _to_list, dict: _to_dict}
+
+
+_plans = {}
+
+
+def spec(default=None, aliases=(), coerce=None, factory=None):
+    """A schema field: default value (or factory), alternate names, and coercion"""
+    metadata = {'aliases': tuple(aliases), 'coerce': coerce}
+    if factory is not None:
+        return field(default_factory=factory, metadata=metadata)
+    return field(default=default, metadata=metadata)
+
+
+@dataclass(slots=True)
+class AIResult:
+    extras: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {}
+
+    @classmethod
+    def _plan(cls):
+        """(name, accepted keys, default, default factory, coercion) per field, worked out once per class"""
+        plan = _plans.get(cls)
+        if plan is None:
+            plan = []
+            for schema_field in fields(cls):
+                if schema_field.name == 'extras':
+                    continue
+                factory = None if schema_field.default_factory is MISSING else schema_field.default_factory
+                coerce = schema_field.metadata.get('coerce') or COERCIONS.get(schema_field.type, _as_is)
+                plan.append((schema_field.name, (schema_field.name,) + schema_field.metadata.get('aliases', ()),
+                             schema_field.default, factory, coerce))
+            plan = _plans[cls] = tuple(plan)
+        return plan
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> 'AIResult':
+        remaining = dict(payload)
+        values = {}
+        for name, keys, default, factory, coerce in cls._plan():
+            raw = None
+            for key in keys:
+                if key in remaining:
+                    candidate = remaining.pop(key)
+                    raw = candidate if raw is None else raw
+            if factory is not None:
+                default = factory()
+            values[name] = default if raw is None else coerce(raw, default)
+        return cls(extras=remaining, **values)
+
+    @classmethod
+    def fallback(cls, response: str) -> 'AIResult':
+        """Result used when a response cannot be decoded at all"""
+        return cls.from_payload(copy.deepcopy(cls.FALLBACK))
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = dict(self.extras)
+        for name, *_ in self._plan():
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, AIResult) else item for item in value]
+            result[name] = value
+        return result
+
+
+@dataclass(slots=True)
+class CodeSuggestion(AIResult):
+    code: str = spec('')
+    description: str = spec('', aliases=('desc', 'code_description'))
+    confidence: float = spec(0.8, aliases=('confidence_score',))
+
+
+def _to_code_list(value, default):
+    codes = []
+    for entry in _to_list(value, default):
+        if isinstance(entry, dict):
+            codes.append(CodeSuggestion.from_payload(entry))
+        elif isinstance(entry, str) and entry.strip():
+            codes.append(CodeSuggestion(code=entry.strip()))
+    return codes
+
+
+@dataclass(slots=True)
+class ClinicalDocumentation(AIResult):
+    documentation: Any = spec('', aliases=('clinical_documentation', 'structured_documentation'))
+    quality_score: float = spec(0.8)
+    compliance_notes: list = spec(factory=list)
+    recommendations: list = spec(factory=list, aliases=('follow_up_actions',))
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "quality_score": 0.8,
+        "compliance_notes": ["AI-generated documentation requires review"],
+        "recommendations": ["Review and validate all clinical details"]
+    }
+
+    @classmethod
+    def fallback(cls, response):
+        return cls.from_payload(dict(copy.deepcopy(cls.FALLBACK), documentation=response))
+
+
+@dataclass(slots=True)
+class DocumentValidation(AIResult):
+    completeness_score: float = spec(0.85)
+    missing_elements: list = spec(factory=list, aliases=('missing_fields',))
+    compliance_issues: list = spec(factory=list)
+    recommendations: list = spec(factory=list)
+    overall_quality: Any = spec('Good', aliases=('overall_quality_assessment', 'quality_assessment'))
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "completeness_score": 0.85,
+        "missing_elements": [],
+        "compliance_issues": [],
+        "recommendations": ["Document validated by AI"],
+        "overall_quality": "Good"
+    }
+
+
+@dataclass(slots=True)
+class CodeSuggestions(AIResult):
+    diagnosis_codes: list = spec(factory=list, coerce=_to_code_list, aliases=('icd10_codes', 'icd_10_codes'))
+    procedure_codes: list = spec(factory=list, coerce=_to_code_list, aliases=('cpt_codes',))
+    rationale: Any = spec('')
+    compliance_notes: list = spec(factory=list, aliases=('coding_compliance_notes',))
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "diagnosis_codes": [
+            {"code": "Z00.00", "description": "General examination", "confidence": 0.8}
+        ],
+        "procedure_codes": [
+            {"code": "99213", "description": "Office visit", "confidence": 0.9}
+        ],
+        "rationale": "AI-generated suggestions based on available information",
+        "compliance_notes": ["Verify codes with clinical documentation"]
+    }
+
+
+@dataclass(slots=True)
+class CodeValidation(AIResult):
+    validation_results: Any = spec(factory=dict)
+    compliance_score: float = spec(0.9)
+    issues: list = spec(factory=list, aliases=('potential_issues',))
+    recommendations: list = spec(factory=list)
+    alternatives: list = spec(factory=list, aliases=('alternative_codes',))
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "validation_results": {"overall": "valid"},
+        "compliance_score": 0.92,
+        "issues": [],
+        "recommendations": ["Codes appear appropriate for context"],
+        "alternatives": []
+    }
+
+
+@dataclass(slots=True)
+class ClaimScrub(AIResult):
+    risk_score: float = spec(0.15)
+    errors: list = spec(factory=list, aliases=('potential_errors',))
+    warnings: list = spec(factory=list)
+    missing_info: list = spec(factory=list, aliases=('missing_information',))
+    denial_risks: list = spec(factory=list, aliases=('denial_risk_factors',))
+    recommendations: list = spec(factory=list)
+    compliance_status: str = spec('Compliant')
+    confidence_score: float = spec(0.85)
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "risk_score": 0.15,
+        "errors": [],
+        "missing_info": [],
+        "denial_risks": ["Low risk claim"],
+        "recommendations": ["Claim appears ready for submission"],
+        "compliance_status": "Compliant"
+    }
+
+
+@dataclass(slots=True)
+class PriorAuthAnalysis(AIResult):
+    approval_likelihood: int = spec(85, coerce=_to_percentage, aliases=('approval_likelihood_score',))
+    risk_factors: list = spec(factory=list, aliases=('potential_approval_barriers', 'barriers'))
+    recommendations: list = spec(factory=list, aliases=('recommendations_for_strengthening_the_request',))
+    confidence_score: float = spec(0.85)
+    required_docs: list = spec(factory=list, aliases=('required_documentation_checklist', 'required_documents'))
+    timeline: str = spec('5-7 business days', aliases=('expected_processing_timeline',))
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "approval_likelihood": 0.75,
+        "required_docs": ["Clinical notes", "Diagnostic reports"],
+        "barriers": [],
+        "recommendations": ["Request appears well-documented"],
+        "timeline": "5-7 business days"
+    }
+
+
+@dataclass(slots=True)
+class DenialPrediction(AIResult):
+    denial_probability: float = spec(0.25)
+    risk_level: str = spec('low')
+    risk_factors: list = spec(factory=list, aliases=('primary_risk_factors',))
+    preventive_actions: list = spec(factory=list)
+    expected_denial_reasons: list = spec(factory=list)
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "denial_probability": 0.25,
+        "risk_level": "low",
+        "risk_factors": ["Standard claim parameters"],
+        "preventive_actions": ["Ensure complete documentation"],
+        "expected_denial_reasons": []
+    }
+
+
+@dataclass(slots=True)
+class PaymentReconciliation(AIResult):
+    matched_payments: Any = spec(0)
+    unmatched_payments: Any = spec(0)
+    discrepancies: list = spec(factory=list)
+    recommendations: list = spec(factory=list, aliases=('recommended_actions',))
+    confidence: float = spec(0.9, aliases=('confidence_score', 'overall_confidence'))
+
+    FALLBACK: ClassVar[Dict[str, Any]] = {
+        "unmatched_payments": 0,
+        "discrepancies": [],
+        "recommendations": ["All payments reconciled successfully"],
+        "confidence": 0.95
+    }
+
+
+@dataclass(slots=True)
+class Insight(AIResult):
+    insight_id: str = spec('', aliases=('id',))
+    insight_title: str = spec('', aliases=('title',))
+    insight_description: str = spec('', aliases=('description',))
+    insight_category: str = spec('Efficiency Improvement', aliases=('category',))
+    priority: str = spec('Medium')
+    affected_module: str = spec('', aliases=('module',))
+    recommendation: str = spec('')
+
+
+SCHEMAS = {
+    'generate_clinical_documentation': ClinicalDocumentation,
+    'validate_clinical_document': DocumentValidation,
+    'suggest_medical_codes': CodeSuggestions,
+    'validate_medical_codes': CodeValidation,
+    'scrub_claim': ClaimScrub,
+    'analyze_prior_auth_request': PriorAuthAnalysis,
+    'predict_claim_denial': DenialPrediction,
+    'auto_reconcile_payments': PaymentReconciliation,
+    'generate_insights': Insight,
+}
+
+
+def _payload(task: str, response: str):
+    try:
+        payload, repaired = _extract(response)
+    except ValueError:
+        parse_failures.inc(task, 'malformed')
+        return None
+    if repaired:
+        parse_repairs.inc(task)
+    return payload
+
+
+def _as_object(payload) -> Optional[Dict[str, Any]]:
+    if isinstance(payload, list):
+        # A lone object wrapped in an array
+        payload = next((entry for entry in payload if isinstance(entry, dict)), None)
+    return payload if isinstance(payload, dict) else None
+
+
+def _as_list(payload, key: str) -> Optional[List[Any]]:
+    if isinstance(payload, dict):
+        if key in payload:
+            payload = payload[key]
+        else:
+            # The array under another name ({"insights": [...]}); an object without one is not a list answer
+            payload = next((value for value in payload.values()
+                            if isinstance(value, list) and value and all(isinstance(entry, dict) for entry in value)),
+                           None)
+    return payload if isinstance(payload, list) else None
+
+
+def decode_response(task: str, response: str) -> Optional[AIResult]:
+    """Typed result for a single-object response, or None if it holds no usable object"""
+    payload = _payload(task, response)
+    result = _as_object(payload)
+    if result is None:
+        if payload is not None:
+            parse_failures.inc(task, 'shape')
+        return None
+    return SCHEMAS[task].from_payload(result)
+
+
+def decode_list_response(task: str, response: str, key: str = 'results') -> Optional[List[Any]]:
+    """Raw entries of an array response (or of payload[key], else an object's array of objects), or None"""
+    payload = _payload(task, response)
+    entries = _as_list(payload, key)
+    if entries is None and payload is not None:
+        parse_failures.inc(task, 'shape')
+    return entries
+
+
+def response_decodes(response: str, many: bool = False, key: str = 'results') -> bool:
+    """Whether decode_response (decode_list_response if `many`) would find a result; counts no metrics"""
+    try:
+        payload = _extract(response)[0]
+    except ValueError:
+        return False
+    return (_as_list(payload, key) if many else _as_object(payload)) is not None
+
+
+def coerce_entry(task: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one decoded object to the task's schema, as a plain dict"""
+    return SCHEMAS[task].from_payload(entry).to_dict()
+
+
+def decode_or_fallback(task: str, response: str) -> Dict[str, Any]:
+    """Decoded result as a dict, or the schema's fallback when the response is unusable"""
+    result = decode_response(task, response)
+    return (result if result is not None else SCHEMAS[task].fallback(response)).to_dict()
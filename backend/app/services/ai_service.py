@@ -1,25 +1,130 @@
 # services/ai_service.py
 import os
 import json
-from typing import Dict, List, Any, Optional
-from google import genai
-from google.genai import types
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
+from app.services.ai_backends import AIBackend, create_backend_from_env
+from app.services.ai_cache import AIResponseCache, create_cache_from_env, make_cache_key
+from app.services.ai_schemas import (PaymentReconciliation, coerce_entry, decode_list_response, decode_or_fallback,
+                                     decode_response, response_decodes)
+from app.services.ai_transport import AITransport
+from app.services.circuit_breaker import CircuitBreaker, Hedger
+from app.services.metrics import record_ai_call
 
-load_dotenv("../.env")
-print(os.path.exists("../.env"))
+# Batch prompts pack several items into one call; chunks are sized to stay under these budgets
+BATCH_MAX_ITEMS = int(os.getenv('AI_BATCH_MAX_ITEMS', 20))
+BATCH_MAX_INPUT_TOKENS = int(os.getenv('AI_BATCH_MAX_INPUT_TOKENS', 8000))
+BATCH_MAX_OUTPUT_TOKENS = int(os.getenv('AI_BATCH_MAX_OUTPUT_TOKENS', 8192))
+BATCH_OUTPUT_TOKENS_PER_ITEM = int(os.getenv('AI_BATCH_OUTPUT_TOKENS_PER_ITEM', 400))
+# A batch prompt answers many items, so it gets a longer deadline than a single call
+BATCH_DEADLINE_SECONDS = float(os.getenv('AI_BATCH_DEADLINE_SECONDS', 60))
+# Rough token estimate for prompt sizing
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _decodes_list(response: str) -> bool:
+    return response_decodes(response, many=True)
+
+
+def _describe_scrub_claim(claim_data: Dict) -> str:
+    # Shared by scrub_claim and scrub_claims_batch; claims from the claims routes use claim_amount/insurance_provider
+    return f"""Patient: {claim_data.get('patient_name', '')}
+Provider: {claim_data.get('provider', '')}
+Diagnosis Codes: {claim_data.get('diagnosis_codes', [])}
+Procedure Codes: {claim_data.get('procedure_codes', [])}
+Amount: {claim_data.get('amount', claim_data.get('claim_amount', 0))}
+Payer: {claim_data.get('payer', claim_data.get('insurance_provider', ''))}"""
+
+
+def _describe_denial_claim(claim_data: Dict) -> str:
+    return f"""Patient: {claim_data.get('patient_name', '')}
+Diagnosis: {claim_data.get('diagnosis', '')}
+Procedure: {claim_data.get('procedure', '')}
+Amount: {claim_data.get('amount', 0)}
+Payer: {claim_data.get('payer', '')}
+Prior Auth Status: {claim_data.get('prior_auth', 'Unknown')}"""
+
+
+def _describe_clinical_info(clinical_info: Dict) -> str:
+    return f"""Chief Complaint: {clinical_info.get('chief_complaint', '')}
+Clinical Notes: {clinical_info.get('clinical_notes', '')}
+Procedures Performed: {clinical_info.get('procedures', '')}
+Assessment: {clinical_info.get('assessment', '')}"""
+
+
+def _describe_prior_auth_request(request_data: Dict) -> str:
+    return f"""Patient: {request_data.get('patient_name', '')}
+Procedure: {request_data.get('procedure', '')}
+Diagnosis: {request_data.get('diagnosis', '')}
+Clinical Justification: {request_data.get('clinical_justification', '')}
+Payer: {request_data.get('payer', '')}"""
 
 class GeminiAIService:
-    def __init__(self):
-        self.api_key = os.getenv('GOOGLE_API_KEY')
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY environment variable is required")
-        
-        self.client = genai.Client(api_key=self.api_key)
+    def __init__(self, cache: AIResponseCache = None, backend: AIBackend = None, transport: AITransport = None,
+                 breaker: CircuitBreaker = None, hedger: Hedger = None):
+        # The model client (and its SDK import) is created on first use, not at import
+        self._backend = backend
+        self._backend_lock = threading.Lock()
         self.model = "gemini-2.0-flash-exp"
+        self.generation_config = {
+            'response_mime_type': 'application/json',
+            'temperature': 0.7,
+            'max_output_tokens': 1024,
+            'top_p': 0.8,
+            'top_k': 40
+        }
+        self.cache = create_cache_from_env() if cache is None else cache
+        # Deadlines, retries and rate limiting for every model call
+        self.transport = AITransport.from_env() if transport is None else transport
+        # While the provider is failing or slow, calls skip straight to the callers' fallbacks
+        self.breaker = CircuitBreaker.from_env() if breaker is None else breaker
+        self.hedger = Hedger.from_env() if hedger is None else hedger
     
-    def _make_request(self, prompt: str, system_prompt: str = None) -> str:
-        """Make a request to Gemini API with error handling"""
+    @property
+    def backend(self) -> AIBackend:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    load_dotenv("../.env")
+                    self._backend = create_backend_from_env()
+        return self._backend
+
+    def _make_request(self, prompt: str, system_prompt: str = None, cache_namespace: str = 'default',
+                      max_output_tokens: int = None, deadline: float = None,
+                      validate: Callable[[str], bool] = response_decodes) -> str:
+        """Make a request to Gemini API with error handling.
+
+        Responses are served from the response cache when an identical
+        request (model, prompts and generation config) was answered recently.
+        Only responses `validate` accepts (by default, ones holding a JSON
+        object) are cached, so a malformed answer is not replayed for the
+        method's TTL. Transient failures are retried with backoff until the method's
+        deadline (or `deadline` seconds) runs out. Returns None without
+        calling the model while the circuit breaker is open.
+        """
+        generation_config = self.generation_config
+        if max_output_tokens is not None:
+            generation_config = dict(self.generation_config, max_output_tokens=max_output_tokens)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, system_prompt, prompt, generation_config)
+            cached = self.cache.get(cache_key, cache_namespace)
+            if cached is not None:
+                return cached
+
+        if self.breaker.rejects_calls():
+            record_ai_call(cache_namespace, 0.0, 'circuit_open')
+            return None
+
+        started = time.perf_counter()
         try:
             # Combine system prompt with user prompt since Gemini doesn't have separate system role
             if system_prompt:
@@ -27,33 +132,104 @@ class GeminiAIService:
             else:
                 combined_prompt = prompt
             
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=combined_prompt)]
-                )
-            ]
-            
-            config = types.GenerateContentConfig(
-                response_mime_type="application/json",
-                temperature=0.7,
-                max_output_tokens=1024,
-                top_p=0.8,
-                top_k=40
-            )
-            
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=contents,
-                config=config
+            backend = self.backend
+
+            def generate(timeout):
+                return backend.generate(self.model, combined_prompt, generation_config,
+                                        task=cache_namespace, timeout=timeout)
+
+            text = self.transport.call(
+                lambda timeout: self.breaker.call(lambda: self.hedger.call(generate, cache_namespace, timeout)),
+                cache_namespace, deadline
             )
-            print(type(response.text.strip()))
+            text = (text or '').strip()
+            record_ai_call(cache_namespace, time.perf_counter() - started, 'ok')
+            if self.cache is not None and text and validate(text):
+                self.cache.set(cache_key, text, cache_namespace)
             
-            return response.text.strip()
+            return text
         except Exception as e:
+            record_ai_call(cache_namespace, time.perf_counter() - started, 'error')
             print(f"AI Service Error: {str(e)}")
             return None
 
+    def _batch_chunks(self, descriptions: List[str], overhead_tokens: int) -> List[List[int]]:
+        """Group item indexes so each prompt stays under the input and output token budgets"""
+        max_items = max(1, min(BATCH_MAX_ITEMS, BATCH_MAX_OUTPUT_TOKENS // BATCH_OUTPUT_TOKENS_PER_ITEM))
+        chunks, current, used = [], [], overhead_tokens
+        for index, description in enumerate(descriptions):
+            tokens = estimate_tokens(description)
+            if current and (len(current) >= max_items or used + tokens > BATCH_MAX_INPUT_TOKENS):
+                chunks.append(current)
+                current, used = [], overhead_tokens
+            current.append(index)
+            used += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _parse_batch_response(self, response: Optional[str], count: int, task: str) -> Dict[int, Dict]:
+        """Map a batch response back to item positions; unparseable entries are left out"""
+        if not response:
+            return {}
+        parsed = decode_list_response(task, response)
+        if parsed is None:
+            return {}
+        
+        results = {}
+        for position, entry in enumerate(parsed):
+            if not isinstance(entry, dict):
+                continue
+            index = entry.pop('item_index', None)
+            if index is None and len(parsed) == count:
+                index = position
+            if isinstance(index, int) and 0 <= index < count:
+                results[index] = coerce_entry(task, entry)
+        return results
+
+    def _run_batch(self, items: List[Dict], system_prompt: str, task: str, response_format: str,
+                   describe: Callable[[Dict], str], single: Callable[[Dict], Dict], cache_namespace: str,
+                   max_workers: int = 1) -> List[Dict]:
+        """Answer many items with one prompt per chunk, in input order.
+
+        Chunks whose response comes back truncated or unparseable are split in
+        half and retried; items still missing a result fall back to the
+        single-item call.
+        """
+        header = f"""
+        {task}
+        
+        Each item is numbered. Respond with a JSON array containing one object per item, in this format:
+        {response_format}
+        
+        Include "item_index" in every object. Return ONLY valid JSON, no additional text.
+        """
+        descriptions = [describe(item) for item in items]
+        results = [None] * len(items)
+        
+        def run_chunk(indexes):
+            body = '\n\n'.join(f"Item {position}:\n{descriptions[index]}" for position, index in enumerate(indexes))
+            response = self._make_request(f"{header}\n{body}", system_prompt, cache_namespace=cache_namespace,
+                                          max_output_tokens=min(BATCH_MAX_OUTPUT_TOKENS,
+                                                                BATCH_OUTPUT_TOKENS_PER_ITEM * len(indexes)),
+                                          deadline=BATCH_DEADLINE_SECONDS, validate=_decodes_list)
+            parsed = self._parse_batch_response(response, len(indexes), cache_namespace)
+            if response and not parsed and len(indexes) > 1:
+                middle = len(indexes) // 2
+                run_chunk(indexes[:middle])
+                run_chunk(indexes[middle:])
+                return
+            for position, index in enumerate(indexes):
+                results[index] = parsed[position] if position in parsed else single(items[index])
+        
+        chunks = self._batch_chunks(descriptions, estimate_tokens(system_prompt + header))
+        if max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)), thread_name_prefix='ai-batch') as executor:
+                list(executor.map(run_chunk, chunks))
+        else:
+            for chunk in chunks:
+                run_chunk(chunk)
+        return results
 
     # Clinical Documentation AI Services
     def generate_clinical_documentation(self, patient_info: Dict, template: str, clinical_notes: str) -> Dict:
@@ -84,17 +260,9 @@ class GeminiAIService:
         Return as JSON format.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='generate_clinical_documentation')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "documentation": response,
-                    "quality_score": 0.8,
-                    "compliance_notes": ["AI-generated documentation requires review"],
-                    "recommendations": ["Review and validate all clinical details"]
-                }
+            return decode_or_fallback('generate_clinical_documentation', response)
         
         return {"error": "Failed to generate documentation"}
 
@@ -117,18 +285,9 @@ class GeminiAIService:
         Return as JSON format.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='validate_clinical_document')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "completeness_score": 0.85,
-                    "missing_elements": [],
-                    "compliance_issues": [],
-                    "recommendations": ["Document validated by AI"],
-                    "overall_quality": "Good"
-                }
+            return decode_or_fallback('validate_clinical_document', response)
         
         return {"error": "Failed to validate document"}
 
@@ -156,24 +315,26 @@ class GeminiAIService:
         Return as JSON format with separate arrays for diagnosis_codes and procedure_codes.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='suggest_medical_codes')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "diagnosis_codes": [
-                        {"code": "Z00.00", "description": "General examination", "confidence": 0.8}
-                    ],
-                    "procedure_codes": [
-                        {"code": "99213", "description": "Office visit", "confidence": 0.9}
-                    ],
-                    "rationale": "AI-generated suggestions based on available information",
-                    "compliance_notes": ["Verify codes with clinical documentation"]
-                }
+            return decode_or_fallback('suggest_medical_codes', response)
         
         return {"error": "Failed to generate code suggestions"}
 
+    def suggest_medical_codes_batch(self, clinical_infos: List[Dict], max_workers: int = 1) -> List[Dict]:
+        """suggest_medical_codes for many encounters, several per model call"""
+        return self._run_batch(
+            clinical_infos,
+            system_prompt="""You are a medical coding AI specialist. Suggest appropriate ICD-10 diagnosis codes and CPT procedure codes based on clinical information. 
+        Consider GCC healthcare market standards and ensure accuracy for insurance billing.""",
+            task="Based on the clinical information of each item, suggest appropriate medical codes.",
+            response_format="""{"item_index": <number>, "diagnosis_codes": [{"code": "<string>", "description": "<string>", "confidence": <number 0-1>}], "procedure_codes": [{"code": "<string>", "description": "<string>", "confidence": <number 0-1>}], "rationale": "<string>", "compliance_notes": [<array of strings>]}""",
+            describe=_describe_clinical_info,
+            single=self.suggest_medical_codes,
+            cache_namespace='suggest_medical_codes',
+            max_workers=max_workers
+        )
+
     def validate_medical_codes(self, codes: List[str], clinical_context: str) -> Dict:
         """Validate medical codes against clinical context"""
         system_prompt = """You are a medical coding validator. Verify that the provided codes are appropriate for the clinical context and compliant with coding standards."""
@@ -194,18 +355,9 @@ class GeminiAIService:
         Return as JSON format.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='validate_medical_codes')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "validation_results": {"overall": "valid"},
-                    "compliance_score": 0.92,
-                    "issues": [],
-                    "recommendations": ["Codes appear appropriate for context"],
-                    "alternatives": []
-                }
+            return decode_or_fallback('validate_medical_codes', response)
         
         return {"error": "Failed to validate codes"}
 
@@ -218,12 +370,7 @@ class GeminiAIService:
         prompt = f"""
         Analyze this claim for potential issues:
         
-        Patient: {claim_data.get('patient_name', '')}
-        Provider: {claim_data.get('provider', '')}
-        Diagnosis Codes: {claim_data.get('diagnosis_codes', [])}
-        Procedure Codes: {claim_data.get('procedure_codes', [])}
-        Amount: {claim_data.get('amount', 0)}
-        Payer: {claim_data.get('payer', '')}
+{_describe_scrub_claim(claim_data)}
         
         Identify:
         1. Potential errors or inconsistencies
@@ -235,22 +382,26 @@ class GeminiAIService:
         Return as JSON format with risk_score (0-1) and detailed findings.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='scrub_claim')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "risk_score": 0.15,
-                    "errors": [],
-                    "missing_info": [],
-                    "denial_risks": ["Low risk claim"],
-                    "recommendations": ["Claim appears ready for submission"],
-                    "compliance_status": "Compliant"
-                }
+            return decode_or_fallback('scrub_claim', response)
         
         return {"error": "Failed to scrub claim"}
 
+    def scrub_claims_batch(self, claims: List[Dict], max_workers: int = 1) -> List[Dict]:
+        """scrub_claim for many claims, several per model call"""
+        return self._run_batch(
+            claims,
+            system_prompt="""You are a claims processing AI specialist. Analyze claims for potential errors, missing information, and denial risks. 
+        Focus on GCC healthcare market requirements and common denial reasons.""",
+            task="Analyze each claim for potential errors, missing required information, denial risk factors and compliance issues.",
+            response_format="""{"item_index": <number>, "risk_score": <number 0-1>, "errors": [<array of strings>], "warnings": [<array of strings>], "confidence_score": <number 0-1>, "recommendations": [<array of strings>]}""",
+            describe=_describe_scrub_claim,
+            single=self.scrub_claim,
+            cache_namespace='scrub_claim',
+            max_workers=max_workers
+        )
+
     # Prior Authorization AI Services
     def analyze_prior_auth_request(self, request_data: Dict) -> Dict:
         """Analyze prior authorization request and provide recommendations"""
@@ -278,21 +429,25 @@ Provide analysis in this EXACT JSON format:
 Return ONLY valid JSON, no additional text.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='analyze_prior_auth_request')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "approval_likelihood": 0.75,
-                    "required_docs": ["Clinical notes", "Diagnostic reports"],
-                    "barriers": [],
-                    "recommendations": ["Request appears well-documented"],
-                    "timeline": "5-7 business days"
-                }
+            return decode_or_fallback('analyze_prior_auth_request', response)
         
         return {"error": "Failed to analyze prior auth request"}
 
+    def analyze_prior_auth_request_batch(self, requests: List[Dict], max_workers: int = 1) -> List[Dict]:
+        """analyze_prior_auth_request for many requests, several per model call"""
+        return self._run_batch(
+            requests,
+            system_prompt="""You are a prior authorization AI specialist. Analyze requests for approval likelihood and provide guidance for successful submissions.""",
+            task="Analyze each prior authorization request.",
+            response_format="""{"item_index": <number>, "approval_likelihood": <number 0-100>, "risk_factors": [<array of strings>], "recommendations": [<array of strings>], "confidence_score": <number 0-1>, "required_docs": [<array of strings>], "timeline": "<string>"}""",
+            describe=_describe_prior_auth_request,
+            single=self.analyze_prior_auth_request,
+            cache_namespace='analyze_prior_auth_request',
+            max_workers=max_workers
+        )
+
     # Remittance AI Services
     def predict_claim_denial(self, claim_data: Dict) -> Dict:
         """Predict likelihood of claim denial using AI"""
@@ -318,21 +473,25 @@ Return ONLY valid JSON, no additional text.
         Return as JSON format.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='predict_claim_denial')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "denial_probability": 0.25,
-                    "risk_level": "low",
-                    "risk_factors": ["Standard claim parameters"],
-                    "preventive_actions": ["Ensure complete documentation"],
-                    "expected_denial_reasons": []
-                }
+            return decode_or_fallback('predict_claim_denial', response)
         
         return {"error": "Failed to predict denial"}
 
+    def predict_claim_denial_batch(self, claims: List[Dict], max_workers: int = 1) -> List[Dict]:
+        """predict_claim_denial for many claims, several per model call"""
+        return self._run_batch(
+            claims,
+            system_prompt="""You are a claims denial prediction AI. Analyze claims to predict denial likelihood and identify risk factors.""",
+            task="Predict denial likelihood for each claim.",
+            response_format="""{"item_index": <number>, "denial_probability": <number 0-1>, "risk_level": "<low|medium|high>", "risk_factors": [<array of strings>], "preventive_actions": [<array of strings>], "expected_denial_reasons": [<array of strings>]}""",
+            describe=_describe_denial_claim,
+            single=self.predict_claim_denial,
+            cache_namespace='predict_claim_denial',
+            max_workers=max_workers
+        )
+
     def auto_reconcile_payments(self, payment_data: List[Dict]) -> Dict:
         """AI-powered automatic payment reconciliation"""
         system_prompt = """You are a payment reconciliation AI. Match payments to claims and identify discrepancies automatically."""
@@ -352,18 +511,13 @@ Return ONLY valid JSON, no additional text.
         Return as JSON format.
         """
         
-        response = self._make_request(prompt, system_prompt)
+        response = self._make_request(prompt, system_prompt, cache_namespace='auto_reconcile_payments')
         if response:
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                return {
-                    "matched_payments": len(payment_data),
-                    "unmatched_payments": 0,
-                    "discrepancies": [],
-                    "recommendations": ["All payments reconciled successfully"],
-                    "confidence": 0.95
-                }
+            result = decode_response('auto_reconcile_payments', response)
+            if result is None:
+                result = PaymentReconciliation.fallback(response)
+                result.matched_payments = len(payment_data)
+            return result.to_dict()
         
         return {"error": "Failed to reconcile payments"}
 
@@ -424,33 +578,15 @@ Return ONLY valid JSON, no additional text.
         """
         
         try:
-            response = self._make_request(prompt, system_prompt)
+            response = self._make_request(prompt, system_prompt, cache_namespace='generate_insights',
+                                          validate=_decodes_list)
             
-            # Try to parse the response as JSON
-            if isinstance(response, str):
-                # Clean the response if it contains markdown formatting
-                clean_response = response.strip()
-                if clean_response.startswith('```json'):
-                    clean_response = clean_response.replace('```json', '').replace('```', '').strip()
-                elif clean_response.startswith('```'):
-                    clean_response = clean_response.replace('```', '').strip()
-                
-                try:
-                    insights = json.loads(clean_response)
-                    if isinstance(insights, list):
-                        return insights
-                    else:
-                        return [insights]  # Wrap single object in list
-                except json.JSONDecodeError as e:
-                    print(f"JSON parsing error: {e}")
-                    print(f"Raw response: {clean_response}")
-                    # Fallback to structured mock data
-                    return self._generate_fallback_insights(module, data)
-            
-            elif isinstance(response, list):
-                return response
-            else:
+            insights = decode_list_response('generate_insights', response) if response else None
+            if insights is None:
                 return self._generate_fallback_insights(module, data)
+            return [coerce_entry('generate_insights', insight if isinstance(insight, dict)
+                                 else {'insight_description': str(insight)})
+                    for insight in insights]
                 
         except Exception as e:
             print(f"AI Insight Generation Error: {e}")
@@ -0,0 +1,147 @@
+# services/ai_transport.py
+"""
+Call policy for model requests: per-method deadlines, retries with
+exponential backoff and full jitter, and a client-side token-bucket rate
+limiter shared by every request in the process.
+
+A deadline bounds the whole call (waiting for a rate-limit token, every
+attempt and every backoff sleep), so a slow or failing model can hold a
+worker thread for at most that long.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from app.services.ai_backends import AIBackendError
+
+# Seconds a whole call (all attempts) may take, per AI service method
+DEFAULT_METHOD_DEADLINES = {
+    'generate_clinical_documentation': 30,
+    'validate_clinical_document': 20,
+    'suggest_medical_codes': 20,
+    'validate_medical_codes': 15,
+    'scrub_claim': 20,
+    'analyze_prior_auth_request': 20,
+    'predict_claim_denial': 15,
+    'auto_reconcile_payments': 30,
+    'generate_insights': 10,
+}
+
+DEFAULT_DEADLINE = 20
+
+
+class AIDeadlineExceeded(AIBackendError):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=504, retryable=False)
+
+
+class AIRateLimited(AIBackendError):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=429, retryable=False)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return the seconds until one will be"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, deadline_at: float) -> bool:
+        """Wait for a token until deadline_at (a time.monotonic() value); False if it never came"""
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+            if self._clock() + wait > deadline_at:
+                return False
+            time.sleep(wait)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt: full jitter over an exponential ceiling, at least retry_after"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class AITransport:
+    def __init__(self, retry_policy: RetryPolicy = None, rate_limiter: Optional[TokenBucket] = None,
+                 deadlines: Dict[str, float] = None, default_deadline: float = DEFAULT_DEADLINE):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.deadlines = dict(DEFAULT_METHOD_DEADLINES if deadlines is None else deadlines)
+        self.default_deadline = default_deadline
+
+    @classmethod
+    def from_env(cls) -> 'AITransport':
+        rate = float(os.getenv('AI_RATE_LIMIT_RPS', 10))
+        return cls(
+            retry_policy=RetryPolicy(
+                max_attempts=int(os.getenv('AI_RETRY_MAX_ATTEMPTS', 3)),
+                base_delay=float(os.getenv('AI_RETRY_BASE_DELAY_SECONDS', 0.5)),
+                max_delay=float(os.getenv('AI_RETRY_MAX_DELAY_SECONDS', 8))
+            ),
+            rate_limiter=TokenBucket(rate, float(os.getenv('AI_RATE_LIMIT_BURST', rate * 2))) if rate > 0 else None,
+            default_deadline=float(os.getenv('AI_DEFAULT_DEADLINE_SECONDS', DEFAULT_DEADLINE))
+        )
+
+    def deadline_for(self, task: str) -> float:
+        return self.deadlines.get(task, self.default_deadline)
+
+    def call(self, request: Callable[[float], str], task: str = 'default', deadline: float = None) -> str:
+        """Run request(timeout) under the task's deadline, retrying retryable failures.
+
+        Raises the last AIBackendError when attempts run out, AIDeadlineExceeded
+        when the deadline leaves no time for another attempt, and AIRateLimited
+        when no rate-limit token frees up before the deadline.
+        """
+        deadline_at = time.monotonic() + (deadline if deadline is not None else self.deadline_for(task))
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(deadline_at):
+                raise AIRateLimited(f'{task}: no rate limit token before the deadline')
+
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise AIDeadlineExceeded(f'{task}: deadline exceeded after {attempt - 1} attempts')
+            try:
+                return request(remaining)
+            except AIBackendError as e:
+                if not e.retryable or attempt >= self.retry_policy.max_attempts:
+                    raise
+                delay = self.retry_policy.backoff(attempt, e.retry_after)
+                if time.monotonic() + delay >= deadline_at:
+                    raise AIDeadlineExceeded(f'{task}: no time left to retry after {e}') from e
+                print(f"AI Retry ({task}, attempt {attempt}): {e}; retrying in {delay:.2f}s")
+                time.sleep(delay)
@@ -0,0 +1,249 @@
+# services/circuit_breaker.py
+"""
+Circuit breaker and hedged requests for model calls.
+
+CircuitBreaker watches the outcome of recent calls. When too many of them
+fail, or run slower than the slow-call threshold, it opens and rejects calls
+outright, so endpoints go straight to their rule-based fallbacks instead of
+each waiting for a failure. After a cool-down it lets one probe call through
+(half-open); the circuit closes again only if that probe succeeds.
+
+Hedger sends a second copy of a call that has not answered within the
+task's recent p95 latency and takes whichever answer arrives first. Hedges
+are capped to a fraction of calls so they cannot double the load on a
+provider that is already struggling. Only hedges use the hedge worker pool
+(AI_HEDGE_MAX_WORKERS); a hedge that would have to queue for it is skipped.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict
+
+from app.services.ai_backends import AIBackendError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(AIBackendError):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=503, retryable=False)
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """Errors that say the provider is unhealthy, as opposed to a bad request"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, AIBackendError):
+        return error.retryable or (error.status_code or 0) >= 500
+    return True
+
+
+class CircuitBreaker:
+    def __init__(self, window: int = 50, min_calls: int = 10, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 10.0, slow_call_rate: float = 0.8, open_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        # (failed, slow) for the most recent calls
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'CircuitBreaker':
+        return cls(
+            window=int(os.getenv('AI_BREAKER_WINDOW', 50)),
+            min_calls=int(os.getenv('AI_BREAKER_MIN_CALLS', 10)),
+            failure_rate=float(os.getenv('AI_BREAKER_FAILURE_RATE', 0.5)),
+            slow_call_seconds=float(os.getenv('AI_BREAKER_SLOW_CALL_SECONDS', 10)),
+            slow_call_rate=float(os.getenv('AI_BREAKER_SLOW_CALL_RATE', 0.8)),
+            open_seconds=float(os.getenv('AI_BREAKER_OPEN_SECONDS', 30))
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def rejects_calls(self) -> bool:
+        """True while the circuit is open and cooling down, without claiming the half-open probe"""
+        return self.state == OPEN
+
+    def _allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.open_seconds:
+                    return False
+                self._state = HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+        self._outcomes.clear()
+
+    def _record(self, failed: bool, elapsed: float):
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                    self._probing = False
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for failed, _ in self._outcomes if failed)
+            slow_calls = sum(1 for _, slow in self._outcomes if slow)
+            if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                print(f"AI circuit opened: {failures}/{calls} failed, {slow_calls}/{calls} slow")
+                self._open()
+
+    def call(self, request: Callable[[], str]) -> str:
+        """Run request() through the breaker; raises CircuitOpenError while the circuit is open"""
+        if not self._allow():
+            raise CircuitOpenError('AI circuit is open; using fallback')
+        started = self._clock()
+        try:
+            result = request()
+        except Exception as e:
+            self._record(is_provider_failure(e), self._clock() - started)
+            raise
+        self._record(False, self._clock() - started)
+        return result
+
+
+class LatencyTracker:
+    """Recent successful-call latencies per task"""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, task: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(task, deque(maxlen=self.size)).append(seconds)
+
+    def quantile(self, task: str, q: float, min_samples: int = 1):
+        with self._lock:
+            samples = sorted(self._samples.get(task, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class Hedger:
+    def __init__(self, enabled: bool = False, quantile: float = 0.95, min_samples: int = 20,
+                 max_hedge_ratio: float = 0.1, max_workers: int = 16):
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_workers = max_workers
+        self.latencies = LatencyTracker()
+        self._calls = 0
+        self._hedges = 0
+        self._hedges_in_flight = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'Hedger':
+        return cls(
+            enabled=os.getenv('AI_HEDGE_ENABLED', 'false').lower() == 'true',
+            quantile=float(os.getenv('AI_HEDGE_QUANTILE', 0.95)),
+            min_samples=int(os.getenv('AI_HEDGE_MIN_SAMPLES', 20)),
+            max_hedge_ratio=float(os.getenv('AI_HEDGE_MAX_RATIO', 0.1)),
+            max_workers=int(os.getenv('AI_HEDGE_MAX_WORKERS', 16))
+        )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ai-hedge')
+            return self._executor
+
+    def _claim_hedge(self) -> bool:
+        # A hedge that would queue behind busy hedge workers cannot answer sooner; skip it instead
+        with self._lock:
+            if self._hedges >= self.max_hedge_ratio * self._calls or self._hedges_in_flight >= self.max_workers:
+                return False
+            self._hedges += 1
+            self._hedges_in_flight += 1
+            return True
+
+    def _release_hedge(self, future):
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    def _start_primary(self, request, task, timeout) -> Future:
+        """Run the primary on a thread of its own, so primaries never wait for hedge workers"""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._timed(request, task, timeout))
+            except BaseException as e:
+                future.set_exception(e)
+
+        future.set_running_or_notify_cancel()
+        threading.Thread(target=run, name='ai-primary', daemon=True).start()
+        return future
+
+    def _timed(self, request, task, timeout):
+        started = time.monotonic()
+        result = request(timeout)
+        self.latencies.add(task, time.monotonic() - started)
+        return result
+
+    def call(self, request: Callable[[float], str], task: str, timeout: float = None) -> str:
+        """Run request(timeout), sending a hedge copy if it outlasts the task's p95 latency"""
+        with self._lock:
+            self._calls += 1
+        hedge_after = self.latencies.quantile(task, self.quantile, self.min_samples) if self.enabled else None
+        if hedge_after is None or (timeout is not None and hedge_after >= timeout):
+            return self._timed(request, task, timeout)
+
+        started = time.monotonic()
+        primary = self._start_primary(request, task, timeout)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done or not self._claim_hedge():
+            return primary.result()
+
+        remaining = None if timeout is None else max(0.001, timeout - (time.monotonic() - started))
+        hedge = self._pool().submit(self._timed, request, task, remaining)
+        hedge.add_done_callback(self._release_hedge)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        raise error
@@ -0,0 +1,226 @@
+# services/claim_rules.py
+"""
+Deterministic claim scrubbing rules, evaluated in batch over a pandas frame.
+
+Each rule turns the whole batch into a boolean mask in a handful of vectorized
+operations, so scrubbing N claims costs a few passes over columns rather than
+N Python loops. Claims whose only findings are warnings are the ambiguous ones
+that still go on to AI review; clean claims and claims with hard errors are
+settled here.
+
+pandas is imported on first evaluation rather than at import, to keep it off
+the app startup path.
+"""
+
+import json
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+def _pandas():
+    import pandas
+    return pandas
+
+
+def _as_code_list(codes) -> list:
+    if isinstance(codes, (list, tuple)):
+        return list(codes)
+    if isinstance(codes, str) and codes.strip():
+        return [codes]
+    return []
+
+
+class ClaimFrame:
+    """Columnar view of a batch of claim payloads"""
+
+    LIST_COLUMNS = ('diagnosis_codes', 'procedure_codes')
+
+    def __init__(self, claims_data: List[Dict]):
+        pd = _pandas()
+        self.size = len(claims_data)
+        frame = pd.DataFrame.from_records(claims_data, index=range(self.size)) if claims_data else pd.DataFrame()
+        for column in self.LIST_COLUMNS:
+            values = frame[column] if column in frame else pd.Series([None] * self.size, dtype=object)
+            frame[column] = values.map(_as_code_list)
+        amount = frame['claim_amount'] if 'claim_amount' in frame else pd.Series([None] * self.size, dtype=object)
+        frame['claim_amount'] = pd.to_numeric(amount, errors='coerce')
+        self.frame = frame
+        self._code_masks = {}
+
+    def column(self, name: str) -> 'pd.Series':
+        if name in self.frame:
+            return self.frame[name]
+        return _pandas().Series([None] * self.size, index=self.frame.index, dtype=object)
+
+    def no_claims(self) -> 'pd.Series':
+        return _pandas().Series(False, index=self.frame.index)
+
+    def is_missing(self, name: str) -> 'pd.Series':
+        values = self.column(name)
+        if name in self.LIST_COLUMNS:
+            return values.str.len().fillna(0).eq(0)
+        if name == 'claim_amount':
+            return values.isna() | values.eq(0)
+        return values.isna() | values.astype(str).str.strip().eq('')
+
+    def code_count(self, name: str) -> 'pd.Series':
+        return self.column(name).str.len().fillna(0)
+
+    def has_code(self, name: str, code: str) -> 'pd.Series':
+        """Claims listing code in the given code column"""
+        key = (name, code)
+        if key not in self._code_masks:
+            exploded = self.column(name).explode()
+            self._code_masks[key] = exploded.eq(code).groupby(level=0).any().reindex(self.frame.index, fill_value=False)
+        return self._code_masks[key]
+
+
+class ClaimRule:
+    """Base rule: subclasses return a boolean mask of the claims it flags"""
+
+    def __init__(self, rule_id: str, message: str, severity: str = ERROR, penalty: float = 0.0):
+        self.rule_id = rule_id
+        self.message = message
+        self.severity = severity
+        self.penalty = penalty
+
+    def matches(self, claims: ClaimFrame) -> 'pd.Series':
+        raise NotImplementedError
+
+
+class RequiredField(ClaimRule):
+    def __init__(self, field: str, penalty: float = 0.2):
+        super().__init__(f'required_{field}', f'Missing required field: {field}', ERROR, penalty)
+        self.field = field
+
+    def matches(self, claims):
+        return claims.is_missing(self.field)
+
+
+class CodeConflict(ClaimRule):
+    """Diagnosis and procedure codes that should not be billed together"""
+
+    def __init__(self, diagnosis_code: str, procedure_code: str, message: str,
+                 severity: str = ERROR, penalty: float = 0.3):
+        super().__init__(f'conflict_{diagnosis_code}_{procedure_code}', message, severity, penalty)
+        self.diagnosis_code = diagnosis_code
+        self.procedure_code = procedure_code
+
+    def matches(self, claims):
+        return claims.has_code('diagnosis_codes', self.diagnosis_code) & \
+               claims.has_code('procedure_codes', self.procedure_code)
+
+
+class MaxCodeCount(ClaimRule):
+    def __init__(self, field: str, limit: int, message: str, severity: str = WARNING, penalty: float = 0.1):
+        super().__init__(f'max_{field}', message, severity, penalty)
+        self.field = field
+        self.limit = limit
+
+    def matches(self, claims):
+        return claims.code_count(self.field) > self.limit
+
+
+class AmountThreshold(ClaimRule):
+    """Flags claim amounts above maximum, or at/below minimum (invalid amounts included)"""
+
+    def __init__(self, rule_id: str, message: str, minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 severity: str = WARNING, penalty: float = 0.05):
+        super().__init__(rule_id, message, severity, penalty)
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def matches(self, claims):
+        amount = claims.column('claim_amount')
+        mask = claims.no_claims()
+        if self.maximum is not None:
+            mask |= amount > self.maximum
+        if self.minimum is not None:
+            mask |= amount.isna() | (amount <= self.minimum)
+        return mask
+
+
+class PayerAmountLimit(ClaimRule):
+    """Per-payer ceiling on a single claim's amount"""
+
+    def __init__(self, limits: Dict[str, float], severity: str = WARNING, penalty: float = 0.1):
+        super().__init__('payer_amount_limit', "Claim amount exceeds the payer's per-claim limit", severity, penalty)
+        self.limits = limits
+
+    def matches(self, claims):
+        limit = claims.column('insurance_provider').map(self.limits)
+        return claims.column('claim_amount') > limit
+
+
+def load_payer_limits() -> Dict[str, float]:
+    """Per-claim payer limits from CLAIM_PAYER_LIMITS, a JSON object of payer name -> amount"""
+    raw = os.getenv('CLAIM_PAYER_LIMITS')
+    if not raw:
+        return {}
+    try:
+        return {payer: float(limit) for payer, limit in json.loads(raw).items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Invalid CLAIM_PAYER_LIMITS: {e}")
+        return {}
+
+
+def default_rules() -> List[ClaimRule]:
+    return [
+        RequiredField('patient_id'),
+        RequiredField('diagnosis_codes'),
+        RequiredField('procedure_codes'),
+        RequiredField('claim_amount'),
+        CodeConflict('Z00.00', '70553',
+                     'Procedure code 70553 (MRI) not typically associated with routine examination'),
+        MaxCodeCount('diagnosis_codes', 3, 'High number of diagnosis codes - verify medical necessity'),
+        AmountThreshold('amount_high', 'High claim amount - may require additional documentation', maximum=10000),
+        AmountThreshold('amount_invalid', 'Invalid claim amount', minimum=0, severity=ERROR, penalty=0.3),
+        PayerAmountLimit(load_payer_limits())
+    ]
+
+
+class ClaimRulesEngine:
+    def __init__(self, rules: Optional[Iterable[ClaimRule]] = None):
+        self.rules = list(rules) if rules is not None else default_rules()
+
+    def evaluate(self, claims_data: List[Dict]) -> List[Dict]:
+        """Scrub a batch of claims; one result per claim, in input order"""
+        import numpy as np
+
+        claims = ClaimFrame(claims_data)
+        errors = [[] for _ in range(claims.size)]
+        warnings = [[] for _ in range(claims.size)]
+        triggered = [[] for _ in range(claims.size)]
+        penalties = np.zeros(claims.size)
+
+        for rule in self.rules:
+            mask = rule.matches(claims).to_numpy(dtype=bool, na_value=False)
+            if not mask.any():
+                continue
+            penalties += mask * rule.penalty
+            findings = errors if rule.severity == ERROR else warnings
+            for index in np.flatnonzero(mask):
+                findings[index].append(rule.message)
+                triggered[index].append(rule.rule_id)
+
+        confidence = np.clip(np.round(1.0 - penalties, 2), 0.0, 1.0)
+        return [
+            {
+                'errors_found': len(errors[index]),
+                'warnings': len(warnings[index]),
+                'confidence_score': float(confidence[index]),
+                'issues': errors[index] + warnings[index],
+                'rules_triggered': triggered[index],
+                'needs_ai_review': not errors[index] and bool(warnings[index])
+            }
+            for index in range(claims.size)
+        ]
+
+
+claim_rules_engine = ClaimRulesEngine()
@@ -0,0 +1,235 @@
+# services/code_search.py
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.services.code_sets import (
+    CodeSet, STOP_WORDS, MIN_TYPO_LENGTH, tokenize, deletes, load_code_set
+)
+
+CODE_QUERY_PATTERN = re.compile(r'^[A-Za-z]?\d[A-Za-z0-9.]*$|^[A-Za-z]\d?$')
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Vocabulary terms a partially typed last word may expand to
+MAX_PREFIX_EXPANSIONS = 40
+# Score multipliers for terms matched by prefix or by a one-edit typo
+PREFIX_DISCOUNT = 0.85
+TYPO_DISCOUNT = 0.6
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance <= 1"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def _top(doc_ids: np.ndarray, scores: np.ndarray, limit: int) -> List[int]:
+    """Best `limit` documents by score, ties broken by document id"""
+    if len(doc_ids) > limit:
+        keep = np.argpartition(-scores, limit - 1)[:limit]
+        doc_ids, scores = doc_ids[keep], scores[keep]
+    order = np.lexsort((doc_ids, -scores))
+    return doc_ids[order].tolist()
+
+
+class CodeSearchIndex:
+    """Ranked search over one code set (ICD-10 or CPT).
+
+    Works directly on a compiled CodeSet (see code_sets.py), so the index is
+    shared read-only memory rather than per-process Python objects. Queries
+    combine:
+      - code-prefix ranges over the sorted codes ("E11", "e11.9", "992"),
+        shortest codes first,
+      - BM25 weights precomputed per posting over description and category terms,
+      - prefix expansion of the last (still being typed) word,
+      - one-edit typo tolerance via the deletion-variant table.
+    All query words must match (autocomplete semantics); rarest word first.
+    """
+
+    def __init__(self, code_set: CodeSet):
+        self.code_set = code_set
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], code_type: str) -> 'CodeSearchIndex':
+        return cls(CodeSet.from_records(records, code_type))
+
+    def __len__(self):
+        return len(self.code_set)
+
+    def get(self, code: str) -> Optional[Dict]:
+        return self.code_set.get(code)
+
+    def __contains__(self, code):
+        return code in self.code_set
+
+    def _code_matches(self, query: str, limit: int) -> List[int]:
+        start, end = self.code_set.code_prefix_range(query)
+        # Codes are stored sorted, so a stable sort by length gives shortest-then-lexical order
+        order = np.argsort(self.code_set.code_lengths(start, end), kind='stable')[:limit]
+        return (start + order).tolist()
+
+    def _prefix_terms(self, prefix: str) -> List[int]:
+        start, end = self.code_set.term_prefix_range(prefix)
+        if end - start <= MAX_PREFIX_EXPANSIONS:
+            return list(range(start, end))
+        frequencies = self.code_set.doc_frequencies(start, end)
+        keep = np.argpartition(-frequencies.astype(np.int64), MAX_PREFIX_EXPANSIONS - 1)[:MAX_PREFIX_EXPANSIONS]
+        return (start + keep).tolist()
+
+    def _typo_terms(self, word: str) -> List[int]:
+        if len(word) < MIN_TYPO_LENGTH:
+            return []
+        candidates = set(self.code_set.deletion_matches(word))
+        for variant in deletes(word):
+            term_id = self.code_set.term_id(variant)
+            if term_id is not None:
+                candidates.add(term_id)
+            candidates.update(self.code_set.deletion_matches(variant))
+        return [term_id for term_id in candidates if _within_one_edit(word, self.code_set.term(term_id))]
+
+    def _expand(self, word: str, is_last: bool) -> Dict[int, float]:
+        """Map one query word to {term id: score multiplier}"""
+        alternatives = {}
+        term_id = self.code_set.term_id(word)
+        if term_id is not None:
+            alternatives[term_id] = 1.0
+        if is_last:
+            for term_id in self._prefix_terms(word):
+                alternatives.setdefault(term_id, PREFIX_DISCOUNT)
+        if not alternatives:
+            for term_id in self._typo_terms(word):
+                alternatives[term_id] = TYPO_DISCOUNT
+        return alternatives
+
+    def _group_postings(self, alternatives: Dict[int, float]):
+        """One query word's (document ids ascending, scores), best alternative per document"""
+        if len(alternatives) == 1:
+            (term_id, multiplier), = alternatives.items()
+            doc_ids, weights = self.code_set.postings(term_id)
+            return doc_ids, weights * np.float32(multiplier)
+
+        parts = [self.code_set.postings(term_id) for term_id in alternatives]
+        doc_ids = np.concatenate([ids for ids, _ in parts])
+        scores = np.concatenate([weights * np.float32(multiplier)
+                                 for (_, weights), multiplier in zip(parts, alternatives.values())])
+        order = np.lexsort((-scores, doc_ids))
+        doc_ids, scores = doc_ids[order], scores[order]
+        doc_ids, first = np.unique(doc_ids, return_index=True)
+        return doc_ids, scores[first]
+
+    def _text_matches(self, query: str, limit: int) -> List[int]:
+        words = [word for word in tokenize(query) if word not in STOP_WORDS]
+        if not words:
+            return []
+
+        groups = []
+        for position, word in enumerate(words):
+            alternatives = self._expand(word, is_last=position == len(words) - 1)
+            if not alternatives:
+                return []
+            groups.append(self._group_postings(alternatives))
+
+        # Intersect rarest word first by binary-searching each candidate in the next postings list
+        groups.sort(key=lambda group: len(group[0]))
+        candidates, scores = groups[0][0], groups[0][1].astype(np.float64)
+        for doc_ids, weights in groups[1:]:
+            positions = np.minimum(np.searchsorted(doc_ids, candidates), len(doc_ids) - 1)
+            hits = doc_ids[positions] == candidates
+            if not hits.any():
+                return []
+            candidates = candidates[hits]
+            scores = scores[hits] + weights[positions[hits]]
+
+        return _top(candidates, scores, limit)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        """Best matching records: code-prefix matches first, then ranked text matches"""
+        query = (query or '').strip()
+        if not query:
+            return [self.code_set.record(doc_id) for doc_id in range(min(limit, len(self.code_set)))]
+
+        doc_ids = []
+        if CODE_QUERY_PATTERN.match(query):
+            doc_ids.extend(self._code_matches(query, limit))
+
+        if len(doc_ids) < limit:
+            seen = set(doc_ids)
+            for doc_id in self._text_matches(query, limit):
+                if doc_id not in seen:
+                    doc_ids.append(doc_id)
+                    if len(doc_ids) == limit:
+                        break
+
+        return [self.code_set.record(doc_id) for doc_id in doc_ids]
+
+
+class CodeSearchEngine:
+    """ICD-10 and CPT search indexes side by side"""
+
+    CODE_TYPES = ('icd10', 'cpt')
+    DEFAULT_LIMIT = DEFAULT_LIMIT
+
+    def __init__(self, icd10_codes: CodeSet, cpt_codes: CodeSet):
+        self.indexes = {
+            'icd10': CodeSearchIndex(icd10_codes),
+            'cpt': CodeSearchIndex(cpt_codes)
+        }
+
+    @classmethod
+    def from_records(cls, icd10_records: Iterable[Dict], cpt_records: Iterable[Dict]) -> 'CodeSearchEngine':
+        return cls(CodeSet.from_records(icd10_records, 'icd10'), CodeSet.from_records(cpt_records, 'cpt'))
+
+    @property
+    def version(self) -> str:
+        """Identifies the loaded code sets; search results only change when it does"""
+        return '-'.join(index.code_set.fingerprint for index in self.indexes.values())
+
+    def search(self, query: str, code_type: str = 'both', limit: int = DEFAULT_LIMIT) -> Dict[str, List[Dict]]:
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        return {
+            name: index.search(query, limit) if code_type in (name, 'both') else []
+            for name, index in self.indexes.items()
+        }
+
+    def get(self, code_type: str, code: str) -> Optional[Dict]:
+        return self.indexes[code_type].get(code)
+
+    def is_valid(self, code_type: str, code: str) -> bool:
+        return code in self.indexes[code_type]
+
+
+def build_code_search_engine(default_icd10: Dict[str, Dict], default_cpt: Dict[str, Dict]) -> CodeSearchEngine:
+    """Open the code sets from ICD10_CODES_PATH / CPT_CODES_PATH when set, else the built-in tables.
+
+    Paths may point at release files (CSV/TSV or CMS text, compiled once to a
+    sibling .codeset file) or directly at compiled .codeset files.
+    """
+    icd10_path = os.getenv('ICD10_CODES_PATH')
+    cpt_path = os.getenv('CPT_CODES_PATH')
+
+    engine = CodeSearchEngine(
+        load_code_set('icd10', icd10_path, default_icd10.values()),
+        load_code_set('cpt', cpt_path, default_cpt.values())
+    )
+    if icd10_path or cpt_path:
+        print(f"Code search loaded {len(engine.indexes['icd10'])} ICD-10 and {len(engine.indexes['cpt'])} CPT codes")
+    return engine
@@ -0,0 +1,402 @@
+# services/code_sets.py
+"""
+Compact, memory-mapped ICD-10 / CPT code sets.
+
+Release files are compiled once into a binary file that workers mmap, so
+every process shares the same pages through the OS cache instead of holding
+its own dicts. Layout (little-endian, sections 8-byte aligned):
+
+    header     magic, version, code type, counts and section offsets
+    records    sorted fixed-width rows: normalized code, description and
+               category (offsets into the string table), RVU
+    strings    UTF-8 string table
+    terms      sorted fixed-width search terms with their postings range
+    postings   document ids (ascending) and BM25 weights per term
+    deletions  one-character deletion variants of each term, sorted, for
+               typo-tolerant lookups
+
+All lookups are binary searches over the sorted sections.
+
+Usage:
+    python -m app.services.code_sets compile icd10 icd10cm_codes_2024.txt icd10cm_2024.codeset
+"""
+
+import argparse
+import csv
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+MAGIC = b'RCMCODE1'
+FORMAT_VERSION = 1
+CODE_TYPES = ('icd10', 'cpt')
+COMPILED_SUFFIX = '.codeset'
+
+HEADER = struct.Struct('<8sHBxIIIIQQQQQQ')
+KEY_WIDTH = 8
+TERM_WIDTH = 32
+
+RECORD_DTYPE = np.dtype([('key', f'S{KEY_WIDTH}'), ('desc_off', '<u4'), ('cat_off', '<u4'),
+                         ('desc_len', '<u2'), ('cat_len', '<u2'), ('rvu', '<f4')])
+TERM_DTYPE = np.dtype([('term', f'S{TERM_WIDTH}'), ('start', '<u4'), ('count', '<u4')])
+DELETION_DTYPE = np.dtype([('variant', f'S{TERM_WIDTH}'), ('term', '<u4')])
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(['a', 'an', 'and', 'by', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'])
+
+# Shortest word we try to typo-correct; terms one character shorter get deletion variants
+MIN_TYPO_LENGTH = 4
+# Category text counts for less than the description when ranking
+CATEGORY_WEIGHT = 0.5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def normalize_code(code: str) -> str:
+    return (code or '').replace('.', '').strip().upper()
+
+
+def format_code(key: str, code_type: str) -> str:
+    """Display form of a normalized code: E119 -> E11.9 for ICD-10"""
+    if code_type == 'icd10' and len(key) > 3:
+        return f'{key[:3]}.{key[3:]}'
+    return key
+
+
+def deletes(term: str) -> set:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def compile_code_set(records: Iterable[Dict], code_type: str) -> bytes:
+    """Compile code records (dicts with code, description, optional category/rvu) into the binary format"""
+    if code_type not in CODE_TYPES:
+        raise ValueError(f'Unknown code type: {code_type}')
+
+    by_key = {}
+    for record in records:
+        key = normalize_code(record.get('code'))
+        if not key or len(key) > KEY_WIDTH:
+            continue
+        by_key[key] = record
+    keys = sorted(by_key)
+
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(text):
+        encoded = (text or '').encode('utf-8')[:0xFFFF]
+        if encoded not in string_offsets:
+            string_offsets[encoded] = len(strings)
+            strings.extend(encoded)
+        return string_offsets[encoded], len(encoded)
+
+    rows = np.zeros(len(keys), dtype=RECORD_DTYPE)
+    term_frequencies = []
+    lengths = []
+    for doc_id, key in enumerate(keys):
+        record = by_key[key]
+        desc_off, desc_len = intern(record.get('description'))
+        cat_off, cat_len = intern(record.get('category'))
+        rvu = record.get('rvu')
+        rows[doc_id] = (key.encode('ascii'), desc_off, cat_off, desc_len, cat_len,
+                        float(rvu) if rvu not in (None, '') else np.nan)
+
+        frequencies = defaultdict(float)
+        for term in tokenize(record.get('description')):
+            if term not in STOP_WORDS and len(term) <= TERM_WIDTH:
+                frequencies[term] += 1.0
+        for term in tokenize(record.get('category')):
+            if term not in STOP_WORDS and len(term) <= TERM_WIDTH:
+                frequencies[term] += CATEGORY_WEIGHT
+        term_frequencies.append(frequencies)
+        lengths.append(sum(frequencies.values()))
+
+    total = len(keys)
+    average_length = (sum(lengths) / total) if total else 0.0
+    postings = defaultdict(list)
+    for doc_id, frequencies in enumerate(term_frequencies):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * (lengths[doc_id] / average_length if average_length else 0))
+        for term, tf in frequencies.items():
+            postings[term].append((doc_id, tf * (BM25_K1 + 1) / (tf + norm)))
+
+    vocabulary = sorted(postings)
+    terms = np.zeros(len(vocabulary), dtype=TERM_DTYPE)
+    posting_ids = []
+    posting_weights = []
+    for term_id, term in enumerate(vocabulary):
+        docs = postings[term]
+        idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+        terms[term_id] = (term.encode('ascii'), len(posting_ids), len(docs))
+        for doc_id, weight in docs:
+            posting_ids.append(doc_id)
+            posting_weights.append(weight * idf)
+
+    deletion_rows = sorted(
+        (variant.encode('ascii'), term_id)
+        for term_id, term in enumerate(vocabulary) if len(term) >= MIN_TYPO_LENGTH - 1
+        for variant in deletes(term)
+    )
+    deletion_table = np.array(deletion_rows, dtype=DELETION_DTYPE) if deletion_rows else np.zeros(0, DELETION_DTYPE)
+
+    sections = [
+        rows.tobytes(),
+        bytes(strings),
+        terms.tobytes(),
+        np.asarray(posting_ids, dtype='<u4').tobytes(),
+        np.asarray(posting_weights, dtype='<f4').tobytes(),
+        deletion_table.tobytes()
+    ]
+    offsets = []
+    offset = _align(HEADER.size)
+    for section in sections:
+        offsets.append(offset)
+        offset = _align(offset + len(section))
+
+    output = bytearray(offset)
+    HEADER.pack_into(output, 0, MAGIC, FORMAT_VERSION, CODE_TYPES.index(code_type),
+                     len(keys), len(vocabulary), len(posting_ids), len(deletion_table), *offsets)
+    for section_offset, section in zip(offsets, sections):
+        output[section_offset:section_offset + len(section)] = section
+    return bytes(output)
+
+
+def write_code_set(records: Iterable[Dict], code_type: str, path: str) -> str:
+    """Compile records to path atomically, so running workers never map a partial file"""
+    data = compile_code_set(records, code_type)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+class CodeSet:
+    """Read-only view over a compiled code set held in an mmap or bytes buffer"""
+
+    def __init__(self, buffer, source: str = '<memory>'):
+        self._buffer = buffer
+        self.source = source
+        self._fingerprint = None
+        (magic, version, code_type, record_count, term_count, posting_count, deletion_count,
+         records_off, strings_off, terms_off, ids_off, weights_off, deletions_off) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{source} is not a version {FORMAT_VERSION} code set file')
+
+        self.code_type = CODE_TYPES[code_type]
+        self._strings_off = strings_off
+        self._records = np.frombuffer(buffer, RECORD_DTYPE, record_count, records_off)
+        self._keys = self._records['key']
+        self._terms = np.frombuffer(buffer, TERM_DTYPE, term_count, terms_off)
+        self._term_keys = self._terms['term']
+        self._posting_ids = np.frombuffer(buffer, '<u4', posting_count, ids_off)
+        self._posting_weights = np.frombuffer(buffer, '<f4', posting_count, weights_off)
+        self._deletions = np.frombuffer(buffer, DELETION_DTYPE, deletion_count, deletions_off)
+        self._deletion_keys = self._deletions['variant']
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of the compiled set, the same in every process that opens it"""
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.blake2b(self._buffer, digest_size=8).hexdigest()
+        return self._fingerprint
+
+    @classmethod
+    def open(cls, path: str) -> 'CodeSet':
+        with open(path, 'rb') as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, source=path)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], code_type: str) -> 'CodeSet':
+        return cls(compile_code_set(records, code_type))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        for index in range(len(self._records)):
+            yield self.record(index)
+
+    def __contains__(self, code):
+        return self.index_of(code) is not None
+
+    def _string(self, offset, length) -> str:
+        start = self._strings_off + int(offset)
+        return bytes(self._buffer[start:start + int(length)]).decode('utf-8')
+
+    def record(self, index: int) -> Dict:
+        row = self._records[index]
+        record = {
+            'code': format_code(row['key'].decode('ascii'), self.code_type),
+            'description': self._string(row['desc_off'], row['desc_len']),
+            'category': self._string(row['cat_off'], row['cat_len'])
+        }
+        if not np.isnan(row['rvu']):
+            record['rvu'] = round(float(row['rvu']), 4)
+        return record
+
+    def index_of(self, code: str) -> Optional[int]:
+        key = normalize_code(code).encode('ascii', 'ignore')
+        if not key or len(key) > KEY_WIDTH:
+            return None
+        index = int(np.searchsorted(self._keys, key))
+        if index < len(self._keys) and self._keys[index] == key:
+            return index
+        return None
+
+    def get(self, code: str) -> Optional[Dict]:
+        index = self.index_of(code)
+        return self.record(index) if index is not None else None
+
+    def code_prefix_range(self, prefix: str):
+        """Record indexes [start, end) whose normalized code starts with prefix"""
+        key = normalize_code(prefix).encode('ascii', 'ignore')[:KEY_WIDTH]
+        start = int(np.searchsorted(self._keys, key, side='left'))
+        end = int(np.searchsorted(self._keys, key + b'\xff', side='left'))
+        return start, end
+
+    def code_lengths(self, start: int, end: int) -> np.ndarray:
+        return np.char.str_len(self._keys[start:end])
+
+    def term_id(self, term: str) -> Optional[int]:
+        key = term.encode('ascii', 'ignore')
+        if not key or len(key) > TERM_WIDTH:
+            return None
+        index = int(np.searchsorted(self._term_keys, key))
+        if index < len(self._term_keys) and self._term_keys[index] == key:
+            return index
+        return None
+
+    def term_prefix_range(self, prefix: str):
+        key = prefix.encode('ascii', 'ignore')[:TERM_WIDTH]
+        start = int(np.searchsorted(self._term_keys, key, side='left'))
+        end = int(np.searchsorted(self._term_keys, key + b'\xff', side='left'))
+        return start, end
+
+    def term(self, term_id: int) -> str:
+        return self._term_keys[term_id].decode('ascii')
+
+    def doc_frequencies(self, start: int, end: int) -> np.ndarray:
+        return self._terms['count'][start:end]
+
+    def doc_frequency(self, term_id: int) -> int:
+        return int(self._terms['count'][term_id])
+
+    def postings(self, term_id: int):
+        """(document ids ascending, BM25 weights) as zero-copy arrays"""
+        start = int(self._terms['start'][term_id])
+        end = start + int(self._terms['count'][term_id])
+        return self._posting_ids[start:end], self._posting_weights[start:end]
+
+    def deletion_matches(self, variant: str) -> List[int]:
+        """Ids of terms that become variant by deleting one character"""
+        key = variant.encode('ascii', 'ignore')
+        if not key or len(key) > TERM_WIDTH:
+            return []
+        start = int(np.searchsorted(self._deletion_keys, key, side='left'))
+        end = int(np.searchsorted(self._deletion_keys, key, side='right'))
+        return self._deletions['term'][start:end].tolist()
+
+
+def _format_icd10_code(code: str) -> str:
+    """CMS release files omit the dot: E119 -> E11.9"""
+    return format_code(normalize_code(code), 'icd10')
+
+
+def load_code_file(path: str, code_type: str) -> List[Dict]:
+    """Load a code set release file.
+
+    Supports CSV/TSV files with a header containing at least 'code' and
+    'description' (other columns such as category or rvu are kept), and the
+    CMS plain-text release format of one "CODE  Description" entry per line.
+    """
+    records = []
+    is_delimited = path.lower().endswith(('.csv', '.tsv'))
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if is_delimited:
+            reader = csv.DictReader(handle, delimiter='\t' if path.lower().endswith('.tsv') else ',')
+            for row in reader:
+                row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+                if not row.get('code'):
+                    continue
+                if 'rvu' in row:
+                    try:
+                        row['rvu'] = float(row['rvu'])
+                    except ValueError:
+                        row.pop('rvu')
+                row.setdefault('category', '')
+                records.append(row)
+        else:
+            for line in handle:
+                parts = line.strip().split(None, 1)
+                if len(parts) == 2:
+                    records.append({'code': parts[0], 'description': parts[1], 'category': ''})
+
+    if code_type == 'icd10':
+        for record in records:
+            record['code'] = _format_icd10_code(record['code'])
+    return records
+
+
+def load_code_set(code_type: str, path: Optional[str], default_records: Iterable[Dict]) -> CodeSet:
+    """Open the code set for code_type.
+
+    path may be a compiled .codeset file (mapped directly) or a release file,
+    which is compiled once to a sibling .codeset file and mapped; with no path
+    the built-in records are compiled into an in-process buffer.
+    """
+    if not path:
+        return CodeSet.from_records(default_records, code_type)
+    if path.endswith(COMPILED_SUFFIX):
+        return CodeSet.open(path)
+
+    compiled_path = path + COMPILED_SUFFIX
+    if not os.path.exists(compiled_path) or os.path.getmtime(compiled_path) < os.path.getmtime(path):
+        try:
+            write_code_set(load_code_file(path, code_type), code_type, compiled_path)
+        except OSError as e:
+            print(f"Code set compile error ({compiled_path}): {e}; keeping {code_type} codes in memory")
+            return CodeSet.from_records(load_code_file(path, code_type), code_type)
+    return CodeSet.open(compiled_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile ICD-10 / CPT release files into memory-mapped code sets')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compile_parser = commands.add_parser('compile', help='Compile a CSV/TSV or CMS text release file')
+    compile_parser.add_argument('code_type', choices=CODE_TYPES)
+    compile_parser.add_argument('source')
+    compile_parser.add_argument('output')
+    args = parser.parse_args(argv)
+
+    records = load_code_file(args.source, args.code_type)
+    write_code_set(records, args.code_type, args.output)
+    code_set = CodeSet.open(args.output)
+    print(f"Compiled {len(code_set)} {args.code_type} codes to {args.output} "
+          f"({os.path.getsize(args.output) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
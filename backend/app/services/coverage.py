@@ -0,0 +1,240 @@
+# services/coverage.py
+"""
+Coverage prediction for eligibility checks.
+
+Cost and coverage-likelihood tables are built from the defaults below plus
+each provider's `coverage_rules` overrides, taken from the provider registry
+and rebuilt whenever the registry reloads. Predictions are memoized per
+(provider, coverage plan, service type); the plan is keyed by the patient's
+coverage_details content, so a changed plan is simply a new key.
+
+The numeric prediction never waits for the model: AI insights are generated
+by a background job that attaches them to the EligibilityCheck when ready.
+Batch checks get them only on request, from one job covering the whole batch.
+"""
+
+import json
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+from app.models.models import db, EligibilityCheck
+from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue
+from app.services.provider_registry import provider_registry
+
+# Typical total cost per service type
+BASE_COSTS = {
+    'general_consultation': 200,
+    'specialist_consultation': 500,
+    'surgery': 15000,
+    'emergency': 1000,
+    'diagnostic_imaging': 800,
+    'laboratory_tests': 300,
+    'physiotherapy': 150,
+    'dental': 400,
+    'maternity': 8000,
+    'pediatric': 250,
+    'cardiology': 1200,
+    'orthopedic': 2000,
+    'dermatology': 350
+}
+
+# Likelihood (%) that a service is covered
+COVERAGE_LIKELIHOOD = {
+    'general_consultation': 95,
+    'specialist_consultation': 85,
+    'surgery': 70,
+    'emergency': 98,
+    'diagnostic_imaging': 80,
+    'laboratory_tests': 90,
+    'physiotherapy': 75,
+    'dental': 70,
+    'maternity': 85,
+    'pediatric': 95,
+    'cardiology': 80,
+    'orthopedic': 75,
+    'dermatology': 85
+}
+
+DEFAULT_COST = 200
+DEFAULT_LIKELIHOOD = 90
+DEFAULT_COVERAGE_PERCENTAGE = 80
+
+# Confidence of the table-based prediction, before and after AI insights are attached
+TABLE_CONFIDENCE = 0.85
+AI_CONFIDENCE = 0.95
+
+INSIGHTS_JOB = 'eligibility.insights'
+BATCH_INSIGHTS_JOB = 'eligibility.insights_batch'
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+class CoverageTables:
+    """Per-provider cost and likelihood tables for one provider registry snapshot"""
+
+    def __init__(self, providers: Dict[str, Tuple[Dict[str, float], Dict[str, float]]] = None,
+                 generation: int = 0):
+        self.providers = providers or {}
+        self.generation = generation
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'CoverageTables':
+        providers = {}
+        for code, provider in snapshot.by_code.items():
+            rules = provider.coverage_rules or {}
+            providers[code] = (
+                dict(BASE_COSTS, **(rules.get('service_costs') or {})),
+                dict(COVERAGE_LIKELIHOOD, **(rules.get('coverage_likelihood') or {}))
+            )
+        return cls(providers, snapshot.generation)
+
+    def lookup(self, provider_code: str, service_type: str) -> Tuple[float, float]:
+        costs, likelihood = self.providers.get(provider_code, (BASE_COSTS, COVERAGE_LIKELIHOOD))
+        return costs.get(service_type, DEFAULT_COST), likelihood.get(service_type, DEFAULT_LIKELIHOOD)
+
+
+_tables = CoverageTables(generation=-1)
+
+
+def coverage_tables() -> CoverageTables:
+    """Tables for the current provider registry snapshot (needs an app context)"""
+    global _tables
+    snapshot = provider_registry.snapshot()
+    if _tables.generation != snapshot.generation:
+        _tables = CoverageTables.from_snapshot(snapshot)
+        _predict.cache_clear()
+    return _tables
+
+
+def invalidate_coverage_tables():
+    """Reload providers, and so the tables, on next use"""
+    provider_registry.invalidate()
+
+
+def plan_key(coverage_details) -> str:
+    """Stable key for a coverage plan: its details, serialized with sorted keys"""
+    return json.dumps(coverage_details or {}, sort_keys=True, default=str)
+
+
+@lru_cache(maxsize=4096)
+def _predict(tables: CoverageTables, provider_code: str, coverage_plan: str, service_type: str) -> Tuple:
+    # Keyed by the tables object itself, so a result is only ever reused with the tables it came from
+    total_cost, likelihood = tables.lookup(provider_code, service_type)
+    coverage_percentage = json.loads(coverage_plan).get('coverage_percentage', DEFAULT_COVERAGE_PERCENTAGE)
+    patient_cost = total_cost * (1 - coverage_percentage / 100)
+    return likelihood, round(patient_cost, 2), total_cost
+
+
+def predict_coverage(patient, service_type: str) -> Dict:
+    """Table-based coverage prediction; ai_insights are filled in later by attach_insights_async"""
+    tables = coverage_tables()
+    likelihood, patient_cost, total_cost = _predict(
+        tables, patient.insurance_provider or '', plan_key(patient.coverage_details), service_type)
+    return {
+        'coverage_likelihood': likelihood,
+        'estimated_patient_cost': patient_cost,
+        'estimated_total_cost': total_cost,
+        'confidence_score': TABLE_CONFIDENCE,
+        'ai_insights': [],
+        'ai_insights_status': 'pending'
+    }
+
+
+def predict_coverage_batch(patients: Sequence, service_types: Sequence[str],
+                           insights_status: str = 'not_requested') -> List[Dict]:
+    """predict_coverage for many patients at once, with the cost arithmetic done as one array operation"""
+    np = _numpy()
+    tables = coverage_tables()
+    lookups = [tables.lookup(patient.insurance_provider or '', service_type)
+               for patient, service_type in zip(patients, service_types)]
+    total_costs = np.array([total for total, _ in lookups], dtype=float)
+    coverage_percentages = np.array(
+        [(patient.coverage_details or {}).get('coverage_percentage', DEFAULT_COVERAGE_PERCENTAGE)
+         for patient in patients], dtype=float)
+    patient_costs = np.round(total_costs * (1 - coverage_percentages / 100), 2).tolist()
+
+    return [
+        {
+            'coverage_likelihood': likelihood,
+            'estimated_patient_cost': patient_cost,
+            'estimated_total_cost': total_cost,
+            'confidence_score': TABLE_CONFIDENCE,
+            'ai_insights': [],
+            'ai_insights_status': insights_status
+        }
+        for (total_cost, likelihood), patient_cost in zip(lookups, patient_costs)
+    ]
+
+
+def eligibility_insight_data(patient, service_type: str) -> Dict:
+    return {
+        'patient_info': {
+            'name': f'{patient.first_name} {patient.last_name}',
+            'dob': patient.dob.isoformat() if patient.dob else None,
+            'insurance_provider': patient.insurance_provider,
+            'policy_status': patient.policy_status
+        },
+        'service_type': service_type,
+        'insurance_provider': patient.insurance_provider,
+        'coverage_details': patient.coverage_details or {}
+    }
+
+
+def attach_insights_async(check_id: int, patient, service_type: str) -> str:
+    """Queue AI insight generation for an eligibility check; returns the job ID"""
+    return job_queue.enqueue(INSIGHTS_JOB, {
+        'check_id': check_id,
+        'eligibility_data': eligibility_insight_data(patient, service_type)
+    }, total=1)
+
+
+def _attach_insights(check, eligibility_data: Dict) -> List:
+    insights = ai_service.generate_insights('eligibility', eligibility_data)
+    structured = bool(insights) and all(isinstance(insight, dict) for insight in insights)
+    # Assign a new dict so the JSON column is marked as changed
+    check.ai_prediction = dict(check.ai_prediction or {},
+                               ai_insights=insights,
+                               ai_insights_status='completed',
+                               confidence_score=AI_CONFIDENCE if structured else TABLE_CONFIDENCE)
+    return insights
+
+
+def attach_insights_batch_async(check_ids: List[int]) -> str:
+    """Queue AI insight generation for the eligibility checks of a batch; returns the job ID"""
+    return job_queue.enqueue(BATCH_INSIGHTS_JOB, {'check_ids': check_ids}, total=len(check_ids))
+
+
+def run_insights_job(payload, ctx):
+    """Job handler: generate insights and attach them to the stored eligibility check"""
+    check = db.session.get(EligibilityCheck, payload['check_id'])
+    insights = []
+    confidence_score = None
+    if check is not None:
+        insights = _attach_insights(check, payload['eligibility_data'])
+        confidence_score = check.ai_prediction['confidence_score']
+        db.session.commit()
+    ctx.report_progress(1)
+    return {'check_id': payload['check_id'], 'ai_insights': insights, 'confidence_score': confidence_score}
+
+
+def run_batch_insights_job(payload, ctx):
+    """Job handler: attach insights to each eligibility check of a batch, committing as it goes"""
+    check_ids = payload['check_ids']
+    # A resumed job picks up after the last check it reported
+    for done, check_id in enumerate(check_ids[ctx.done:], start=ctx.done + 1):
+        check = db.session.get(EligibilityCheck, check_id)
+        if check is not None and check.patient is not None:
+            _attach_insights(check, eligibility_insight_data(check.patient, check.service_type))
+            db.session.commit()
+            ctx.add_result({'check_id': check_id})
+        ctx.report_progress(done, len(check_ids))
+    return {'checks_updated': len(check_ids)}
+
+
+job_queue.register_handler(INSIGHTS_JOB, run_insights_job)
+job_queue.register_handler(BATCH_INSIGHTS_JOB, run_batch_insights_job)
+
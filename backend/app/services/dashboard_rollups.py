@@ -0,0 +1,303 @@
+# services/dashboard_rollups.py
+import os
+import time
+import threading
+from collections import defaultdict
+from datetime import datetime, date
+from typing import Dict, Tuple
+from sqlalchemy import event, select, func, delete, update, insert, literal
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck, DashboardRollup
+
+# Source model -> (rollup entity, date attribute, amount attribute or None)
+ROLLUP_SOURCES = {
+    Claim: ('claim', 'submitted_date', 'amount'),
+    PriorAuthorization: ('prior_auth', 'submitted_date', None),
+    EligibilityCheck: ('eligibility', 'check_date', None),
+}
+
+_TRACKED_ATTRIBUTES = ('status', 'patient_id')
+
+
+def _as_day(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _old_value(obj, attribute):
+    """Value of attribute as it was before the current flush"""
+    history = get_history(obj, attribute)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attribute)
+
+
+def _row_state(obj, date_attribute, amount_attribute, previous=False):
+    read = (lambda attr: _old_value(obj, attr)) if previous else (lambda attr: getattr(obj, attr))
+    return {
+        'day': _as_day(read(date_attribute)),
+        'status': read('status'),
+        'patient_id': read('patient_id'),
+        'amount': (read(amount_attribute) or 0.0) if amount_attribute else 0.0
+    }
+
+
+def _watched_attributes(date_attribute, amount_attribute):
+    return _TRACKED_ATTRIBUTES + (date_attribute,) + ((amount_attribute,) if amount_attribute else ())
+
+
+def _is_modified(obj, attributes):
+    return any(get_history(obj, attr).has_changes() for attr in attributes)
+
+
+def _provider_move_deltas(session) -> Dict[Tuple, list]:
+    """Deltas moving the rows of patients whose insurer changes to the new insurer's rollup keys.
+
+    Read before the flush, so the rows are counted as the rollups hold them;
+    the flush's own changes to those rows are then keyed by the new insurer.
+    """
+    moves = {}
+    for obj in session.dirty:
+        if isinstance(obj, Patient) and get_history(obj, 'insurance_provider').has_changes():
+            old_provider = _old_value(obj, 'insurance_provider') or ''
+            new_provider = obj.insurance_provider or ''
+            if old_provider != new_provider:
+                moves[obj.id] = (old_provider, new_provider)
+
+    deltas = defaultdict(lambda: [0, 0.0])
+    if not moves:
+        return deltas
+
+    connection = session.connection()
+    for model, (entity, date_attribute, amount_attribute) in ROLLUP_SOURCES.items():
+        date_column = getattr(model, date_attribute)
+        amount = func.coalesce(func.sum(getattr(model, amount_attribute)), 0) if amount_attribute else literal(0.0)
+        grouped = connection.execute(
+            select(model.patient_id, func.date(date_column), model.status, func.count(model.id), amount)
+            .where(model.patient_id.in_(moves), date_column.isnot(None), model.status.isnot(None),
+                   model.status != '')
+            .group_by(model.patient_id, func.date(date_column), model.status)
+        ).all()
+        for patient_id, day, status, count, total in grouped:
+            old_provider, new_provider = moves[patient_id]
+            for provider, sign in ((old_provider, -1), (new_provider, 1)):
+                key = (_as_day(day), entity, status, provider)
+                deltas[key][0] += sign * count
+                deltas[key][1] += sign * (total or 0.0)
+    return deltas
+
+
+def _before_flush(session, flush_context, instances):
+    """Record the stored state of rows about to be updated or deleted.
+
+    Taken before the flush, while expired or unloaded attributes can still be
+    loaded from the row; a deleted row cannot be read back afterwards.
+    """
+    session.info['rollup_provider_moves'] = _provider_move_deltas(session)
+    previous = {}
+    for obj in session.deleted:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source:
+            entity, date_attribute, amount_attribute = source
+            previous[obj] = _row_state(obj, date_attribute, amount_attribute, previous=True)
+    for obj in session.dirty:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source and obj not in previous:
+            entity, date_attribute, amount_attribute = source
+            if _is_modified(obj, _watched_attributes(date_attribute, amount_attribute)):
+                previous[obj] = _row_state(obj, date_attribute, amount_attribute, previous=True)
+    session.info['rollup_previous_states'] = previous
+
+
+def _collect_deltas(session) -> Dict[Tuple, list]:
+    """Turn the objects in a flush into (+/-) count and amount deltas per rollup key"""
+    changes = []  # (entity, state, sign)
+    previous = session.info.pop('rollup_previous_states', {})
+    deltas = session.info.pop('rollup_provider_moves', None) or defaultdict(lambda: [0, 0.0])
+
+    for obj in session.new:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source:
+            entity, date_attribute, amount_attribute = source
+            changes.append((entity, _row_state(obj, date_attribute, amount_attribute), 1))
+
+    for obj in session.deleted:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if source and obj in previous:
+            changes.append((source[0], previous[obj], -1))
+
+    for obj in session.dirty:
+        source = ROLLUP_SOURCES.get(type(obj))
+        if not source or obj not in previous or obj in session.deleted:
+            continue
+        entity, date_attribute, amount_attribute = source
+        changes.append((entity, previous[obj], -1))
+        changes.append((entity, _row_state(obj, date_attribute, amount_attribute), 1))
+
+    changes = [change for change in changes if change[1]['day'] is not None and change[1]['status']]
+
+    # One lookup for the insurer of every patient touched by this flush
+    patient_ids = {state['patient_id'] for _, state, _ in changes if state['patient_id'] is not None}
+    providers = {}
+    if patient_ids:
+        providers = dict(session.connection().execute(
+            select(Patient.id, Patient.insurance_provider).where(Patient.id.in_(patient_ids))
+        ).all())
+
+    for entity, state, sign in changes:
+        key = (state['day'], entity, state['status'], providers.get(state['patient_id']) or '')
+        deltas[key][0] += sign
+        deltas[key][1] += sign * state['amount']
+
+    return {key: value for key, value in deltas.items() if value[0] or value[1]}
+
+
+def apply_rollup_deltas(connection, deltas: Dict[Tuple, list]):
+    """Add count/amount deltas to the rollup rows, creating missing rows"""
+    table = DashboardRollup.__table__
+    dialect = connection.dialect.name
+
+    for (day, entity, status, provider), (count_delta, amount_delta) in deltas.items():
+        values = {
+            'day': day,
+            'entity': entity,
+            'status': status,
+            'insurance_provider': provider,
+            'record_count': count_delta,
+            'total_amount': amount_delta
+        }
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(table).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=['day', 'entity', 'status', 'insurance_provider'],
+                set_={
+                    'record_count': table.c.record_count + statement.excluded.record_count,
+                    'total_amount': table.c.total_amount + statement.excluded.total_amount
+                }
+            )
+            connection.execute(statement)
+            continue
+
+        result = connection.execute(
+            update(table)
+            .where(table.c.day == day, table.c.entity == entity,
+                   table.c.status == status, table.c.insurance_provider == provider)
+            .values(record_count=table.c.record_count + count_delta,
+                    total_amount=table.c.total_amount + amount_delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**values))
+
+
+def _after_flush(session, flush_context):
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+def register_rollup_hooks():
+    """Keep rollups in step with ORM inserts, updates and deletes.
+
+    The rolled-up attributes are given active history, so assigning to an
+    expired attribute loads its old value and the delta removes the right
+    row. When a patient's insurer changes, the rows of that patient move to
+    the new insurer's rollup keys. Bulk Core statements (insert()/update() executed directly) bypass
+    the flush and are only picked up by rebuild_rollups().
+    """
+    watched = [(model, attribute) for model, (_, date_attribute, amount_attribute) in ROLLUP_SOURCES.items()
+               for attribute in _watched_attributes(date_attribute, amount_attribute)]
+    for model, attribute in watched + [(Patient, 'insurance_provider')]:
+        instrumented = getattr(model, attribute)
+        if not event.contains(instrumented, 'set', _keep_old_value):
+            event.listen(instrumented, 'set', _keep_old_value, active_history=True)
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def rebuild_rollups(session=None) -> int:
+    """Recompute every rollup row from the source tables in one transaction"""
+    session = session or db.session
+    rows = []
+    for model, (entity, date_attribute, amount_attribute) in ROLLUP_SOURCES.items():
+        date_column = getattr(model, date_attribute)
+        amount = func.coalesce(func.sum(getattr(model, amount_attribute)), 0) if amount_attribute else literal(0.0)
+        grouped = session.execute(
+            select(
+                func.date(date_column),
+                model.status,
+                Patient.insurance_provider,
+                func.count(model.id),
+                amount
+            )
+            .join(Patient, Patient.id == model.patient_id, isouter=True)
+            .where(date_column.isnot(None))
+            .group_by(func.date(date_column), model.status, Patient.insurance_provider)
+        ).all()
+
+        merged = defaultdict(lambda: [0, 0.0])
+        for day, status, provider, count, total in grouped:
+            key = (_as_day(day), status, provider or '')
+            merged[key][0] += count
+            merged[key][1] += total or 0.0
+        rows.extend({
+            'day': day,
+            'entity': entity,
+            'status': status,
+            'insurance_provider': provider,
+            'record_count': count,
+            'total_amount': total
+        } for (day, status, provider), (count, total) in merged.items())
+
+    session.execute(delete(DashboardRollup))
+    if rows:
+        session.execute(insert(DashboardRollup), rows)
+    session.commit()
+    return len(rows)
+
+
+def ensure_rollups_populated():
+    """Build the rollups on first start against a database that already has data"""
+    if db.session.query(DashboardRollup.id).first() is not None:
+        return
+    has_source_rows = any(db.session.query(model.id).first() is not None for model in ROLLUP_SOURCES)
+    if has_source_rows:
+        count = rebuild_rollups()
+        print(f"Dashboard rollups built ({count} rows)")
+
+
+def start_rollup_refresher(app, interval: int = None):
+    """Periodically rebuild the rollups to absorb changes made outside the ORM"""
+    interval = int(interval if interval is not None else os.getenv('DASHBOARD_ROLLUP_REFRESH_SECONDS', 0))
+    if interval <= 0:
+        return None
+
+    def refresh_loop():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    rebuild_rollups()
+            except Exception as e:
+                print(f"Dashboard Rollup Refresh Error: {e}")
+
+    thread = threading.Thread(target=refresh_loop, name='dashboard-rollup-refresher', daemon=True)
+    thread.start()
+    return thread
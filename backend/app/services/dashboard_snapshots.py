@@ -0,0 +1,259 @@
+# services/dashboard_snapshots.py
+"""
+Prebuilt dashboard responses, refreshed in the background.
+
+/dashboard/stats, /dashboard/recent-activity and /dashboard/ai-insights are
+built together from one stats computation and kept as encoded response
+bytes, so serving them is a dict lookup however many dashboards are open.
+
+A background thread checks the 'dashboard' data version every
+DASHBOARD_SNAPSHOT_SECONDS and rebuilds when it moved (or the day rolled
+over); a commit in this process that bumps the version wakes it at once.
+If the version is unchanged the snapshot is simply marked as verified. Each
+payload carries `generated_at` and `staleness_budget_seconds`: a snapshot not
+verified within that budget is rebuilt by the next request before it is
+served. Without the thread (DASHBOARD_SNAPSHOT_SECONDS=0) requests rebuild
+on demand after a change.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from flask import current_app, request
+
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck
+from app.services import data_versions
+from app.services.dashboard_stats import compute_dashboard_stats_from_rollups
+from app.services.serializers import ACTIVITY_SERIALIZERS, encode_json
+
+REFRESH_SECONDS = float(os.getenv('DASHBOARD_SNAPSHOT_SECONDS', 15))
+STALENESS_BUDGET_SECONDS = float(os.getenv('DASHBOARD_SNAPSHOT_MAX_STALENESS_SECONDS', 60))
+# Full rebuild even without a version change, to pick up writes made outside the ORM
+REBUILD_SECONDS = float(os.getenv('DASHBOARD_SNAPSHOT_REBUILD_SECONDS', 300))
+# Shortest gap between rebuilds triggered by a burst of commits
+MIN_REFRESH_SECONDS = float(os.getenv('DASHBOARD_SNAPSHOT_MIN_SECONDS', 1))
+
+DASHBOARD_VERSION = 'dashboard'
+PAYLOADS = ('stats', 'recent_activity', 'ai_insights')
+
+# Tables the dashboard payloads are computed from
+data_versions.track(DASHBOARD_VERSION, [Patient, Claim, PriorAuthorization, EligibilityCheck])
+
+
+def build_recent_activity() -> List[Dict]:
+    """Last 10 of each kind, selected as plain columns and shaped by the compiled activity serializers"""
+    activities = []
+    for model, date_column in ((Claim, Claim.submitted_date),
+                               (EligibilityCheck, EligibilityCheck.check_date),
+                               (PriorAuthorization, PriorAuthorization.submitted_date)):
+        serializer = ACTIVITY_SERIALIZERS[model]
+        rows = db.session.query(*serializer.columns).order_by(date_column.desc()).limit(10).all()
+        activities.extend(serializer.many(rows))
+
+    # Most recent first, top 20
+    activities.sort(key=lambda x: x['date'] or '', reverse=True)
+    return activities[:20]
+
+
+def build_ai_insights(stats: Dict) -> List[Dict]:
+    """Rule-based insights from the dashboard stats"""
+    total_claims = stats['claims']['total']
+    approved_claims = stats['claims']['approved']
+    total_eligibility = stats['eligibility']['total']
+    eligible_count = stats['eligibility']['eligible']
+
+    insights = []
+
+    if total_claims > 0:
+        approval_rate = (approved_claims / total_claims) * 100
+        if approval_rate < 70:
+            insights.append({
+                'type': 'warning',
+                'title': 'Low Claims Approval Rate',
+                'message': f'Claims approval rate is {approval_rate:.1f}%. Consider reviewing denial patterns.',
+                'action': 'Review denied claims for common issues'
+            })
+        elif approval_rate > 85:
+            insights.append({
+                'type': 'success',
+                'title': 'High Claims Approval Rate',
+                'message': f'Excellent claims approval rate of {approval_rate:.1f}%.',
+                'action': 'Continue current best practices'
+            })
+
+    if total_eligibility > 0:
+        eligibility_rate = (eligible_count / total_eligibility) * 100
+        if eligibility_rate < 60:
+            insights.append({
+                'type': 'info',
+                'title': 'Eligibility Check Optimization',
+                'message': f'Only {eligibility_rate:.1f}% of eligibility checks are positive. Consider pre-screening.',
+                'action': 'Implement pre-eligibility screening'
+            })
+
+    # More than 40% of claims in the last 30 days
+    recent_claims = stats['recent_activity']['claims_last_30_days']
+    if recent_claims > total_claims * 0.4:
+        insights.append({
+            'type': 'info',
+            'title': 'High Recent Activity',
+            'message': 'Significant increase in claims volume over the last 30 days.',
+            'action': 'Monitor processing capacity and staff allocation'
+        })
+
+    return insights
+
+
+class Snapshot(NamedTuple):
+    body: bytes
+    etag: str
+    generated_at: datetime
+
+
+class DashboardSnapshots:
+    def __init__(self, app, interval: float = REFRESH_SECONDS, staleness_budget: float = STALENESS_BUDGET_SECONDS,
+                 rebuild_seconds: float = REBUILD_SECONDS, min_interval: float = MIN_REFRESH_SECONDS):
+        self.app = app
+        self.interval = interval
+        self.staleness_budget = staleness_budget
+        self.rebuild_seconds = rebuild_seconds
+        self.min_interval = min_interval
+        self.builds = 0
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._version = None
+        self._built_at = None
+        self._verified_at = None
+        self._changed = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        _instances.add(self)
+
+    def _read_version(self):
+        return data_versions.read_version(DASHBOARD_VERSION), datetime.utcnow().date().isoformat()
+
+    def _since(self, moment: Optional[float]) -> float:
+        return float('inf') if moment is None else time.monotonic() - moment
+
+    def build(self, version):
+        """Compute all payloads and swap them in (needs an app context)"""
+        self._changed = False
+        generated_at = datetime.utcnow()
+        stats = compute_dashboard_stats_from_rollups(now=generated_at)
+        payloads = {
+            'stats': stats,
+            'recent_activity': {'activities': build_recent_activity()},
+            'ai_insights': {'insights': build_ai_insights(stats)}
+        }
+        meta = {'generated_at': generated_at.isoformat(), 'staleness_budget_seconds': self.staleness_budget}
+        tag = hashlib.blake2b(repr(version).encode('utf-8'), digest_size=12).hexdigest()
+
+        self._snapshots = {
+            name: Snapshot(encode_json(dict(payload, **meta)), f'{name}-{tag}', generated_at)
+            for name, payload in payloads.items()
+        }
+        self._version = version
+        self._built_at = self._verified_at = time.monotonic()
+        self.builds += 1
+
+    def refresh(self) -> bool:
+        """Rebuild if the data version moved or the snapshot is due; True if it was rebuilt"""
+        with self._lock:
+            version = self._read_version()
+            if version == self._version and self._since(self._built_at) < self.rebuild_seconds:
+                self._verified_at = time.monotonic()
+                return False
+            self.build(version)
+            return True
+
+    def mark_changed(self):
+        self._changed = True
+        self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def get(self, name: str) -> Snapshot:
+        """Latest snapshot of payload `name`, rebuilt first if it is past the staleness budget"""
+        snapshot = self._snapshots.get(name)
+        if (snapshot is None or self._since(self._verified_at) >= self.staleness_budget
+                or (self._changed and not self.running)):
+            try:
+                self.refresh()
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                print(f"Dashboard Snapshot Refresh Error: {e}")
+            snapshot = self._snapshots.get(name, snapshot)
+        return snapshot
+
+    def serve(self, name: str):
+        """Response for payload `name`: the prebuilt bytes, or 304 if the client has them"""
+        snapshot = self.get(name)
+        if request.if_none_match.contains_weak(snapshot.etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(snapshot.body, mimetype='application/json')
+        # Weak: the same data version always gives the same payload, but generated_at may differ
+        response.set_etag(snapshot.etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['Age'] = str(int((datetime.utcnow() - snapshot.generated_at).total_seconds()))
+        return response
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self._wake.wait(self.interval):
+                self._wake.clear()
+                # Let a burst of commits settle into one rebuild
+                time.sleep(max(0.0, self.min_interval - self._since(self._built_at)))
+            if self._stopped.is_set():
+                break
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception as e:
+                print(f"Dashboard Snapshot Refresh Error: {e}")
+
+    def start(self):
+        if self.interval > 0 and not self.running:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='dashboard-snapshots', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_instances = weakref.WeakSet()
+
+
+def _mark_all_changed():
+    for snapshots in list(_instances):
+        snapshots.mark_changed()
+
+
+data_versions.on_commit(DASHBOARD_VERSION, _mark_all_changed)
+
+
+def dashboard_snapshots() -> DashboardSnapshots:
+    return current_app.extensions['dashboard_snapshots']
+
+
+def init_dashboard_snapshots(app) -> DashboardSnapshots:
+    """Attach the snapshot service to `app` and start its refresher unless DASHBOARD_SNAPSHOT_SECONDS is 0"""
+    snapshots = DashboardSnapshots(app, interval=float(app.config.get('DASHBOARD_SNAPSHOT_SECONDS', REFRESH_SECONDS)))
+    app.extensions['dashboard_snapshots'] = snapshots
+    snapshots.start()
+    return snapshots
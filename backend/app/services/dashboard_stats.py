@@ -0,0 +1,189 @@
+# services/dashboard_stats.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict
+from sqlalchemy import select, func, case
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck, DashboardRollup
+
+CLAIM_STATUSES = ('pending', 'approved', 'denied', 'submitted')
+PRIOR_AUTH_STATUSES = ('pending', 'approved', 'denied', 'expired')
+ELIGIBILITY_STATUSES = ('eligible', 'not_eligible', 'pending')
+RECENT_WINDOW_DAYS = 30
+
+# Shared pool so the per-table aggregate queries run side by side
+_stats_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='dashboard-stats')
+
+
+def _count_where(condition):
+    """COUNT of rows matching condition, portable across SQLite and Postgres"""
+    return func.count(case((condition, 1)))
+
+
+def _sum_where(column, condition):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def claims_aggregate_query(since: datetime):
+    return select(
+        func.count().label('total'),
+        func.coalesce(func.sum(Claim.amount), 0).label('total_amount'),
+        _sum_where(Claim.amount, Claim.status == 'approved').label('approved_amount'),
+        _count_where(Claim.submitted_date >= since).label('recent'),
+        *[_count_where(Claim.status == status).label(status) for status in CLAIM_STATUSES]
+    )
+
+
+def prior_auths_aggregate_query(since: datetime):
+    return select(
+        func.count().label('total'),
+        _count_where(PriorAuthorization.submitted_date >= since).label('recent'),
+        *[_count_where(PriorAuthorization.status == status).label(status) for status in PRIOR_AUTH_STATUSES]
+    )
+
+
+def eligibility_aggregate_query(since: datetime):
+    return select(
+        func.count().label('total'),
+        _count_where(EligibilityCheck.check_date >= since).label('recent'),
+        *[_count_where(EligibilityCheck.status == status).label(status) for status in ELIGIBILITY_STATUSES]
+    )
+
+
+def patients_by_provider_query():
+    return select(
+        Patient.insurance_provider,
+        func.count(Patient.id).label('patient_count')
+    ).group_by(Patient.insurance_provider)
+
+
+def _run_one(engine, statement):
+    with engine.connect() as conn:
+        return conn.execute(statement).mappings().one()
+
+
+def _run_all(engine, statement):
+    with engine.connect() as conn:
+        return conn.execute(statement).all()
+
+
+def _rate(part, total):
+    return round(part / total * 100, 1) if total > 0 else 0
+
+
+def compute_dashboard_stats(engine=None, now: datetime = None, concurrent: bool = True) -> Dict:
+    """Compute the /dashboard/stats payload with one conditional-aggregation
+    query per table instead of one COUNT/SUM query per status.
+
+    The per-table queries run concurrently on separate connections.
+    """
+    engine = engine or db.engine
+    since = (now or datetime.utcnow()) - timedelta(days=RECENT_WINDOW_DAYS)
+
+    jobs = [
+        (_run_one, claims_aggregate_query(since)),
+        (_run_one, prior_auths_aggregate_query(since)),
+        (_run_one, eligibility_aggregate_query(since)),
+        (_run_all, patients_by_provider_query()),
+    ]
+    if concurrent:
+        futures = [_stats_executor.submit(fn, engine, statement) for fn, statement in jobs]
+        claims, auths, eligibility, provider_stats = [future.result() for future in futures]
+    else:
+        claims, auths, eligibility, provider_stats = [fn(engine, statement) for fn, statement in jobs]
+
+    return build_stats_payload(claims, auths, eligibility, provider_stats)
+
+
+def build_stats_payload(claims, auths, eligibility, provider_stats) -> Dict:
+    """Shape per-table aggregates into the /dashboard/stats response"""
+    total_patients = sum(count for _, count in provider_stats)
+    total_claim_amount = round(claims['total_amount'] or 0, 2)
+    approved_amount = round(claims['approved_amount'] or 0, 2)
+
+    return {
+        'overview': {
+            'total_patients': total_patients,
+            'total_claims': claims['total'],
+            'total_prior_auths': auths['total'],
+            'total_eligibility_checks': eligibility['total'],
+            'total_claim_amount': total_claim_amount,
+            'approved_amount': approved_amount
+        },
+        'claims': {
+            'total': claims['total'],
+            'pending': claims['pending'],
+            'approved': claims['approved'],
+            'denied': claims['denied'],
+            'submitted': claims['submitted'],
+            'approval_rate': _rate(claims['approved'], claims['total']),
+            'total_amount': total_claim_amount,
+            'approved_amount': approved_amount
+        },
+        'prior_authorizations': {
+            'total': auths['total'],
+            'pending': auths['pending'],
+            'approved': auths['approved'],
+            'denied': auths['denied'],
+            'expired': auths['expired'],
+            'approval_rate': _rate(auths['approved'], auths['total'])
+        },
+        'eligibility': {
+            'total': eligibility['total'],
+            'eligible': eligibility['eligible'],
+            'not_eligible': eligibility['not_eligible'],
+            'pending': eligibility['pending'],
+            'success_rate': _rate(eligibility['eligible'], eligibility['total'])
+        },
+        'recent_activity': {
+            'claims_last_30_days': claims['recent'],
+            'eligibility_checks_last_30_days': eligibility['recent'],
+            'prior_auths_last_30_days': auths['recent']
+        },
+        'insurance_providers': [
+            {
+                'name': provider,
+                'patient_count': count
+            }
+            for provider, count in provider_stats
+        ]
+    }
+
+
+def compute_dashboard_stats_from_rollups(now: datetime = None) -> Dict:
+    """Compute the /dashboard/stats payload from the daily rollup table.
+
+    Cost grows with the number of days, statuses and insurers rather than
+    with table size. The 30-day windows are counted in whole days.
+    """
+    since_day = ((now or datetime.utcnow()) - timedelta(days=RECENT_WINDOW_DAYS)).date()
+
+    rows = db.session.execute(
+        select(
+            DashboardRollup.entity,
+            DashboardRollup.status,
+            func.sum(DashboardRollup.record_count),
+            func.sum(DashboardRollup.total_amount),
+            _sum_where(DashboardRollup.record_count, DashboardRollup.day >= since_day)
+        ).group_by(DashboardRollup.entity, DashboardRollup.status)
+    ).all()
+
+    tables = {
+        entity: {'total': 0, 'recent': 0, 'total_amount': 0.0, 'approved_amount': 0.0,
+                 **{status: 0 for status in statuses}}
+        for entity, statuses in (('claim', CLAIM_STATUSES), ('prior_auth', PRIOR_AUTH_STATUSES),
+                                 ('eligibility', ELIGIBILITY_STATUSES))
+    }
+    for entity, status, count, amount, recent in rows:
+        table = tables.get(entity)
+        if table is None:
+            continue
+        table['total'] += count or 0
+        table['recent'] += recent or 0
+        table['total_amount'] += amount or 0.0
+        if status in table:
+            table[status] += count or 0
+        if status == 'approved':
+            table['approved_amount'] += amount or 0.0
+
+    provider_stats = db.session.execute(patients_by_provider_query()).all()
+    return build_stats_payload(tables['claim'], tables['prior_auth'], tables['eligibility'], provider_stats)
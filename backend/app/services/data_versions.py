@@ -0,0 +1,88 @@
+# services/data_versions.py
+"""
+Change counters for tables that per-process caches and HTTP validators depend on.
+
+Modules declare which models feed a named version with track(). Every flush
+that adds, changes or deletes one of those models bumps the DataVersion row
+for that name, once per transaction and inside it, so the counter moves if
+and only if the change commits. Callbacks registered with on_commit() run in
+the committing process right after the commit; other processes see the new
+value the next time they read_version().
+"""
+
+from typing import Callable, Dict, Iterable, List, Set
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.models import db, DataVersion
+
+# model -> version names it feeds
+_tracked: Dict[type, Set[str]] = {}
+# version name -> callbacks run after a commit that bumped it
+_commit_callbacks: Dict[str, List[Callable[[], None]]] = {}
+
+
+def track(name: str, models: Iterable[type]):
+    """Bump version `name` whenever one of `models` changes"""
+    for model in models:
+        _tracked.setdefault(model, set()).add(name)
+
+
+def on_commit(name: str, callback: Callable[[], None]):
+    _commit_callbacks.setdefault(name, []).append(callback)
+
+
+def read_version(name: str, session=None) -> int:
+    session = session or db.session
+    version = session.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar()
+    return version or 0
+
+
+def read_versions(names: Iterable[str], session=None) -> Dict[str, int]:
+    """Several versions in one query; missing rows read as 0"""
+    session = session or db.session
+    names = list(names)
+    rows = session.execute(select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(names)))
+    versions = dict.fromkeys(names, 0)
+    versions.update(dict(rows.all()))
+    return versions
+
+
+def bump_version(connection, name: str):
+    """Increment version `name` on `connection`, inside the caller's transaction"""
+    result = connection.execute(
+        update(DataVersion).where(DataVersion.name == name).values(version=DataVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(DataVersion).values(name=name, version=1))
+
+
+def _after_flush(session, flush_context):
+    if not _tracked:
+        return
+    bumped = session.info.setdefault('data_versions_bumped', set())
+    changed = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        changed.update(_tracked.get(type(instance), ()))
+    for name in sorted(changed - bumped):
+        bump_version(session.connection(), name)
+        bumped.add(name)
+
+
+def _after_commit(session):
+    for name in session.info.pop('data_versions_bumped', ()):
+        for callback in _commit_callbacks.get(name, ()):
+            callback()
+
+
+def _after_rollback(session):
+    session.info.pop('data_versions_bumped', None)
+
+
+def register_data_version_hooks():
+    """Bump tracked versions with every ORM write, and run on_commit callbacks"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
@@ -0,0 +1,124 @@
+# services/http_cache.py
+"""
+Conditional GET and response caching for read-mostly endpoints.
+
+A route decorated with @conditional(version, cache_control) gets a strong
+ETag derived from the endpoint, its arguments and `version()`: a data
+version counter, a code set fingerprint or a constant for static payloads.
+No response body is hashed, so a matching If-None-Match is answered with
+304 Not Modified before the view runs at all.
+
+Rendered 200 bodies are also kept in a per-app LRU keyed by ETag
+(HTTP_BODY_CACHE_SIZE entries, 0 to disable), so clients without a cached
+copy get the bytes without rebuilding the payload either.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import current_app, make_response, request
+
+BODY_CACHE_SIZE = int(os.getenv('HTTP_BODY_CACHE_SIZE', 256))
+# Larger bodies are served but not kept
+BODY_CACHE_MAX_BYTES = int(os.getenv('HTTP_BODY_CACHE_MAX_BYTES', 1024 * 1024))
+
+
+class BodyCache:
+    """Thread-safe LRU of rendered response bodies"""
+
+    def __init__(self, size: int = BODY_CACHE_SIZE, max_bytes: int = BODY_CACHE_MAX_BYTES):
+        self.size = size
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, Tuple[bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, body: bytes, mimetype: str):
+        if self.size <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._entries[key] = (body, mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def content_version(value) -> str:
+    """Version for data fixed at import time (templates, reference tables): a hash computed once"""
+    encoded = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+def make_etag(endpoint: str, version, view_args, query_args) -> str:
+    key = json.dumps([endpoint, version, sorted(view_args.items()), sorted(query_args.items(multi=True))],
+                     default=str)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def _finish(response, etag: str, cache_control: str):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def body_cache() -> BodyCache:
+    return current_app.extensions['http_body_cache']
+
+
+def conditional(version: Callable[[], object], cache_control: str = 'no-cache', cache_body: bool = True):
+    """Serve a GET route with an ETag from version(), 304s, `cache_control` and the body cache.
+
+    version() must change whenever the response for the same URL would; only
+    200 responses are cached, and a failing version() just disables caching
+    for that request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            try:
+                etag = make_etag(request.endpoint, version(), kwargs, request.args)
+            except Exception as e:
+                print(f"HTTP cache version lookup failed for {request.endpoint}: {e}")
+                return view(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                return _finish(current_app.response_class(status=304), etag, cache_control)
+
+            cache = body_cache() if cache_body else None
+            cached = cache.get(etag) if cache is not None else None
+            if cached is not None:
+                body, mimetype = cached
+                return _finish(current_app.response_class(body, mimetype=mimetype), etag, cache_control)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if cache is not None and not response.is_streamed:
+                cache.put(etag, response.get_data(), response.mimetype)
+            return _finish(response, etag, cache_control)
+        return wrapper
+    return decorator
+
+
+def init_http_cache(app):
+    app.extensions['http_body_cache'] = BodyCache(int(app.config.get('HTTP_BODY_CACHE_SIZE', BODY_CACHE_SIZE)))
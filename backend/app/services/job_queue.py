@@ -0,0 +1,350 @@
+# services/job_queue.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Any
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress and partial results.
+
+    Items added with add_result()/add_error() are written together with the
+    next report_progress() or when the job finishes, so recorded progress and
+    recorded items always agree. A job requeued after its worker died runs
+    again with `done` set to the last recorded progress and `resumed` True:
+    handlers start after the first `done` items and report progress only once
+    the work for them is committed. item_id() gives records created by a job
+    the same IDs on every attempt, so a handler can find what an interrupted
+    attempt stored after its last report instead of storing it twice.
+    """
+
+    def __init__(self, queue: 'JobQueue', job_id: str, total: int = None, done: int = 0, attempt: int = 1):
+        self.queue = queue
+        self.job_id = job_id
+        self.total = total
+        self.done = done or 0
+        self.attempt = attempt
+        self._items: List[tuple] = []
+
+    @property
+    def resumed(self) -> bool:
+        return self.attempt > 1
+
+    def item_id(self, prefix: str, index: int) -> str:
+        """Record ID for item `index` of this job, the same on every attempt"""
+        return f"{prefix}{uuid.uuid5(uuid.NAMESPACE_URL, f'job:{self.job_id}:{index}').hex.upper()}"
+
+    def set_total(self, total: int):
+        self.total = total
+        self.flush()
+
+    def report_progress(self, done: int, total: int = None):
+        self.done = done
+        if total is not None:
+            self.total = total
+        self.flush()
+
+    def add_result(self, item: Any):
+        self._items.append(('result', item))
+
+    def add_error(self, item: Any):
+        self._items.append(('error', item))
+
+    def flush(self):
+        """Record pending items with the current progress"""
+        self.queue._checkpoint(self.job_id, self._items, self.done, self.total)
+        self._items = []
+
+    def counts(self) -> Dict[str, int]:
+        """Results and errors recorded so far, across attempts"""
+        return self.queue._item_counts(self.job_id)
+
+
+class JobQueue:
+    """SQLite-backed job queue with a local pool of worker threads.
+
+    Long-running batch endpoints enqueue a job and return its ID right away;
+    workers, started by init_app() in every process sharing the queue file,
+    pick jobs up (including jobs queued before the process started), run the
+    registered handler inside an application context and record progress,
+    partial results and per-item errors that /jobs/<id> reports back.
+    Workers also sweep for jobs whose heartbeat is older than stale_after and
+    put them back on the queue, so a job outlives the worker that died on it.
+    """
+
+    def __init__(self, path: str = None, workers: int = 2, poll_interval: float = 0.5,
+                 stale_after: int = 300):
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.app = None
+        self._handlers: Dict[str, Callable] = {}
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+        self._running = set()
+        self._last_sweep = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.path = self.path or app.config.get('JOBS_DB_PATH') or os.getenv(
+            'JOBS_DB_PATH', os.path.join(app.instance_path, 'jobs.db'))
+        self.workers = int(app.config.get('JOB_WORKERS', os.getenv('JOB_WORKERS', self.workers)))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._create_schema()
+        self._requeue_stale_jobs()
+        app.extensions['job_queue'] = self
+        self.start()
+
+    def register_handler(self, kind: str, handler: Callable):
+        """Register handler(payload, ctx) for jobs of the given kind"""
+        self._handlers[kind] = handler
+
+    # Storage
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        # Reconnect if init_app() moved the queue to another file
+        if conn is None or self._local.path != self.path:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.path = self.path
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress_done INTEGER NOT NULL DEFAULT 0,
+                progress_total INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
+            CREATE TABLE IF NOT EXISTS job_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_job_items_job_type ON job_items (job_id, item_type, id);
+        ''')
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+        if 'attempts' not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+
+    def _requeue_stale_jobs(self):
+        """Jobs left running by a dead worker go back on the queue, keeping their recorded progress.
+
+        Jobs this process is still running have their heartbeat renewed first,
+        so a long stretch between progress reports does not look like a dead worker.
+        """
+        now = time.time()
+        conn = self._connection()
+        running = list(self._running)
+        if running:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND id IN ({', '.join('?' * len(running))})",
+                [now] + running
+            )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL "
+            "WHERE status = 'running' AND heartbeat_at < ?", (now - self.stale_after,)
+        )
+        self._last_sweep = time.monotonic()
+
+    def _checkpoint(self, job_id: str, items: List[tuple], done: int, total: Optional[int]):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO job_items (job_id, item_type, data) VALUES (?, ?, ?)',
+                [(job_id, item_type, json.dumps(item, default=str)) for item_type, item in items]
+            )
+            conn.execute(
+                'UPDATE jobs SET progress_done = ?, progress_total = ?, heartbeat_at = ? WHERE id = ?',
+                (done, total, time.time(), job_id)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _item_counts(self, job_id: str) -> Dict[str, int]:
+        counts = dict(self._connection().execute(
+            'SELECT item_type, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY item_type', (job_id,)
+        ).fetchall())
+        return {'result': counts.get('result', 0), 'error': counts.get('error', 0)}
+
+    # Public API
+
+    def enqueue(self, kind: str, payload: Dict, total: int = None) -> str:
+        if kind not in self._handlers:
+            raise ValueError(f"No job handler registered for '{kind}'")
+
+        job_id = f"JOB{uuid.uuid4().hex[:12].upper()}"
+        self._connection().execute(
+            'INSERT INTO jobs (id, kind, status, payload, progress_total, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, kind, 'queued', json.dumps(payload, default=str), total, time.time())
+        )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str, item_offset: int = 0, item_limit: int = 500) -> Optional[Dict]:
+        conn = self._connection()
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        counts = self._item_counts(job_id)
+
+        def items(item_type):
+            rows = conn.execute(
+                'SELECT data FROM job_items WHERE job_id = ? AND item_type = ? ORDER BY id LIMIT ? OFFSET ?',
+                (job_id, item_type, item_limit, item_offset)
+            ).fetchall()
+            return [json.loads(r['data']) for r in rows]
+
+        total = row['progress_total']
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'progress': {
+                'done': row['progress_done'],
+                'total': total,
+                'percent': round(row['progress_done'] / total * 100, 1) if total else None
+            },
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'results': items('result'),
+            'errors': items('error'),
+            'result_count': counts['result'],
+            'error_count': counts['error'],
+            'created_at': _to_iso(row['created_at']),
+            'started_at': _to_iso(row['started_at']),
+            'finished_at': _to_iso(row['finished_at'])
+        }
+
+    # Workers
+
+    def start(self):
+        with self._start_lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'job-worker-{len(self._threads) + 1}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping.clear()
+
+    def _claim_next_job(self) -> Optional[sqlite3.Row]:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (now, now, row['id'])
+                )
+                row = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            conn.execute('COMMIT')
+            return row
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                # Sweep for jobs whose worker died, a few times per stale_after
+                if time.monotonic() - self._last_sweep >= self.stale_after / 4:
+                    self._requeue_stale_jobs()
+                job = self._claim_next_job()
+            except sqlite3.Error as e:
+                print(f"Job Queue Error: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job: sqlite3.Row):
+        handler = self._handlers.get(job['kind'])
+        ctx = JobContext(self, job['id'], job['progress_total'], job['progress_done'], job['attempts'])
+        self._running.add(job['id'])
+        try:
+            if handler is None:
+                raise ValueError(f"No job handler registered for '{job['kind']}'")
+            payload = json.loads(job['payload'])
+            with self.app.app_context():
+                result = handler(payload, ctx)
+            ctx.flush()
+            self._connection().execute(
+                "UPDATE jobs SET status = 'completed', result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result, default=str) if result is not None else None, time.time(), job['id'])
+            )
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            traceback.print_exc()
+            self._connection().execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (str(e), time.time(), job['id'])
+            )
+        finally:
+            self._running.discard(job['id'])
+
+
+def _to_iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+
+def wants_async(request) -> bool:
+    """True when the caller asked for a batch endpoint to run as a background job"""
+    data = request.get_json(silent=True) or {}
+    flag = data.get('async', request.args.get('async', 'false'))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+# Global job queue instance, bound to the Flask app in app.py
+job_queue = JobQueue()
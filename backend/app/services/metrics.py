@@ -0,0 +1,256 @@
+# services/metrics.py
+"""
+In-process request metrics, exported in Prometheus text format at /metrics.
+
+Every request is timed end to end and labelled by blueprint and route rule.
+Within a request, time spent in SQL statements, model calls and JSON
+serialization is added up separately, so a slow endpoint can be pinned on
+the database, the model or the response encoding. The same split is sent back
+to the client in a Server-Timing header.
+
+Per-request totals only include work done on the request's own thread;
+model calls fanned out to worker pools (batch scrubbing) show up in the
+per-call rcm_ai_call_duration_seconds histogram instead.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Sequence, Tuple
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {value:g}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self):
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (None,), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound is None else f'{bound:g}'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, ("le", le))} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {total:.6f}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+ROUTE_LABELS = ('blueprint', 'route')
+
+http_requests = registry.counter('rcm_http_requests_total', 'HTTP requests served',
+                                 ('method',) + ROUTE_LABELS + ('status',))
+http_duration = registry.histogram('rcm_http_request_duration_seconds', 'Wall time per HTTP request',
+                                   ('method',) + ROUTE_LABELS)
+http_db_time = registry.histogram('rcm_http_request_db_seconds', 'SQL time per HTTP request', ROUTE_LABELS)
+http_ai_time = registry.histogram('rcm_http_request_ai_seconds', 'Model call time per HTTP request', ROUTE_LABELS)
+http_serialization_time = registry.histogram('rcm_http_request_serialization_seconds',
+                                             'JSON encoding time per HTTP request', ROUTE_LABELS)
+db_query_duration = registry.histogram('rcm_db_query_duration_seconds', 'Time per SQL statement')
+ai_call_duration = registry.histogram('rcm_ai_call_duration_seconds', 'Time per model call, retries included',
+                                      ('task', 'outcome'))
+
+
+class RequestTimings:
+    __slots__ = ('started', 'db', 'ai', 'serialization')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.ai = 0.0
+        self.serialization = 0.0
+
+
+_local = threading.local()
+
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+
+def record_ai_call(task: str, seconds: float, outcome: str):
+    ai_call_duration.observe(seconds, task, outcome)
+    timings = current_timings()
+    if timings is not None:
+        timings.ai += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_query_duration.observe(elapsed)
+    timings = current_timings()
+    if timings is not None:
+        timings.db += elapsed
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the current request's serialization time"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings()
+        if timings is not None:
+            timings.serialization += time.perf_counter() - started
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, adding encoding time to the current request's timings"""
+
+    def dumps(self, obj, **kwargs):
+        with timed_serialization():
+            return super().dumps(obj, **kwargs)
+
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    return request.blueprint or '', rule
+
+
+def _start_timer():
+    _local.timings = RequestTimings()
+
+
+def _record_request(response):
+    timings = current_timings()
+    if timings is None:
+        return response
+    _local.timings = None
+
+    blueprint, route = _route_labels()
+    elapsed = time.perf_counter() - timings.started
+    http_requests.inc(request.method, blueprint, route, str(response.status_code))
+    http_duration.observe(elapsed, request.method, blueprint, route)
+    http_db_time.observe(timings.db, blueprint, route)
+    http_ai_time.observe(timings.ai, blueprint, route)
+    http_serialization_time.observe(timings.serialization, blueprint, route)
+    response.headers['Server-Timing'] = (f'db;dur={timings.db * 1000:.1f}, ai;dur={timings.ai * 1000:.1f}, '
+                                         f'json;dur={timings.serialization * 1000:.1f}, '
+                                         f'total;dur={elapsed * 1000:.1f}')
+    return response
+
+
+def _discard_timer(error=None):
+    _local.timings = None
+
+
+def metrics_endpoint():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_metrics(app):
+    """Time every request of `app`, and serve the registry at /metrics"""
+    if not isinstance(app.json, TimedJSONProvider):
+        app.json = TimedJSONProvider(app)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.teardown_request(_discard_timer)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,116 @@
+# services/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, Optional
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not issued by encode_cursor"""
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value, column):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values) -> str:
+    """Opaque, URL-safe cursor for the (sort key, id) of the last row on a page"""
+    raw = json.dumps([_to_json(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('cursor does not match the sort order')
+        return [_from_json(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}')
+
+
+def page_args(request, include_total: bool = False) -> Dict:
+    """Read cursor, limit and include_total from the query string.
+
+    include_total is the default for endpoints whose clients have always
+    been sent a total; include_total=false skips the count on those.
+    """
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    requested = request.args.get('include_total')
+    return {
+        'cursor': request.args.get('cursor') or None,
+        'limit': max(1, min(limit, MAX_PAGE_SIZE)),
+        'include_total': include_total if requested is None else requested.lower() in _TRUE_VALUES
+    }
+
+
+def _after(columns, values, descending):
+    """WHERE clause selecting the rows after values in (columns...) order"""
+    conditions = []
+    for position, column in enumerate(columns):
+        beyond = column < values[position] if descending else column > values[position]
+        equal_prefix = [columns[i] == values[i] for i in range(position)]
+        conditions.append(and_(*equal_prefix, beyond) if equal_prefix else beyond)
+    return or_(*conditions)
+
+
+def paginate_query(query, sort_columns, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                   include_total: bool = False, descending: bool = True,
+                   serialize: Callable = None) -> Dict:
+    """Keyset-paginate an ORM query.
+
+    sort_columns must end with a unique column (normally the primary key) so
+    the order is total. Each page costs an index range read of limit + 1 rows
+    however deep the client has paged; the total is only counted on request.
+    """
+    serialize = serialize or (lambda row: row.to_dict())
+    ordering = [column.desc() if descending else column.asc() for column in sort_columns]
+
+    page_query = query
+    if cursor:
+        page_query = page_query.filter(_after(sort_columns, decode_cursor(cursor, sort_columns), descending))
+
+    rows = page_query.order_by(*ordering).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in sort_columns])
+
+    pagination = {
+        'limit': limit,
+        'has_more': has_more,
+        'next_cursor': next_cursor
+    }
+    if include_total:
+        pagination['total'] = query.order_by(None).count()
+
+    return {
+        'items': [serialize(row) for row in rows],
+        'pagination': pagination
+    }
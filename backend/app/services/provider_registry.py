@@ -0,0 +1,117 @@
+# services/provider_registry.py
+"""
+Read-through, process-wide registry of insurance providers.
+
+All providers are loaded into an immutable snapshot, with lookups by code and
+by name, so the eligibility path no longer queries InsuranceProvider per
+request. Any flush that touches an InsuranceProvider also bumps the
+'insurance_provider' data version in the same transaction (see
+app.services.data_versions):
+
+- the committing process drops its snapshot right after the commit;
+- other worker processes compare the stored version with their snapshot's at
+  most every PROVIDER_REGISTRY_CHECK_SECONDS and reload when it moved.
+"""
+
+import copy
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.models.models import InsuranceProvider
+from app.services import data_versions
+
+VERSION_NAME = 'insurance_provider'
+CHECK_INTERVAL = float(os.getenv('PROVIDER_REGISTRY_CHECK_SECONDS', 5))
+
+
+class ProviderInfo(NamedTuple):
+    id: int
+    code: str
+    name: str
+    country: str
+    contact_info: Optional[dict]
+    api_endpoint: Optional[str]
+    coverage_rules: Optional[dict]
+    is_active: bool
+
+    @classmethod
+    def from_model(cls, provider: InsuranceProvider) -> 'ProviderInfo':
+        return cls(provider.id, provider.code, provider.name, provider.country, provider.contact_info,
+                   provider.api_endpoint, provider.coverage_rules, bool(provider.is_active))
+
+    def to_dict(self) -> Dict:
+        """Same shape as InsuranceProvider.to_dict(); JSON fields are copied so callers can't alter the snapshot"""
+        return {
+            'id': self.id,
+            'code': self.code,
+            'name': self.name,
+            'country': self.country,
+            'contact_info': copy.deepcopy(self.contact_info),
+            'api_endpoint': self.api_endpoint,
+            'coverage_rules': copy.deepcopy(self.coverage_rules),
+            'is_active': self.is_active
+        }
+
+
+class ProviderSnapshot:
+    """Immutable view of the provider table at one DataVersion"""
+
+    __slots__ = ('version', 'generation', 'by_code', 'by_name', 'active')
+
+    def __init__(self, providers, version: int, generation: int):
+        self.version = version
+        self.generation = generation
+        self.by_code = MappingProxyType({provider.code: provider for provider in providers})
+        self.by_name = MappingProxyType({provider.name.casefold(): provider for provider in providers})
+        self.active: Tuple[ProviderInfo, ...] = tuple(provider for provider in providers if provider.is_active)
+
+
+class ProviderRegistry:
+    def __init__(self, check_interval: float = CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._snapshot: Optional[ProviderSnapshot] = None
+        self._next_check = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> ProviderSnapshot:
+        """Current snapshot, reloaded if another process committed a change (needs an app context)"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() < self._next_check:
+                return snapshot
+            version = data_versions.read_version(VERSION_NAME)
+            if snapshot is None or snapshot.version != version:
+                providers = [ProviderInfo.from_model(provider)
+                             for provider in InsuranceProvider.query.order_by(InsuranceProvider.id)]
+                self._generation += 1
+                snapshot = self._snapshot = ProviderSnapshot(providers, version, self._generation)
+            self._next_check = time.monotonic() + self.check_interval
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def get(self, code: str) -> Optional[ProviderInfo]:
+        return self.snapshot().by_code.get(code)
+
+    def get_by_name(self, name: str) -> Optional[ProviderInfo]:
+        return self.snapshot().by_name.get((name or '').casefold())
+
+    def active(self) -> Tuple[ProviderInfo, ...]:
+        return self.snapshot().active
+
+
+provider_registry = ProviderRegistry()
+
+
+data_versions.track(VERSION_NAME, [InsuranceProvider])
+data_versions.on_commit(VERSION_NAME, provider_registry.invalidate)
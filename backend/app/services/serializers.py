@@ -0,0 +1,245 @@
+# services/serializers.py
+"""
+Fast JSON encoding for API responses.
+
+ModelSerializer compiles, once per model, a function that turns a row into
+the same dict as the model's to_dict(): the field list comes from the
+table's columns, date and datetime columns are converted with isoformat(),
+and the dict is built as a single literal instead of one lookup per field.
+It accepts ORM instances and plain result rows alike, so list endpoints can
+select the columns without loading ORM objects.
+
+FastJSONProvider encodes with orjson when it is installed (JSON_BACKEND=auto,
+the default) and with the standard library otherwise; json_response() goes
+straight from the payload to response bytes.
+"""
+
+import datetime as dt
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+from app.models.models import (Patient, Claim, PriorAuthorization, EligibilityCheck, InsuranceProvider,
+                               ClaimSubmission, PriorAuthRequest, CodingSession, ClinicalDocument,
+                               RemittancePayment)
+from app.services.metrics import TimedJSONProvider, timed_serialization
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+Field = Union[str, tuple]
+
+# Flask's fallback encoder: dates as HTTP dates, Decimal and UUID as strings, dataclasses as dicts
+flask_default = DefaultJSONProvider.default
+
+
+class StdlibJSON:
+    name = 'json'
+
+    def dumps(self, obj, default: Callable = flask_default, indent: bool = False, sort_keys: bool = False) -> bytes:
+        if indent:
+            text = json.dumps(obj, default=default, indent=2, sort_keys=sort_keys)
+        else:
+            text = json.dumps(obj, default=default, separators=(',', ':'), sort_keys=sort_keys)
+        return text.encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonJSON:
+    name = 'orjson'
+
+    def __init__(self, orjson):
+        self._orjson = orjson
+        # Dates still go through `default`, so they keep Flask's encoding
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, default: Callable = flask_default, indent: bool = False, sort_keys: bool = False) -> bytes:
+        option = self._options
+        if indent:
+            option |= self._orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= self._orjson.OPT_SORT_KEYS
+        try:
+            return self._orjson.dumps(obj, default=default, option=option)
+        except self._orjson.JSONEncodeError:
+            # Integers beyond 64 bits and other values orjson refuses; the stdlib
+            # either encodes them or raises the usual TypeError
+            return StdlibJSON().dumps(obj, default=default, indent=indent, sort_keys=sort_keys)
+
+    def loads(self, data):
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            # NaN and Infinity, which the stdlib writes and accepts
+            return json.loads(data)
+
+
+def json_backend(name: str = None):
+    """The JSON backend named by `name` (or JSON_BACKEND): 'orjson', 'json' or 'auto'"""
+    name = name or JSON_BACKEND
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+        except ImportError:
+            if name == 'orjson':
+                raise
+        else:
+            return OrjsonJSON(orjson)
+    return StdlibJSON()
+
+
+def engine_json_options(backend=None) -> Dict:
+    """SQLAlchemy engine options decoding JSON columns with the fast backend"""
+    return {'json_deserializer': (backend or json_backend()).loads}
+
+
+class FastJSONProvider(TimedJSONProvider):
+    """Flask JSON provider backed by json_backend(); keys keep the order the payload was built in"""
+
+    sort_keys = False
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        self.backend = backend or json_backend()
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        with timed_serialization():
+            return self.backend.dumps(obj, default=self.default, sort_keys=self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.backend.loads(s)
+
+    def dump_bytes(self, obj) -> bytes:
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        with timed_serialization():
+            return self.backend.dumps(obj, default=self.default, indent=indent, sort_keys=self.sort_keys)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dump_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def encode_json(payload) -> bytes:
+    """Response body bytes for `payload`, as jsonify would produce them"""
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        return provider.dump_bytes(payload) + b'\n'
+    return f'{provider.dumps(payload)}\n'.encode('utf-8')
+
+
+def json_response(payload, status: int = 200, headers: Dict = None):
+    """Encode `payload` straight to a response body, like jsonify(payload) without the str round trip"""
+    return current_app.response_class(encode_json(payload), status=status, headers=headers,
+                                      mimetype='application/json')
+
+
+class ModelSerializer:
+    """to_dict() for a model, compiled from its column metadata.
+
+    `fields` lists the output keys in order; each is a column name, or a
+    (key, source) pair where source is another column name or a callable
+    taking the row. By default every column except `exclude` is used.
+    `empty` maps keys to a literal ([] or {}) used when the value is falsy.
+
+    Calling the serializer reads attributes, for ORM instances; from_row()
+    reads by position, for rows of query(*serializer.columns), which is
+    several times cheaper than attribute access on a result row.
+    """
+
+    def __init__(self, model, fields: Sequence[Field] = None, exclude: Iterable[str] = (),
+                 empty: Dict[str, object] = None):
+        self.model = model
+        table_columns = model.__table__.columns
+        if fields is None:
+            fields = [column.key for column in table_columns if column.key not in set(exclude)]
+        empty = empty or {}
+
+        namespace = {}
+        by_attribute = []
+        by_position = []
+        self.columns = []
+        for field in fields:
+            key, source = field if isinstance(field, tuple) else (field, field)
+            if callable(source):
+                name = f'_f{len(namespace)}'
+                namespace[name] = source
+                by_attribute.append(f'{key!r}: {name}(row)')
+                by_position.append(f'{key!r}: {name}(row)')
+                continue
+
+            column = table_columns[source]
+            for items, value in ((by_attribute, f'row.{source}'), (by_position, f'row[{len(self.columns)}]')):
+                if _is_temporal(column):
+                    value = f'({value}.isoformat() if {value} else None)'
+                elif key in empty:
+                    value = f'({value} or {empty[key]!r})'
+                items.append(f'{key!r}: {value}')
+            self.columns.append(getattr(model, source))
+
+        code = ('def from_object(row):\n    return {' + ', '.join(by_attribute) + '}\n'
+                'def from_row(row):\n    return {' + ', '.join(by_position) + '}\n')
+        exec(compile(code, f'<serializer {model.__name__}>', 'exec'), namespace)
+        self._from_object = namespace['from_object']
+        self.from_row = namespace['from_row']
+
+    def __call__(self, row) -> Dict:
+        return self._from_object(row)
+
+    def many(self, rows: Iterable) -> List[Dict]:
+        """Serialize rows of query(*self.columns)"""
+        from_row = self.from_row
+        return [from_row(row) for row in rows]
+
+
+def _is_temporal(column) -> bool:
+    try:
+        return issubclass(column.type.python_type, (dt.date, dt.time))
+    except NotImplementedError:
+        return False
+
+
+SERIALIZERS = {
+    Patient: ModelSerializer(Patient, fields=[
+        'id', 'patient_id', ('name', lambda patient: f'{patient.first_name} {patient.last_name}'),
+        'first_name', 'last_name', 'dob', 'national_id', 'phone', 'email', 'address', 'emergency_contact',
+        'emergency_phone', 'insurance_provider', 'insurance_id', 'policy_status', 'coverage_details', 'created_at'
+    ]),
+    PriorAuthorization: ModelSerializer(PriorAuthorization),
+    EligibilityCheck: ModelSerializer(EligibilityCheck),
+    InsuranceProvider: ModelSerializer(InsuranceProvider, exclude=('created_at',)),
+    ClaimSubmission: ModelSerializer(ClaimSubmission, empty={'diagnosis_codes': [], 'procedure_codes': []}),
+    PriorAuthRequest: ModelSerializer(PriorAuthRequest, empty={'documents': []}),
+    CodingSession: ModelSerializer(CodingSession, empty={'diagnosis_codes': [], 'procedure_codes': []}),
+    ClinicalDocument: ModelSerializer(ClinicalDocument, empty={'content': {}}),
+    RemittancePayment: ModelSerializer(RemittancePayment, exclude=('posted_at',),
+                                       empty={'adjustment_codes': []}),
+}
+
+# Entries of the dashboard activity feed, one shape per source table
+ACTIVITY_SERIALIZERS = {
+    Claim: ModelSerializer(Claim, fields=[
+        ('type', lambda row: 'claim'), 'id', 'patient_id', 'status', 'amount', ('date', 'submitted_date'),
+        ('description', lambda row: f'Claim ${row.amount} - {row.status}')
+    ]),
+    EligibilityCheck: ModelSerializer(EligibilityCheck, fields=[
+        ('type', lambda row: 'eligibility'), 'id', 'patient_id', 'status', 'service_type', ('date', 'check_date'),
+        ('description', lambda row: f'Eligibility check for {row.service_type} - {row.status}')
+    ]),
+    PriorAuthorization: ModelSerializer(PriorAuthorization, fields=[
+        ('type', lambda row: 'prior_auth'), 'id', 'patient_id', 'status', 'service_type',
+        ('date', 'submitted_date'),
+        ('description', lambda row: f'Prior auth for {row.service_type} - {row.status}')
+    ]),
+}
+
+
+def serializer_for(model) -> Optional[ModelSerializer]:
+    return SERIALIZERS.get(model)
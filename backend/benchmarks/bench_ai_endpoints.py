@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for every AI-backed endpoint, run offline against the
+deterministic stand-in model (app/services/ai_backends.py).
+
+Usage:
+    python benchmarks/bench_ai_endpoints.py [--concurrency 16] [--requests 200]
+        [--latency-ms 800] [--jitter-ms 200] [--error-rate 0.02] [--malformed-rate 0.05]
+        [--rate-limit 0] [--retries 3] [--hedge] [--endpoint claims-submit ...]
+
+Each endpoint is driven by a fixed number of client threads against a fresh
+SQLite database; the report gives p50/p95/p99 latency, requests per second
+and non-2xx responses. The AI response cache is off unless --cache is given,
+and the client-side rate limiter is off unless --rate-limit sets one.
+--hedge sends a second copy of any AI call slower than its recent p95.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import threading
+import statistics
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--jitter-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rate-limit', type=float, default=0, help='AI calls per second (0 = unlimited)')
+    parser.add_argument('--retries', type=int, default=3, help='attempts per AI call')
+    parser.add_argument('--hedge', action='store_true', help='enable hedged AI requests')
+    parser.add_argument('--cache', action='store_true', help='keep the AI response cache enabled')
+    parser.add_argument('--endpoint', action='append', help='only run the named endpoint(s)')
+    parser.add_argument('--verbose', action='store_true', help="show the endpoints' own log output")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ['AI_BACKEND'] = 'local'
+os.environ['AI_LOCAL_LATENCY_MS'] = str(args.latency_ms)
+os.environ['AI_LOCAL_JITTER_MS'] = str(args.jitter_ms)
+os.environ['AI_LOCAL_ERROR_RATE'] = str(args.error_rate)
+os.environ['AI_LOCAL_MALFORMED_RATE'] = str(args.malformed_rate)
+os.environ['AI_LOCAL_SEED'] = str(args.seed)
+os.environ['AI_RATE_LIMIT_RPS'] = str(args.rate_limit)
+os.environ['AI_RETRY_MAX_ATTEMPTS'] = str(args.retries)
+os.environ['AI_HEDGE_ENABLED'] = 'true' if args.hedge else 'false'
+if not args.cache:
+    os.environ['AI_CACHE_ENABLED'] = 'false'
+
+from flask import Flask
+from app.models.models import db, Patient, InsuranceProvider
+from app.services.dashboard_rollups import register_rollup_hooks
+
+PATIENTS = 50
+
+
+def claim_payload(i):
+    # Over the high-amount threshold so the rules engine hands the claim to AI review
+    return {'patient_id': f'P{i % PATIENTS:03d}', 'patient_name': f'Patient {i}', 'provider': 'Dr. Stand-in',
+            'facility': 'Bench Clinic', 'service_date': '2024-03-01', 'claim_amount': 12000 + i,
+            'insurance_provider': 'daman', 'diagnosis_codes': ['E11.9'], 'procedure_codes': ['99214']}
+
+
+ENDPOINTS = [
+    ('eligibility-check', '/eligibility/check',
+     lambda i: {'patient_id': f'P{i % PATIENTS:03d}', 'service_type': ['general_consultation', 'surgery'][i % 2]}),
+    ('prior-auth-submit', '/prior-auth/submit',
+     lambda i: {'patient_id': f'P{i % PATIENTS:03d}', 'patient_name': f'Patient {i}', 'procedure': 'MRI Brain',
+                'diagnosis': 'G43.909', 'clinical_justification': f'Persistent migraine, visit {i}',
+                'payer': 'daman', 'urgency': 'routine'}),
+    ('claims-submit', '/claims/submit', claim_payload),
+    ('claims-batch-submit', '/claims/batch-submit',
+     lambda i: {'claims': [claim_payload(i * 10 + n) for n in range(10)]}),
+    ('clinical-docs-ai-assistance', '/clinical-docs/ai-assistance',
+     lambda i: {'patient_info': {'name': f'Patient {i}', 'age': 30 + i % 40, 'chief_complaint': 'Chest pain'},
+                'template': 'progress_note', 'clinical_notes': f'Follow-up visit {i}'}),
+    ('clinical-docs-validate', '/clinical-docs/validate',
+     lambda i: {'template_id': 'progress_note', 'content': {'subjective': f'Visit {i}', 'assessment': 'Stable'}}),
+    ('medical-coding-ai-suggest', '/medical-coding/ai-suggest',
+     lambda i: {'chief_complaint': 'Type 2 diabetes follow-up', 'clinical_notes': f'HbA1c review {i}',
+                'procedures_performed': ['office visit']}),
+    ('remittance-denial-prediction', '/remittance/denial-prediction',
+     lambda i: {'claim_data': {'patient_name': f'Patient {i}', 'diagnosis': 'E11.9', 'procedure': '99214',
+                               'amount': 150 + i, 'payer': 'daman', 'prior_auth': 'approved'}}),
+]
+
+
+def create_bench_app(db_path):
+    from app.routes.eligibility import eligibility_bp
+    from app.routes.prior_auth import prior_auth_bp
+    from app.routes.claims import claims_bp
+    from app.routes.clinical_docs import clinical_docs_bp
+    from app.routes.medical_coding import medical_coding_bp
+    from app.routes.remittance import remittance_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    register_rollup_hooks()
+
+    app.register_blueprint(eligibility_bp, url_prefix='/eligibility')
+    app.register_blueprint(prior_auth_bp, url_prefix='/prior-auth')
+    app.register_blueprint(claims_bp, url_prefix='/claims')
+    app.register_blueprint(clinical_docs_bp, url_prefix='/clinical-docs')
+    app.register_blueprint(medical_coding_bp, url_prefix='/medical-coding')
+    app.register_blueprint(remittance_bp, url_prefix='/remittance')
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(InsuranceProvider(code='daman', name='Daman Health Insurance', country='UAE'))
+        db.session.add_all([
+            Patient(patient_id=f'P{i:03d}', first_name='Bench', last_name=str(i), dob=date(1980, 1, 1),
+                    insurance_provider='daman', policy_status='active',
+                    coverage_details={'copay': 25 + i, 'deductible': 500, 'coverage_percentage': 80})
+            for i in range(PATIENTS)
+        ])
+        db.session.commit()
+    return app
+
+
+def run_endpoint(app, path, payload, requests, concurrency):
+    local = threading.local()
+    timings = [0.0] * requests
+    statuses = [0] * requests
+
+    def call(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        started = time.perf_counter()
+        response = client.post(path, json=payload(i))
+        timings[i] = (time.perf_counter() - started) * 1000
+        statuses[i] = response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p95': timings[max(0, int(len(timings) * 0.95) - 1)],
+        'p99': timings[max(0, int(len(timings) * 0.99) - 1)],
+        'rps': requests / elapsed,
+        'failed': sum(1 for status in statuses if status >= 300)
+    }
+
+
+def main():
+    endpoints = [endpoint for endpoint in ENDPOINTS if not args.endpoint or endpoint[0] in args.endpoint]
+    workdir = tempfile.mkdtemp(prefix='bench-ai-')
+    app = create_bench_app(os.path.join(workdir, 'bench.db'))
+
+    print(f"stand-in latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, error rate {args.error_rate}, "
+          f"malformed rate {args.malformed_rate}; {args.requests} requests at concurrency {args.concurrency}")
+    print(f"{'endpoint':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'non-2xx':>8}")
+    for name, path, payload in endpoints:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, 'w')):
+            stats = run_endpoint(app, path, payload, args.requests, args.concurrency)
+        print(f"{name:<30} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f} "
+              f"{stats['rps']:>8.1f} {stats['failed']:>8}")
+
+
+if __name__ == '__main__':
+    main()
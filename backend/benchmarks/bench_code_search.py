@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /medical-coding/search-codes: the original linear substring scan
+against the indexed engine in app/services/code_search.py, plus the memory held
+by each: the legacy per-process dicts versus the memory-mapped code sets of
+app/services/code_sets.py (file size is shared page cache across workers).
+
+Usage:
+    python benchmarks/bench_code_search.py [--icd10 72000] [--cpt 10000] [--repeat 200]
+    python benchmarks/bench_code_search.py --icd10-file icd10cm_codes_2024.txt --cpt-file cpt.csv
+
+Without files, synthetic code sets of the official sizes are generated from a
+clinical vocabulary so descriptions have realistic term frequencies.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.code_search import CodeSearchEngine
+from app.services.code_sets import CodeSet, load_code_file, write_code_set
+
+COMMON_TERMS = ['unspecified', 'other', 'without', 'with', 'of', 'and', 'left', 'right', 'bilateral',
+                'initial', 'encounter', 'subsequent', 'sequela', 'acute', 'chronic', 'disorder', 'disease']
+CLINICAL_TERMS = ['diabetes', 'mellitus', 'hypertension', 'fracture', 'femur', 'tibia', 'humerus', 'migraine',
+                  'pneumonia', 'asthma', 'bronchitis', 'infection', 'urinary', 'tract', 'kidney', 'renal',
+                  'neoplasm', 'malignant', 'benign', 'colon', 'breast', 'lung', 'depressive', 'anxiety',
+                  'reflux', 'esophagitis', 'gastric', 'ulcer', 'hemorrhage', 'arthritis', 'rheumatoid',
+                  'osteoarthritis', 'knee', 'hip', 'shoulder', 'sprain', 'strain', 'ligament', 'laceration',
+                  'contusion', 'burn', 'poisoning', 'pregnancy', 'delivery', 'newborn', 'anemia', 'sepsis',
+                  'cardiomyopathy', 'infarction', 'myocardial', 'atrial', 'fibrillation', 'stroke', 'cerebral',
+                  'glaucoma', 'cataract', 'retinopathy', 'otitis', 'media', 'sinusitis', 'dermatitis', 'psoriasis']
+CPT_TERMS = ['office', 'outpatient', 'visit', 'established', 'new', 'patient', 'level', 'radiologic',
+             'examination', 'views', 'magnetic', 'resonance', 'imaging', 'contrast', 'injection', 'repair',
+             'excision', 'biopsy', 'arthroscopy', 'anesthesia', 'panel', 'assay', 'blood', 'count', 'culture',
+             'therapy', 'evaluation', 'management', 'consultation', 'screening', 'mammography', 'ultrasound']
+CATEGORIES = ['Endocrine', 'Cardiovascular', 'Respiratory', 'Musculoskeletal', 'Injury', 'Neoplasms',
+              'Mental Health', 'Digestive', 'Genitourinary', 'Pregnancy', 'Nervous System', 'Eye', 'Skin']
+
+QUERIES = ['E11', 'e11.9', 'S72.0', 'I4', 'diab', 'diabetes mellitus', 'fracture femur left', 'hypertenson',
+           'chronic kidney', 'malignant neoplasm colon', 'migra', 'acute myocardial infarction initial',
+           '992', 'office visit established', 'mri brain', 'blood count', 'mamography', 'knee arthroscopy',
+           'unspecified', 'pneumonia']
+
+
+def synthetic_codes(count, code_type, rng):
+    records = []
+    seen = set()
+    while len(records) < count:
+        if code_type == 'icd10':
+            code = f"{rng.choice('ABCDEFGHIJKLMNOPQRSTZ')}{rng.randint(0, 99):02d}"
+            code += '.' + ''.join(rng.choice('0123456789X') for _ in range(rng.randint(1, 4)))
+            words = rng.sample(CLINICAL_TERMS, rng.randint(2, 4)) + rng.sample(COMMON_TERMS, rng.randint(1, 4))
+        else:
+            code = f'{rng.randint(10000, 99999)}'
+            words = rng.sample(CPT_TERMS, rng.randint(3, 6)) + rng.sample(CLINICAL_TERMS, rng.randint(0, 2))
+        if code in seen:
+            continue
+        seen.add(code)
+        rng.shuffle(words)
+        records.append({'code': code, 'description': ' '.join(words).capitalize(),
+                        'category': rng.choice(CATEGORIES)})
+    return records
+
+
+def legacy_search(icd10_codes, cpt_codes, query):
+    """The original search_codes loop"""
+    query = query.lower()
+    results = {'icd10': [], 'cpt': []}
+    for name, codes in (('icd10', icd10_codes), ('cpt', cpt_codes)):
+        for code, details in codes.items():
+            if (query in code.lower() or
+                query in details['description'].lower() or
+                query in details['category'].lower()):
+                results[name].append(details)
+    return results
+
+
+def time_queries(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p99': timings[int(len(timings) * 0.99) - 1],
+        'max': timings[-1]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--icd10', type=int, default=72000)
+    parser.add_argument('--cpt', type=int, default=10000)
+    parser.add_argument('--icd10-file')
+    parser.add_argument('--cpt-file')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--legacy-repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    icd10 = load_code_file(args.icd10_file, 'icd10') if args.icd10_file else synthetic_codes(args.icd10, 'icd10', rng)
+    cpt = load_code_file(args.cpt_file, 'cpt') if args.cpt_file else synthetic_codes(args.cpt, 'cpt', rng)
+
+    workdir = tempfile.mkdtemp(prefix='codesets-')
+    icd10_path = os.path.join(workdir, 'icd10.codeset')
+    cpt_path = os.path.join(workdir, 'cpt.codeset')
+    started = time.perf_counter()
+    write_code_set(icd10, 'icd10', icd10_path)
+    write_code_set(cpt, 'cpt', cpt_path)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    engine = CodeSearchEngine(CodeSet.open(icd10_path), CodeSet.open(cpt_path))
+    open_ms = (time.perf_counter() - started) * 1000
+    for query in QUERIES:
+        engine.search(query, 'both', 20)
+    mapped_heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    icd10_by_code = {record['code']: dict(record) for record in icd10}
+    cpt_by_code = {record['code']: dict(record) for record in cpt}
+    legacy_heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    file_mb = (os.path.getsize(icd10_path) + os.path.getsize(cpt_path)) / 1024 / 1024
+    print(f"{len(icd10)} ICD-10 + {len(cpt)} CPT codes, compiled in {compile_ms:.0f} ms, opened in {open_ms:.1f} ms")
+    print(f"legacy dicts: {legacy_heap / 1024 / 1024:.1f} MB heap per worker")
+    print(f"code sets:    {file_mb:.1f} MB mapped (shared), {mapped_heap / 1024 / 1024:.2f} MB heap per worker")
+    legacy = time_queries(lambda q: legacy_search(icd10_by_code, cpt_by_code, q), args.legacy_repeat)
+    indexed = time_queries(lambda q: engine.search(q, 'both', 20), args.repeat)
+
+    print(f"{'':>10} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, stats in (('legacy', legacy), ('indexed', indexed)):
+        print(f"{name:>10} {stats['p50']:>10.3f} {stats['p99']:>10.3f} {stats['max']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
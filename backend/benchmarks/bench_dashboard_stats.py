@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /dashboard/stats: the original one-query-per-status implementation
+against the conditional-aggregation engine in app/services/dashboard_stats.py.
+
+Usage:
+    python benchmarks/bench_dashboard_stats.py [--rows 10000 100000 1000000] [--repeat 5]
+
+Each size is loaded into a fresh SQLite database under a temporary directory
+(or DATABASE_URL if --database-url is given) with roughly that many rows in
+each of the claim, prior authorization and eligibility check tables.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func, insert
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck
+from app.services.dashboard_stats import compute_dashboard_stats
+
+PROVIDERS = ['daman', 'tawuniya', 'oman_insurance', 'gulf_insurance', 'qic', 'bupa_arabia']
+CLAIM_STATUSES = ['submitted', 'processing', 'approved', 'denied', 'paid', 'pending']
+AUTH_STATUSES = ['pending', 'approved', 'denied', 'expired']
+ELIGIBILITY_STATUSES = ['eligible', 'not_eligible', 'pending']
+INSERT_CHUNK = 20000
+
+
+def legacy_dashboard_stats():
+    """The original get_dashboard_stats query pattern: one round-trip per figure"""
+    total_patients = Patient.query.count()
+    total_claims = Claim.query.count()
+    total_prior_auths = PriorAuthorization.query.count()
+    total_eligibility_checks = EligibilityCheck.query.count()
+
+    pending_claims = Claim.query.filter_by(status='pending').count()
+    approved_claims = Claim.query.filter_by(status='approved').count()
+    denied_claims = Claim.query.filter_by(status='denied').count()
+    submitted_claims = Claim.query.filter_by(status='submitted').count()
+
+    total_claim_amount = db.session.query(func.sum(Claim.amount)).scalar() or 0
+    approved_amount = db.session.query(func.sum(Claim.amount)).filter(Claim.status == 'approved').scalar() or 0
+
+    pending_auths = PriorAuthorization.query.filter_by(status='pending').count()
+    approved_auths = PriorAuthorization.query.filter_by(status='approved').count()
+    denied_auths = PriorAuthorization.query.filter_by(status='denied').count()
+    expired_auths = PriorAuthorization.query.filter_by(status='expired').count()
+
+    eligible_checks = EligibilityCheck.query.filter_by(status='eligible').count()
+    not_eligible_checks = EligibilityCheck.query.filter_by(status='not_eligible').count()
+    pending_eligibility = EligibilityCheck.query.filter_by(status='pending').count()
+
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    recent_claims = Claim.query.filter(Claim.submitted_date >= thirty_days_ago).count()
+    recent_eligibility = EligibilityCheck.query.filter(EligibilityCheck.check_date >= thirty_days_ago).count()
+    recent_prior_auths = PriorAuthorization.query.filter(PriorAuthorization.submitted_date >= thirty_days_ago).count()
+
+    provider_stats = db.session.query(
+        Patient.insurance_provider,
+        func.count(Patient.id).label('patient_count')
+    ).group_by(Patient.insurance_provider).all()
+
+    return {
+        'totals': (total_patients, total_claims, total_prior_auths, total_eligibility_checks),
+        'claims': (pending_claims, approved_claims, denied_claims, submitted_claims,
+                   round(total_claim_amount, 2), round(approved_amount, 2)),
+        'auths': (pending_auths, approved_auths, denied_auths, expired_auths),
+        'eligibility': (eligible_checks, not_eligible_checks, pending_eligibility),
+        'recent': (recent_claims, recent_eligibility, recent_prior_auths),
+        'providers': sorted((p or '', c) for p, c in provider_stats)
+    }
+
+
+def as_comparable(stats):
+    """Reduce a compute_dashboard_stats payload to the legacy tuple layout"""
+    return {
+        'totals': (stats['overview']['total_patients'], stats['claims']['total'],
+                   stats['prior_authorizations']['total'], stats['eligibility']['total']),
+        'claims': tuple(stats['claims'][k] for k in ('pending', 'approved', 'denied', 'submitted',
+                                                     'total_amount', 'approved_amount')),
+        'auths': tuple(stats['prior_authorizations'][k] for k in ('pending', 'approved', 'denied', 'expired')),
+        'eligibility': tuple(stats['eligibility'][k] for k in ('eligible', 'not_eligible', 'pending')),
+        'recent': tuple(stats['recent_activity'][k] for k in ('claims_last_30_days',
+                                                               'eligibility_checks_last_30_days',
+                                                               'prior_auths_last_30_days')),
+        'providers': sorted((p['name'] or '', p['patient_count']) for p in stats['insurance_providers'])
+    }
+
+
+def create_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def load_rows(rows, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    num_patients = max(10, rows // 20)
+
+    def random_date():
+        return now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86400))
+
+    db.session.execute(insert(Patient), [{
+        'patient_id': f'P{i:07d}',
+        'first_name': 'Bench',
+        'last_name': f'Patient{i}',
+        'dob': datetime(1980, 1, 1).date(),
+        'insurance_provider': rng.choice(PROVIDERS),
+        'policy_status': 'active'
+    } for i in range(1, num_patients + 1)])
+
+    for start in range(0, rows, INSERT_CHUNK):
+        size = min(INSERT_CHUNK, rows - start)
+        db.session.execute(insert(Claim), [{
+            'patient_id': rng.randint(1, num_patients),
+            'status': rng.choice(CLAIM_STATUSES),
+            'amount': round(rng.uniform(100, 20000), 2),
+            'submitted_date': random_date()
+        } for _ in range(size)])
+        db.session.execute(insert(PriorAuthorization), [{
+            'patient_id': rng.randint(1, num_patients),
+            'service_type': 'surgery',
+            'status': rng.choice(AUTH_STATUSES),
+            'submitted_date': random_date()
+        } for _ in range(size)])
+        db.session.execute(insert(EligibilityCheck), [{
+            'patient_id': rng.randint(1, num_patients),
+            'service_type': 'general_consultation',
+            'status': rng.choice(ELIGIBILITY_STATUSES),
+            'check_date': random_date()
+        } for _ in range(size)])
+    db.session.commit()
+
+
+def time_it(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', help='Benchmark against an existing empty database instead of SQLite')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy ms':>12} {'engine ms':>12} {'serial ms':>12} {'speedup':>9}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            app = create_app(url)
+            with app.app_context():
+                db.drop_all()
+                db.create_all()
+                load_rows(rows)
+
+                legacy, legacy_ms = time_it(legacy_dashboard_stats, args.repeat)
+                engine_result, engine_ms = time_it(compute_dashboard_stats, args.repeat)
+                _, serial_ms = time_it(lambda: compute_dashboard_stats(concurrent=False), args.repeat)
+
+                if as_comparable(engine_result) != legacy:
+                    print(f"WARNING: results differ at {rows} rows")
+
+                legacy_median = statistics.median(legacy_ms)
+                engine_median = statistics.median(engine_ms)
+                print(f"{rows:>10} {legacy_median:>12.1f} {engine_median:>12.1f} "
+                      f"{statistics.median(serial_ms):>12.1f} {legacy_median / engine_median:>8.1f}x")
+
+                db.session.remove()
+                db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark for JSON serialization of the /claims/list and
+/dashboard/recent-activity payloads: the original path (ORM objects, to_dict()
+and Flask's stdlib JSON provider) against app/services/serializers.py
+(column rows, compiled serializers and the orjson backend, if installed).
+
+Usage:
+    python benchmarks/bench_serialization.py [--claims 50 200] [--repeat 50] [--backend json]
+
+Building the payload (query and dicts) is timed separately from encoding it.
+JSON columns are decoded by --backend on both paths, so the build columns
+compare ORM objects with column rows; run with --backend json to see the
+stdlib throughout.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck, ClaimSubmission
+from app.services.serializers import (ACTIVITY_SERIALIZERS, StdlibJSON, engine_json_options, json_backend,
+                                      serializer_for)
+
+CLAIM_STATUSES = ['submitted', 'processing', 'approved', 'denied', 'paid']
+DIAGNOSIS_CODES = ['J06.9', 'E11.9', 'I10', 'M54.5', 'K21.9', 'N39.0']
+PROCEDURE_CODES = ['99213', '99214', '71046', '80053', '85025']
+
+
+def create_app(database_url, backend):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_json_options(backend)
+    db.init_app(app)
+    return app
+
+
+def load_rows(claims, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    db.session.execute(insert(Patient), [{
+        'patient_id': f'P{i:05d}', 'first_name': 'Bench', 'last_name': f'Patient{i}',
+        'dob': date(1980, 1, 1), 'insurance_provider': 'daman', 'policy_status': 'active'
+    } for i in range(1, 101)])
+    db.session.execute(insert(ClaimSubmission), [{
+        'id': f'CLM{i:07d}',
+        'patient_id': f'P{rng.randint(1, 100):05d}',
+        'patient_name': f'Bench Patient{i}',
+        'provider': 'Dr. Bench',
+        'facility': 'Bench Hospital',
+        'service_date': (now - timedelta(days=rng.randint(1, 365))).date(),
+        'submission_date': (now - timedelta(days=rng.randint(0, 365))).date(),
+        'claim_amount': round(rng.uniform(100, 20000), 2),
+        'status': rng.choice(CLAIM_STATUSES),
+        'insurance_provider': 'daman',
+        'diagnosis_codes': rng.sample(DIAGNOSIS_CODES, 2),
+        'procedure_codes': rng.sample(PROCEDURE_CODES, 2),
+        'ai_scrubbing': {'risk_score': rng.random(), 'issues': [], 'recommendations': ['Verify coding']}
+    } for i in range(claims)])
+    for model, date_key, extra in ((Claim, 'submitted_date', {'amount': 500.0}),
+                                   (EligibilityCheck, 'check_date', {'service_type': 'dental'}),
+                                   (PriorAuthorization, 'submitted_date', {'service_type': 'surgery'})):
+        db.session.execute(insert(model), [dict(extra, patient_id=rng.randint(1, 100), status='pending',
+                                                **{date_key: now - timedelta(minutes=i)}) for i in range(50)])
+    db.session.commit()
+
+
+def legacy_claims(limit):
+    rows = ClaimSubmission.query.order_by(ClaimSubmission.submission_date.desc(),
+                                          ClaimSubmission.id.desc()).limit(limit).all()
+    return [row.to_dict() for row in rows]
+
+
+def compiled_claims(limit):
+    serializer = serializer_for(ClaimSubmission)
+    rows = db.session.query(*serializer.columns).order_by(ClaimSubmission.submission_date.desc(),
+                                                          ClaimSubmission.id.desc()).limit(limit).all()
+    return serializer.many(rows)
+
+
+def legacy_activity():
+    activities = []
+    for claim in Claim.query.order_by(Claim.submitted_date.desc()).limit(10).all():
+        activities.append({'type': 'claim', 'id': claim.id, 'patient_id': claim.patient_id, 'status': claim.status,
+                           'amount': claim.amount,
+                           'date': claim.submitted_date.isoformat() if claim.submitted_date else None,
+                           'description': f'Claim ${claim.amount} - {claim.status}'})
+    for check in EligibilityCheck.query.order_by(EligibilityCheck.check_date.desc()).limit(10).all():
+        activities.append({'type': 'eligibility', 'id': check.id, 'patient_id': check.patient_id,
+                           'status': check.status, 'service_type': check.service_type,
+                           'date': check.check_date.isoformat() if check.check_date else None,
+                           'description': f'Eligibility check for {check.service_type} - {check.status}'})
+    for auth in PriorAuthorization.query.order_by(PriorAuthorization.submitted_date.desc()).limit(10).all():
+        activities.append({'type': 'prior_auth', 'id': auth.id, 'patient_id': auth.patient_id,
+                           'status': auth.status, 'service_type': auth.service_type,
+                           'date': auth.submitted_date.isoformat() if auth.submitted_date else None,
+                           'description': f'Prior auth for {auth.service_type} - {auth.status}'})
+    activities.sort(key=lambda x: x['date'] or '', reverse=True)
+    return activities[:20]
+
+
+def compiled_activity():
+    activities = []
+    for model, date_column in ((Claim, Claim.submitted_date), (EligibilityCheck, EligibilityCheck.check_date),
+                               (PriorAuthorization, PriorAuthorization.submitted_date)):
+        serializer = ACTIVITY_SERIALIZERS[model]
+        rows = db.session.query(*serializer.columns).order_by(date_column.desc()).limit(10).all()
+        activities.extend(serializer.many(rows))
+    activities.sort(key=lambda x: x['date'] or '', reverse=True)
+    return activities[:20]
+
+
+def legacy_encode(payload):
+    """What jsonify did: sorted keys, compact separators, str then bytes"""
+    return (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def time_it(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+def report(name, legacy_build, compiled_build, encode, repeat):
+    legacy_payload, legacy_build_ms = time_it(legacy_build, repeat)
+    compiled_payload, compiled_build_ms = time_it(compiled_build, repeat)
+    if compiled_payload != legacy_payload:
+        print(f"WARNING: {name} payloads differ")
+
+    _, legacy_encode_ms = time_it(lambda: legacy_encode({'items': legacy_payload}), repeat)
+    _, fast_encode_ms = time_it(lambda: encode({'items': compiled_payload}) + b'\n', repeat)
+    legacy_total = legacy_build_ms + legacy_encode_ms
+    fast_total = compiled_build_ms + fast_encode_ms
+    print(f"{name:>22} {legacy_build_ms:>10.2f} {compiled_build_ms:>10.2f} {legacy_encode_ms:>10.2f} "
+          f"{fast_encode_ms:>10.2f} {legacy_total:>10.2f} {fast_total:>10.2f} {legacy_total / fast_total:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--claims', type=int, nargs='+', default=[50, 200],
+                        help='Page sizes for /claims/list (the API caps pages at 200)')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--backend', default='auto', help="JSON backend for the new path: auto, orjson or json")
+    args = parser.parse_args()
+
+    backend = json_backend(args.backend)
+    encode = backend.dumps
+    print(f"JSON backend: {backend.name}; legacy path: stdlib json ({StdlibJSON.name})")
+    print(f"{'payload':>22} {'build old':>10} {'build new':>10} {'enc old':>10} {'enc new':>10} "
+          f"{'total old':>10} {'total new':>10} {'speedup':>8}   (ms, median)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}", backend)
+        with app.app_context():
+            db.create_all()
+            load_rows(max(args.claims))
+            for limit in args.claims:
+                report(f'/claims/list {limit}', lambda: legacy_claims(limit), lambda: compiled_claims(limit),
+                       encode, args.repeat)
+            report('/recent-activity', legacy_activity, compiled_activity, encode, args.repeat)
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
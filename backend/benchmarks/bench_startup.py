@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time for a fresh interpreter to import the app package,
+build the app with create_app() and answer its first request.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+
+Each run is a separate Python process, so nothing is shared through module
+caches. Also reports whether the heavy optional imports (the Gemini SDK,
+pandas, numpy) were pulled in before the first request; they should only
+load when a request actually needs them.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, sys, time, tempfile, os
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+workdir = tempfile.mkdtemp(prefix='bench-startup-')
+app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'startup.db'),
+                  'JOBS_DB_PATH': os.path.join(workdir, 'jobs.db')})
+created = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'total_ms': (served - started) * 1000,
+    'loaded': {name: name in sys.modules for name in ('google.genai', 'pandas', 'numpy')}
+}))
+'''
+
+
+def run_probe():
+    started_env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=started_env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    # Warm the OS file cache and bytecode so runs measure startup work, not disk reads
+    run_probe()
+    results = [run_probe() for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts")
+    print(f"{'':>18} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms'):
+        values = [result[key] for result in results]
+        print(f"{key:>18} {statistics.median(values):>10.1f} {min(values):>10.1f} {max(values):>10.1f}")
+    print("loaded before first request: " +
+          ', '.join(f"{name}={loaded}" for name, loaded in results[-1]['loaded'].items()))
+
+
+if __name__ == '__main__':
+    main()
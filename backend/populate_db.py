@@ -31,9 +31,13 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
 # Import and initialize database
-from app.models.models import db, Patient, InsuranceProvider, EligibilityCheck, PriorAuthorization, Claim
+from app.models.models import (db, Patient, InsuranceProvider, EligibilityCheck, PriorAuthorization, Claim,
+                               ClaimSubmission, PriorAuthRequest, CodingSession, ClinicalDocument,
+                               RemittancePayment, parse_date)
 db.init_app(app)
 
+from app.services.dashboard_rollups import rebuild_rollups
+
 # Initialize Faker with Arabic locale for GCC region
 fake = Faker(['ar_SA', 'en_US'])
 
@@ -76,6 +80,229 @@ SERVICE_TYPES = [
     'maternity', 'pediatric', 'cardiology', 'orthopedic', 'dermatology'
 ]
 
+# Sample workflow records used by the claims, prior-auth, medical-coding and clinical-docs blueprints
+SAMPLE_CLAIMS = [
+    {
+        'id': 'CLM001',
+        'patient_id': 'P001',
+        'patient_name': 'Ahmed Al-Rashid',
+        'provider': 'Dr. Sarah Ahmed',
+        'facility': 'Dubai Medical Center',
+        'service_date': '2024-01-15',
+        'submission_date': '2024-01-16',
+        'claim_amount': 2500.00,
+        'allowed_amount': 2000.00,
+        'paid_amount': 1600.00,
+        'patient_responsibility': 400.00,
+        'status': 'paid',
+        'insurance_provider': 'Daman Health Insurance',
+        'diagnosis_codes': ['Z00.00', 'M79.3'],
+        'procedure_codes': ['99213', '73060'],
+        'ai_scrubbing': {
+            'errors_found': 0,
+            'warnings': 1,
+            'confidence_score': 0.94,
+            'issues': ['Minor: Service date close to weekend']
+        },
+        'denial_reason': None,
+        'payment_date': '2024-01-25'
+    },
+    {
+        'id': 'CLM002',
+        'patient_id': 'P002',
+        'patient_name': 'Fatima Al-Zahra',
+        'provider': 'Dr. Omar Hassan',
+        'facility': 'Riyadh Neurology Clinic',
+        'service_date': '2024-01-18',
+        'submission_date': '2024-01-19',
+        'claim_amount': 1800.00,
+        'allowed_amount': 1500.00,
+        'paid_amount': 0.00,
+        'patient_responsibility': 0.00,
+        'status': 'denied',
+        'insurance_provider': 'Tawuniya Insurance',
+        'diagnosis_codes': ['G43.909'],
+        'procedure_codes': ['70553'],
+        'ai_scrubbing': {
+            'errors_found': 2,
+            'warnings': 0,
+            'confidence_score': 0.67,
+            'issues': ['Error: Missing prior authorization', 'Error: Diagnosis code mismatch']
+        },
+        'denial_reason': 'Prior authorization required',
+        'payment_date': None
+    },
+    {
+        'id': 'CLM003',
+        'patient_id': 'P001',
+        'patient_name': 'Ahmed Al-Rashid',
+        'provider': 'Dr. Layla Mansour',
+        'facility': 'Kuwait Diagnostic Center',
+        'service_date': '2024-01-20',
+        'submission_date': '2024-01-21',
+        'claim_amount': 850.00,
+        'allowed_amount': 850.00,
+        'paid_amount': 0.00,
+        'patient_responsibility': 85.0,
+        'status': 'processing',
+        'insurance_provider': 'Gulf Insurance Group',
+        'diagnosis_codes': ['Z12.11'],
+        'procedure_codes': ['76092'],
+        'ai_scrubbing': {
+            'errors_found': 0,
+            'warnings': 0,
+            'confidence_score': 0.98,
+            'issues': []
+        },
+        'denial_reason': None,
+        'payment_date': None
+    }
+]
+
+SAMPLE_PRIOR_AUTHS = [
+    {
+        'id': 'PA001',
+        'patient_id': 'P001',
+        'patient_name': 'Ahmed Al-Rashid',
+        'procedure_code': 'CPT-29881',
+        'procedure_name': 'Arthroscopy, knee, surgical',
+        'diagnosis': 'M23.91 - Other internal derangement of knee',
+        'provider': 'Dr. Sarah Ahmed',
+        'facility': 'Dubai Medical Center',
+        'status': 'approved',
+        'submitted_date': '2024-01-10',
+        'decision_date': '2024-01-12',
+        'estimated_cost': 15000,
+        'ai_analysis': {
+            'approval_likelihood': 92,
+            'risk_factors': ['Previous knee injury'],
+            'recommendations': ['Include MRI results', 'Physical therapy history required']
+        },
+        'documents': ['medical_history.pdf', 'mri_scan.pdf']
+    },
+    {
+        'id': 'PA002',
+        'patient_id': 'P002',
+        'patient_name': 'Fatima Al-Zahra',
+        'procedure_code': 'CPT-70553',
+        'procedure_name': 'MRI brain with contrast',
+        'diagnosis': 'G43.909 - Migraine, unspecified',
+        'provider': 'Dr. Omar Hassan',
+        'facility': 'Riyadh Neurology Clinic',
+        'status': 'pending',
+        'submitted_date': '2024-01-15',
+        'decision_date': None,
+        'estimated_cost': 2500,
+        'ai_analysis': {
+            'approval_likelihood': 78,
+            'risk_factors': ['Chronic migraines', 'Previous normal CT'],
+            'recommendations': ['Include headache diary', 'Failed conservative treatment documentation']
+        },
+        'documents': ['referral_letter.pdf']
+    }
+]
+
+SAMPLE_CODING_SESSIONS = [
+    {
+        'id': 'CS001',
+        'patient_id': 'P001',
+        'patient_name': 'Ahmed Al-Rashid',
+        'encounter_date': '2024-01-15',
+        'provider': 'Dr. Sarah Ahmed',
+        'chief_complaint': 'Chest pain',
+        'diagnosis_codes': ['I25.10', 'Z87.891'],
+        'procedure_codes': ['99214', '93000'],
+        'status': 'completed',
+        'ai_confidence': 0.94,
+        'created_date': '2024-01-15',
+        'last_modified': '2024-01-15'
+    },
+    {
+        'id': 'CS002',
+        'patient_id': 'P002',
+        'patient_name': 'Fatima Al-Zahra',
+        'encounter_date': '2024-01-18',
+        'provider': 'Dr. Omar Hassan',
+        'chief_complaint': 'Headache',
+        'diagnosis_codes': ['G43.909'],
+        'procedure_codes': ['99213'],
+        'status': 'draft',
+        'ai_confidence': 0.87,
+        'created_date': '2024-01-18',
+        'last_modified': '2024-01-19'
+    }
+]
+
+SAMPLE_CLINICAL_DOCUMENTS = [
+    {
+        'id': 'DOC001',
+        'template_id': 'progress_note',
+        'patient_id': 'P001',
+        'patient_name': 'Ahmed Al-Rashid',
+        'provider': 'Dr. Sarah Ahmed',
+        'date_created': '2024-01-15',
+        'last_modified': '2024-01-15',
+        'status': 'completed',
+        'content': {
+            'subjective': 'Patient presents with chest pain, 7/10 severity, radiating to left arm. Started 2 hours ago.',
+            'objective': 'BP: 140/90, HR: 88, RR: 18, Temp: 98.6°F. Alert and oriented. Chest clear to auscultation.',
+            'assessment': 'Chest pain, rule out acute coronary syndrome. Consider musculoskeletal etiology.',
+            'plan': 'EKG, cardiac enzymes, chest X-ray. Monitor vitals. Cardiology consult if indicated.'
+        },
+        'ai_confidence': 0.92,
+        'compliance_score': 0.95
+    },
+    {
+        'id': 'DOC002',
+        'template_id': 'discharge_summary',
+        'patient_id': 'P002',
+        'patient_name': 'Fatima Al-Zahra',
+        'provider': 'Dr. Omar Hassan',
+        'date_created': '2024-01-18',
+        'last_modified': '2024-01-19',
+        'status': 'draft',
+        'content': {
+            'admission_diagnosis': 'Acute appendicitis',
+            'discharge_diagnosis': 'Status post laparoscopic appendectomy',
+            'hospital_course': 'Patient underwent uncomplicated laparoscopic appendectomy. Post-operative course unremarkable.',
+            'discharge_instructions': 'Wound care instructions provided. Return if fever, increased pain, or wound concerns.',
+            'medications': 'Ibuprofen 400mg q6h PRN pain',
+            'follow_up': 'Surgery clinic in 2 weeks'
+        },
+        'ai_confidence': 0.88,
+        'compliance_score': 0.91
+    }
+]
+
+SAMPLE_PAYMENTS = [
+    {
+        'id': 'PAY001',
+        'claim_id': 'CLM001',
+        'patient_name': 'Ahmed Al-Rashid',
+        'payer': 'Saudi Health Insurance',
+        'amount_billed': 1500.00,
+        'amount_paid': 1350.00,
+        'payment_date': '2024-01-15',
+        'status': 'posted',
+        'denial_reason': None,
+        'adjustment_codes': ['CO-45'],
+        'adjustment_amount': 150.00
+    },
+    {
+        'id': 'PAY002',
+        'claim_id': 'CLM002',
+        'patient_name': 'Fatima Al-Zahra',
+        'payer': 'UAE National Insurance',
+        'amount_billed': 800.00,
+        'amount_paid': 0.00,
+        'payment_date': None,
+        'status': 'denied',
+        'denial_reason': 'Prior authorization required',
+        'adjustment_codes': ['CO-197'],
+        'adjustment_amount': 800.00
+    }
+]
+
 def generate_national_id(country):
     """Generate realistic national ID based on country"""
     country_codes = {
@@ -383,6 +610,41 @@ def create_claims():
     db.session.commit()
     print(f"Created {claims_created} claims")
 
+def create_workflow_records():
+    """Create the sample claim submissions, prior auth requests, coding sessions, clinical documents and payments"""
+    print("Creating workflow records...")
+    
+    date_fields = {
+        ClaimSubmission: ('service_date', 'submission_date', 'payment_date'),
+        PriorAuthRequest: ('submitted_date', 'decision_date'),
+        CodingSession: ('encounter_date', 'created_date', 'last_modified'),
+        ClinicalDocument: ('date_created', 'last_modified'),
+        RemittancePayment: ('payment_date',)
+    }
+    samples = [
+        (ClaimSubmission, SAMPLE_CLAIMS),
+        (PriorAuthRequest, SAMPLE_PRIOR_AUTHS),
+        (CodingSession, SAMPLE_CODING_SESSIONS),
+        (ClinicalDocument, SAMPLE_CLINICAL_DOCUMENTS),
+        (RemittancePayment, SAMPLE_PAYMENTS)
+    ]
+    
+    records_created = 0
+    for model, records in samples:
+        for record in records:
+            if db.session.get(model, record['id']):
+                continue
+            
+            fields = dict(record)
+            for field in date_fields[model]:
+                fields[field] = parse_date(fields.get(field))
+            
+            db.session.add(model(**fields))
+            records_created += 1
+    
+    db.session.commit()
+    print(f"Created {records_created} workflow records")
+
 def main():
     """Main function to populate the database"""
     print("Starting database population for AI-native RCM Platform...")
@@ -399,6 +661,8 @@ def main():
         create_eligibility_checks()
         create_prior_authorizations()
         create_claims()
+        create_workflow_records()
+        rollup_rows = rebuild_rollups()
         
         print("=" * 60)
         print("Database population completed successfully!")
@@ -408,6 +672,12 @@ def main():
         print(f"- Eligibility Checks: {EligibilityCheck.query.count()}")
         print(f"- Prior Authorizations: {PriorAuthorization.query.count()}")
         print(f"- Claims: {Claim.query.count()}")
+        print(f"- Claim Submissions: {ClaimSubmission.query.count()}")
+        print(f"- Prior Auth Requests: {PriorAuthRequest.query.count()}")
+        print(f"- Coding Sessions: {CodingSession.query.count()}")
+        print(f"- Clinical Documents: {ClinicalDocument.query.count()}")
+        print(f"- Remittance Payments: {RemittancePayment.query.count()}")
+        print(f"- Dashboard Rollups: {rollup_rows}")
 
 if __name__ == "__main__":
     main()
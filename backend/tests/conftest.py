@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Any AI call made under test goes to the offline stand-in, never the network
+os.environ.setdefault('AI_BACKEND', 'local')
+os.environ.setdefault('AI_LOCAL_LATENCY_MS', '0')
+os.environ.setdefault('AI_CACHE_ENABLED', 'false')
+os.environ.setdefault('AI_RATE_LIMIT_RPS', '0')
+# Dashboard snapshots are rebuilt on request instead of by a background thread per test app
+os.environ.setdefault('DASHBOARD_SNAPSHOT_SECONDS', '0')
+
+from app import create_app
+from app.models.models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'JOBS_DB_PATH': str(tmp_path / 'jobs.db'),
+        'TESTING': True
+    })
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from app.services.ai_backends import AIBackendError, LocalStandInBackend
+from app.services.ai_service import GeminiAIService
+
+
+def test_stand_in_is_deterministic():
+    backend = LocalStandInBackend(latency_ms=0)
+    first = backend.generate('model', 'prompt A', {}, task='scrub_claim')
+
+    assert backend.generate('model', 'prompt A', {}, task='scrub_claim') == first
+    assert set(json.loads(first)) >= {'risk_score', 'errors', 'warnings', 'recommendations'}
+
+
+def test_stand_in_answers_batch_prompts_per_item():
+    backend = LocalStandInBackend(latency_ms=0)
+    response = json.loads(backend.generate('model', 'Items\n\nItem 0:\nA\n\nItem 1:\nB', {}, task='predict_claim_denial'))
+    assert [entry['item_index'] for entry in response] == [0, 1]
+
+
+def test_stand_in_failure_rates():
+    failing = LocalStandInBackend(latency_ms=0, error_rate=1.0)
+    with pytest.raises(AIBackendError):
+        failing.generate('model', 'prompt', {}, task='scrub_claim')
+
+    malformed = LocalStandInBackend(latency_ms=0, malformed_rate=1.0)
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(malformed.generate('model', 'prompt', {}, task='scrub_claim'))
+
+
+def test_service_runs_on_stand_in_without_api_key(monkeypatch):
+    monkeypatch.delenv('GOOGLE_API_KEY', raising=False)
+    monkeypatch.setenv('AI_BACKEND', 'local')
+    monkeypatch.setenv('AI_LOCAL_LATENCY_MS', '0')
+    service = GeminiAIService(cache=None)
+
+    assert service.predict_claim_denial({'patient_name': 'A'})['risk_level'] in ('low', 'medium', 'high')
+    assert service.analyze_prior_auth_request({'procedure': 'MRI'})['approval_likelihood'] >= 40
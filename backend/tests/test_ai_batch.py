@@ -0,0 +1,100 @@
+import json
+import re
+
+import pytest
+
+from app.services import ai_service as ai_module
+from app.services.ai_service import ai_service
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Fake model: answers every numbered item unless told otherwise"""
+    calls = []
+    state = {'respond': None}
+
+    def make_request(prompt, system_prompt=None, cache_namespace='default', max_output_tokens=None, deadline=None,
+                     validate=None):
+        count = len(re.findall(r'^Item \d+:$', prompt, re.MULTILINE))
+        calls.append(count)
+        if state['respond'] is not None:
+            return state['respond'](count)
+        return json.dumps([{'item_index': i, 'risk_score': 0.1, 'errors': [], 'warnings': [f'batch {i}']}
+                           for i in range(count)])
+
+    monkeypatch.setattr(ai_service, '_make_request', make_request)
+    monkeypatch.setattr(ai_service, 'scrub_claim', lambda claim: {'errors': [], 'warnings': ['single']})
+    return calls, state
+
+
+def claims(count):
+    return [{'patient_name': f'Patient {i}', 'diagnosis_codes': ['E11.9'], 'claim_amount': i} for i in range(count)]
+
+
+def test_items_are_packed_into_few_calls(model):
+    calls, _ = model
+    results = ai_service.scrub_claims_batch(claims(45))
+
+    assert calls == [20, 20, 5]
+    assert [result['warnings'] for result in results[:2]] == [['batch 0'], ['batch 1']]
+    assert results[44]['warnings'] == ['batch 4']
+    assert all('item_index' not in result for result in results)
+
+
+def test_chunks_respect_input_token_budget(model, monkeypatch):
+    calls, _ = model
+    monkeypatch.setattr(ai_module, 'BATCH_MAX_INPUT_TOKENS', 600)
+    items = [{'patient_name': 'x' * 800} for _ in range(4)]
+
+    ai_service.scrub_claims_batch(items)
+
+    assert calls == [1, 1, 1, 1]
+
+
+def test_missing_items_fall_back_to_single_calls(model):
+    calls, state = model
+    state['respond'] = lambda count: json.dumps([{'item_index': 0, 'warnings': ['batch']}, 'junk'])
+
+    results = ai_service.scrub_claims_batch(claims(3))
+
+    assert [result['warnings'] for result in results] == [['batch'], ['single'], ['single']]
+    assert calls == [3]
+
+
+def test_unparseable_response_is_split_and_retried(model):
+    calls, state = model
+    state['respond'] = lambda count: '[{"item_index": 0, "warn' if count > 2 else json.dumps(
+        [{'warnings': ['ok']} for _ in range(count)])
+
+    results = ai_service.scrub_claims_batch(claims(5))
+
+    assert calls == [5, 2, 3, 1, 2]
+    assert all(result['warnings'] == ['ok'] for result in results)
+
+
+def test_failed_call_falls_back_without_splitting(model):
+    calls, state = model
+    state['respond'] = lambda count: None
+
+    results = ai_service.scrub_claims_batch(claims(4))
+
+    assert calls == [4]
+    assert all(result['warnings'] == ['single'] for result in results)
+
+
+def test_single_and_batch_scrub_describe_claims_alike(monkeypatch):
+    prompts = []
+
+    def make_request(prompt, *args, **kwargs):
+        prompts.append(prompt)
+        return None
+
+    monkeypatch.setattr(ai_service, '_make_request', make_request)
+    claim = {'patient_id': 'P001', 'claim_amount': 15000, 'insurance_provider': 'Daman Health Insurance'}
+    description = ai_module._describe_scrub_claim(claim)
+
+    ai_service.scrub_claim(claim)
+    ai_service.scrub_claims_batch([claim, dict(claim, patient_id='P002')])
+
+    assert 'Amount: 15000' in description and 'Payer: Daman Health Insurance' in description
+    assert description in prompts[0] and description in prompts[1]
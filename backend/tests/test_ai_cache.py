@@ -0,0 +1,94 @@
+from app.services import ai_cache
+from app.services.ai_backends import AIBackend
+from app.services.ai_cache import AIResponseCache, SQLiteCacheTier, make_cache_key
+from app.services.ai_service import GeminiAIService
+from app.services.ai_transport import AITransport, RetryPolicy
+from app.services.circuit_breaker import CircuitBreaker, Hedger
+
+
+class Scripted(AIBackend):
+    """Returns the queued responses in order, counting calls"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def generate(self, model, prompt, generation_config, task='default', timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def service_with(backend, cache):
+    return GeminiAIService(cache=cache, backend=backend,
+                           transport=AITransport(retry_policy=RetryPolicy(max_attempts=1)),
+                           breaker=CircuitBreaker(), hedger=Hedger())
+
+
+def test_hit_and_miss_counts():
+    cache = AIResponseCache()
+    assert cache.get('key', 'scrub_claim') is None
+    cache.set('key', '{"a": 1}', 'scrub_claim')
+    assert cache.get('key', 'scrub_claim') == '{"a": 1}'
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (1, 1, 1)
+    assert stats['by_method']['scrub_claim'] == {'hits': 1, 'misses': 1}
+
+
+def test_entries_expire_after_their_namespace_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ai_cache.time, 'time', lambda: now[0])
+    cache = AIResponseCache(ttls={'generate_insights': 300})
+    cache.set('insights', '[]', 'generate_insights')
+    cache.set('codes', '{}', 'suggest_medical_codes')
+
+    now[0] += 299
+    assert cache.get('insights', 'generate_insights') == '[]'
+    now[0] += 2
+    assert cache.get('insights', 'generate_insights') is None
+    assert cache.get('codes', 'suggest_medical_codes') == '{}'
+
+    cache.set('never', '{}', 'generate_insights', ttl=0)
+    assert cache.get('never', 'generate_insights') is None
+
+
+def test_disk_tier_serves_after_memory_is_gone(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    AIResponseCache(disk_tier=SQLiteCacheTier(path)).set('key', '{}', 'scrub_claim')
+
+    fresh = AIResponseCache(disk_tier=SQLiteCacheTier(path))
+    assert fresh.get('key', 'scrub_claim') == '{}'
+    assert fresh.stats()['disk_hits'] == 1
+
+
+def test_cache_key_normalisation():
+    config = {'temperature': 0.7, 'max_output_tokens': 1024}
+    key = make_cache_key('model', None, 'prompt', config)
+
+    assert make_cache_key('model', '', 'prompt', dict(reversed(list(config.items())))) == key
+    assert make_cache_key('model', None, 'prompt', dict(config, temperature=0.2)) != key
+    assert make_cache_key('other-model', None, 'prompt', config) != key
+    assert make_cache_key('model', 'system', 'prompt', config) != key
+
+
+def test_identical_requests_are_answered_from_cache():
+    backend = Scripted('{"risk_score": 0.2, "errors": [], "warnings": []}')
+    service = service_with(backend, AIResponseCache())
+
+    first = service.scrub_claim({'patient_name': 'A', 'amount': 100})
+    assert service.scrub_claim({'patient_name': 'A', 'amount': 100}) == first
+    assert backend.calls == 1
+
+
+def test_undecodable_responses_are_not_cached():
+    backend = Scripted('Sorry, I cannot help with that.', '{"risk_score": 0.2, "errors": [], "warnings": []}',
+                       '{"unused": true}')
+    cache = AIResponseCache()
+    service = service_with(backend, cache)
+    claim = {'patient_name': 'A', 'amount': 100}
+
+    assert service.scrub_claim(claim)['risk_score'] != 0.2  # the schema's fallback
+    assert cache.stats()['stores'] == 0
+    assert service.scrub_claim(claim)['risk_score'] == 0.2
+    assert service.scrub_claim(claim)['risk_score'] == 0.2
+    assert backend.calls == 2
@@ -0,0 +1,79 @@
+import pytest
+
+from app.services.ai_schemas import (PriorAuthAnalysis, decode_list_response, decode_or_fallback, decode_response,
+                                     extract_json, parse_failures, parse_repairs)
+
+
+@pytest.mark.parametrize('text', [
+    '{"risk_score": 0.4}',
+    '```json\n{"risk_score": 0.4}\n```',
+    'Here is the analysis:\n{"risk_score": 0.4}\nLet me know if you need more.',
+])
+def test_extract_json_tolerates_fences_and_prose(text):
+    assert extract_json(text) == {'risk_score': 0.4}
+
+
+def test_extract_json_rejects_text_without_json():
+    with pytest.raises(ValueError):
+        extract_json('The claim looks fine.')
+
+
+def test_aliases_and_scales_are_normalized():
+    result = decode_response('analyze_prior_auth_request', """{
+        "approval_likelihood_score": 0.72,
+        "potential_approval_barriers": "Missing imaging",
+        "required_documentation_checklist": ["Clinical notes"],
+        "expected_processing_timeline": "3 days",
+        "payer_notes": "kept"
+    }""")
+
+    assert isinstance(result, PriorAuthAnalysis)
+    assert result.approval_likelihood == 72
+    assert result.risk_factors == ['Missing imaging']
+    assert result.required_docs == ['Clinical notes']
+    assert result.timeline == '3 days'
+    assert result.confidence_score == 0.85
+    assert result.to_dict()['payer_notes'] == 'kept'
+
+
+@pytest.mark.parametrize('value, expected', [
+    (0.72, 72), ('72%', 72), (0.5, 50), (1, 1), (1.0, 1), ('1', 1), (40, 40), (85.4, 85), (0, 0),
+])
+def test_only_fractions_below_one_are_scaled_to_percent(value, expected):
+    result = decode_response('analyze_prior_auth_request', f'{{"approval_likelihood": {value!r}}}'.replace("'", '"'))
+    assert result.approval_likelihood == expected
+
+
+def test_nested_code_suggestions_are_typed():
+    result = decode_or_fallback('suggest_medical_codes',
+                                '{"diagnosis_codes": ["I10", {"code": "E11.9", "confidence": "90%"}]}')
+    assert result['diagnosis_codes'] == [
+        {'code': 'I10', 'description': '', 'confidence': 0.8},
+        {'code': 'E11.9', 'description': '', 'confidence': 0.9},
+    ]
+    assert result['procedure_codes'] == []
+
+
+def test_unusable_responses_fall_back_and_are_counted():
+    failures = parse_failures.value('scrub_claim', 'malformed')
+    repairs = parse_repairs.value('scrub_claim')
+
+    assert decode_or_fallback('scrub_claim', 'no json here')['compliance_status'] == 'Compliant'
+    decode_response('scrub_claim', '```\n{"risk_score": 0.3}\n```')
+
+    assert parse_failures.value('scrub_claim', 'malformed') == failures + 1
+    assert parse_repairs.value('scrub_claim') == repairs + 1
+
+
+def test_list_responses_unwrap_the_array_of_an_object():
+    assert decode_list_response('generate_insights', '{"results": [{"insight_id": "A"}]}') == [{'insight_id': 'A'}]
+    assert decode_list_response('generate_insights',
+                                '{"summary": "ok", "tags": ["x"], "insights": [{"insight_id": "A"}]}') == [
+        {'insight_id': 'A'}]
+
+
+def test_list_responses_reject_an_object_without_an_array():
+    failures = parse_failures.value('generate_insights', 'shape')
+
+    assert decode_list_response('generate_insights', '{"insight_id": "A", "tags": ["x"]}') is None
+    assert parse_failures.value('generate_insights', 'shape') == failures + 1
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from app.services.ai_backends import AIBackend, AIBackendError, AITimeoutError, LocalStandInBackend
+from app.services.ai_service import GeminiAIService
+from app.services.ai_transport import AIDeadlineExceeded, AITransport, RetryPolicy, TokenBucket
+
+
+class ScriptedBackend(AIBackend):
+    """Raises the scripted errors in order, then answers"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.timeouts = []
+
+    def generate(self, model, prompt, generation_config, task='default', timeout=None):
+        self.timeouts.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        return '{"ok": true}'
+
+
+def make_transport(max_attempts=3):
+    return AITransport(retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=0.001, max_delay=0.01))
+
+
+def call(transport, backend, deadline=None):
+    return transport.call(lambda timeout: backend.generate('model', 'prompt', {}, timeout=timeout), 'scrub_claim',
+                          deadline)
+
+
+def test_retryable_errors_are_retried_until_success():
+    backend = ScriptedBackend(AIBackendError('busy', status_code=503), AITimeoutError('slow'))
+
+    assert call(make_transport(), backend) == '{"ok": true}'
+    assert len(backend.timeouts) == 3
+
+
+def test_non_retryable_errors_fail_fast():
+    backend = ScriptedBackend(AIBackendError('bad request', status_code=400))
+
+    with pytest.raises(AIBackendError):
+        call(make_transport(), backend)
+    assert len(backend.timeouts) == 1
+
+
+def test_attempts_are_capped():
+    backend = ScriptedBackend(*[AIBackendError('busy', status_code=429) for _ in range(5)])
+
+    with pytest.raises(AIBackendError):
+        call(make_transport(), backend)
+    assert len(backend.timeouts) == 3
+
+
+def test_deadline_bounds_slow_calls():
+    backend = LocalStandInBackend(latency_ms=1000)
+    started = time.monotonic()
+
+    with pytest.raises(AIBackendError) as error:
+        call(make_transport(), backend, deadline=0.05)
+    assert isinstance(error.value, (AITimeoutError, AIDeadlineExceeded))
+    assert time.monotonic() - started < 0.5
+
+
+def test_retry_after_longer_than_deadline_gives_up():
+    backend = ScriptedBackend(AIBackendError('slow down', status_code=429, retry_after=5))
+
+    with pytest.raises(AIDeadlineExceeded):
+        call(AITransport(retry_policy=RetryPolicy(max_attempts=3, max_delay=10)), backend, deadline=0.5)
+    assert len(backend.timeouts) == 1
+
+
+def test_token_bucket_throttles_to_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0])
+
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(0.1)
+    assert not bucket.acquire(deadline_at=0.05)
+    now[0] = 0.1
+    assert bucket.try_acquire() == 0.0
+
+
+def test_service_recovers_from_transient_stand_in_failures():
+    service = GeminiAIService(cache=None, backend=LocalStandInBackend(latency_ms=0, error_rate=0.3, seed=3),
+                              transport=make_transport(max_attempts=8))
+    results = [service.predict_claim_denial({'patient_name': f'Patient {number}'}) for number in range(20)]
+
+    assert all('denial_probability' in result for result in results)
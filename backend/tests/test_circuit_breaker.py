@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from app.services.ai_backends import AIBackend, AIBackendError
+from app.services.ai_service import GeminiAIService
+from app.services.ai_transport import AITransport, RetryPolicy
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Hedger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise AIBackendError('unavailable', status_code=503)
+
+
+def reject():
+    raise AIBackendError('bad request', status_code=400)
+
+
+def test_breaker_opens_on_error_rate_and_recovers_through_probe():
+    clock = Clock()
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, open_seconds=30, clock=clock)
+
+    for _ in range(4):
+        with pytest.raises(AIBackendError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_circuit():
+    clock = Clock()
+    breaker = CircuitBreaker(window=10, min_calls=2, failure_rate=0.5, open_seconds=30, clock=clock)
+    for _ in range(2):
+        with pytest.raises(AIBackendError):
+            breaker.call(fail)
+
+    clock.now = 31
+    with pytest.raises(AIBackendError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+def test_breaker_opens_on_slow_calls():
+    clock = Clock()
+    breaker = CircuitBreaker(window=10, min_calls=3, slow_call_seconds=5, slow_call_rate=0.6, clock=clock)
+
+    def slow():
+        clock.now += 6
+        return 'ok'
+
+    for _ in range(3):
+        breaker.call(slow)
+    assert breaker.state == OPEN
+
+
+def test_bad_requests_do_not_trip_breaker():
+    breaker = CircuitBreaker(window=10, min_calls=2, failure_rate=0.5)
+    for _ in range(5):
+        with pytest.raises(AIBackendError):
+            breaker.call(reject)
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_skips_model_and_uses_fallback():
+    calls = []
+
+    class Failing(AIBackend):
+        def generate(self, model, prompt, generation_config, task='default', timeout=None):
+            calls.append(task)
+            raise AIBackendError('unavailable', status_code=503)
+
+    service = GeminiAIService(cache=None, backend=Failing(),
+                              transport=AITransport(retry_policy=RetryPolicy(max_attempts=1)),
+                              breaker=CircuitBreaker(window=10, min_calls=2), hedger=Hedger())
+    for _ in range(5):
+        assert 'error' in service.scrub_claim({'patient_name': 'A'})
+    assert len(calls) == 2
+
+
+def test_hedge_answers_when_primary_stalls():
+    hedger = Hedger(enabled=True, min_samples=5, max_hedge_ratio=1.0)
+    for _ in range(5):
+        hedger.latencies.add('scrub_claim', 0.01)
+    release = threading.Event()
+    attempts = []
+
+    def request(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            release.wait(2)
+            return 'primary'
+        return 'hedge'
+
+    started = time.monotonic()
+    assert hedger.call(request, 'scrub_claim', timeout=5) == 'hedge'
+    assert time.monotonic() - started < 1
+    release.set()
+
+
+
+def test_unhedged_call_runs_on_the_callers_thread():
+    hedger = Hedger(enabled=True)
+    caller = threading.current_thread()
+
+    assert hedger.call(lambda timeout: threading.current_thread() is caller, 'scrub_claim', timeout=5)
+
+
+def test_primaries_do_not_queue_for_hedge_workers():
+    hedger = Hedger(enabled=True, min_samples=5, max_hedge_ratio=0, max_workers=1)
+    for _ in range(5):
+        hedger.latencies.add('scrub_claim', 0.01)
+    # Every primary must be running at once to get past the barrier
+    barrier = threading.Barrier(4, timeout=2)
+    results = []
+
+    def call():
+        results.append(hedger.call(lambda timeout: barrier.wait() >= 0, 'scrub_claim', timeout=5))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 4
+
+
+def test_hedge_is_skipped_when_hedge_workers_are_busy():
+    hedger = Hedger(enabled=True, min_samples=5, max_hedge_ratio=1.0, max_workers=1)
+    for _ in range(5):
+        hedger.latencies.add('scrub_claim', 0.01)
+    hedger._hedges_in_flight = 1
+
+    def request(timeout):
+        time.sleep(0.05)
+        return 'primary'
+
+    assert hedger.call(request, 'scrub_claim', timeout=5) == 'primary'
+    assert hedger._hedges == 0
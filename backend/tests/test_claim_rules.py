@@ -0,0 +1,55 @@
+from app.routes import claims
+from app.services.claim_rules import ClaimRulesEngine, PayerAmountLimit, default_rules
+
+CLEAN = {'patient_id': 'P001', 'diagnosis_codes': ['E11.9'], 'procedure_codes': ['99213'],
+         'claim_amount': 250, 'insurance_provider': 'Daman Health Insurance'}
+
+
+def claim(**overrides):
+    return {**CLEAN, **overrides}
+
+
+def test_batch_findings_match_per_claim_rules():
+    results = ClaimRulesEngine().evaluate([
+        CLEAN,
+        claim(patient_id='', claim_amount=None),
+        claim(diagnosis_codes=['Z00.00'], procedure_codes=['70553']),
+        claim(diagnosis_codes=['A', 'B', 'C', 'D'], claim_amount=12000),
+        claim(claim_amount='not a number'),
+        {}
+    ])
+
+    assert results[0]['issues'] == [] and results[0]['confidence_score'] == 1.0
+    assert results[1]['issues'] == ['Missing required field: patient_id', 'Missing required field: claim_amount',
+                                     'Invalid claim amount']
+    assert results[2]['rules_triggered'] == ['conflict_Z00.00_70553']
+    assert (results[3]['errors_found'], results[3]['warnings'], results[3]['confidence_score']) == (0, 2, 0.85)
+    assert 'Invalid claim amount' in results[4]['issues']
+    assert results[5]['errors_found'] == 5 and results[5]['confidence_score'] == 0.0
+
+
+def test_only_warning_claims_need_ai_review():
+    results = ClaimRulesEngine().evaluate([CLEAN, claim(claim_amount=-5), claim(claim_amount=20000)])
+    assert [result['needs_ai_review'] for result in results] == [False, False, True]
+
+
+def test_payer_limits():
+    engine = ClaimRulesEngine(default_rules() + [PayerAmountLimit({'Tawuniya Insurance': 1000})])
+    results = engine.evaluate([claim(claim_amount=5000, insurance_provider='Tawuniya Insurance'), claim(claim_amount=5000)])
+    assert results[0]['rules_triggered'] == ['payer_amount_limit']
+    assert results[1]['rules_triggered'] == []
+
+
+def test_scrubbing_calls_ai_only_for_flagged_claims(monkeypatch):
+    reviewed = []
+
+    def scrub_claims_batch(claims_data, max_workers):
+        reviewed.extend(claim_data['claim_amount'] for claim_data in claims_data)
+        return [{'errors': [], 'warnings': ['Verify documentation'], 'confidence_score': 0.9} for _ in claims_data]
+
+    monkeypatch.setattr(claims.ai_service, 'scrub_claims_batch', scrub_claims_batch)
+    results = claims.scrub_claims_concurrently([CLEAN, claim(claim_amount=0), claim(claim_amount=15000)])
+
+    assert reviewed == [15000]
+    assert results[2]['issues'] == ['High claim amount - may require additional documentation', 'Verify documentation']
+    assert results[2]['warnings'] == 2
@@ -0,0 +1,118 @@
+import threading
+import time
+
+from app.models.models import ClaimSubmission
+from app.routes import claims
+from app.services.ai_service import ai_service
+
+CLEAN = {'diagnosis_codes': ['E11.9'], 'procedure_codes': ['99213'], 'claim_amount': 250,
+         'insurance_provider': 'Daman Health Insurance'}
+# High amount: the rules only warn, so the claim goes to AI review
+FLAGGED = dict(CLEAN, claim_amount=15000)
+
+
+def batch(*templates):
+    return [dict(template, patient_id=f'P{index:03d}') for index, template in enumerate(templates)]
+
+
+def fake_ai(monkeypatch, respond=None):
+    """Replace the AI batch call; records the workers it was given and the patients it reviewed"""
+    seen = {'max_workers': [], 'reviewed': []}
+
+    def scrub_claims_batch(claims_data, max_workers=1):
+        seen['max_workers'].append(max_workers)
+        seen['reviewed'].extend(claim['patient_id'] for claim in claims_data)
+        if respond is not None:
+            return [respond(claim) for claim in claims_data]
+        return [{'errors': [], 'warnings': [f"reviewed {claim['patient_id']}"]} for claim in claims_data]
+
+    monkeypatch.setattr(ai_service, 'scrub_claims_batch', scrub_claims_batch)
+    return seen
+
+
+def test_batch_keeps_input_order(app, monkeypatch):
+    fake_ai(monkeypatch)
+    claims_data = batch(FLAGGED, CLEAN, FLAGGED, CLEAN, CLEAN, FLAGGED)
+
+    body = app.test_client().post('/claims/batch-submit', json={'claims': claims_data}).get_json()
+
+    stored = {row.id: row for row in ClaimSubmission.query.all()}
+    assert [stored[claim_id].patient_id for claim_id in body['submitted_claims']] == [
+        claim['patient_id'] for claim in claims_data]
+    assert stored[body['submitted_claims'][2]].ai_scrubbing['issues'][-1] == 'reviewed P002'
+
+
+def test_scrub_failure_stays_with_its_claim(app, monkeypatch):
+    def respond(claim):
+        if claim['patient_id'] == 'P002':
+            return {'error': 'AI review timed out'}
+        return {'errors': [], 'warnings': [f"reviewed {claim['patient_id']}"]}
+
+    fake_ai(monkeypatch, respond)
+    results = claims.scrub_claims_concurrently(batch(FLAGGED, FLAGGED, FLAGGED, CLEAN))
+
+    issues = [result['issues'] for result in results]
+    assert issues[0][-1] == 'reviewed P000' and issues[1][-1] == 'reviewed P001'
+    assert not any(issue.startswith('reviewed') for issue in issues[2])
+    assert issues[3] == []
+
+
+def test_failed_ai_review_keeps_the_rule_results(app, monkeypatch):
+    def scrub_claims_batch(claims_data, max_workers=1):
+        raise RuntimeError('AI service unavailable')
+
+    monkeypatch.setattr(ai_service, 'scrub_claims_batch', scrub_claims_batch)
+    summary = claims.process_claims_batch(batch(CLEAN, FLAGGED, CLEAN))
+
+    assert summary['failed_count'] == 0
+    assert [row.patient_id for row in ClaimSubmission.query.order_by(ClaimSubmission.patient_id)] == [
+        'P000', 'P001', 'P002']
+
+
+def test_requested_concurrency_is_capped(app, monkeypatch):
+    seen = fake_ai(monkeypatch)
+    # The value CLAIMS_SCRUB_MAX_CONCURRENCY sets at import
+    monkeypatch.setattr(claims, 'MAX_BATCH_SCRUB_CONCURRENCY', 4)
+
+    client = app.test_client()
+    client.post('/claims/batch-submit', json={'claims': batch(FLAGGED, FLAGGED), 'concurrency': 100})
+    client.post('/claims/batch-submit', json={'claims': batch(FLAGGED), 'concurrency': 0})
+
+    assert seen['max_workers'] == [4, 1]
+
+
+def test_ai_calls_in_flight_stay_within_workers(monkeypatch):
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'peak': 0}
+
+    def make_request(prompt, *args, **kwargs):
+        with lock:
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+        time.sleep(0.01)
+        with lock:
+            state['in_flight'] -= 1
+        return None
+
+    monkeypatch.setattr(ai_service, '_make_request', make_request)
+    monkeypatch.setattr(ai_service, 'scrub_claim', lambda claim: {'errors': [], 'warnings': []})
+    monkeypatch.setattr('app.services.ai_service.BATCH_MAX_ITEMS', 1)
+
+    ai_service.scrub_claims_batch(batch(*[FLAGGED] * 12), max_workers=3)
+
+    assert 1 < state['peak'] <= 3
+
+
+def test_invalid_concurrency_is_rejected(app, monkeypatch):
+    seen = fake_ai(monkeypatch)
+    client = app.test_client()
+
+    for concurrency in ['fast', [], 2.5, True]:
+        response = client.post('/claims/batch-submit', json={'claims': batch(FLAGGED), 'concurrency': concurrency})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'concurrency must be a whole number'
+    assert client.post('/claims/batch-submit?concurrency=fast', json={'claims': batch(FLAGGED)}).status_code == 400
+
+    assert client.post('/claims/batch-submit?concurrency=3', json={'claims': batch(FLAGGED)}).status_code == 201
+    assert seen['max_workers'] == [3]
+    assert ClaimSubmission.query.count() == 1
@@ -0,0 +1,46 @@
+from app.models.models import ClaimSubmission
+from app.routes import claims
+
+CLEAN = {'patient_id': 'P001', 'patient_name': 'Test Patient', 'diagnosis_codes': ['E11.9'],
+         'procedure_codes': ['99213'], 'claim_amount': 250, 'service_date': '2024-03-01',
+         'insurance_provider': 'Daman Health Insurance'}
+
+
+def claim(**overrides):
+    return {**CLEAN, **overrides}
+
+
+def test_invalid_claims_fail_alone_in_a_batch(app):
+    response = app.test_client().post('/claims/batch-submit', json={'claims': [
+        CLEAN, claim(patient_id=None), claim(service_date='03/01/2024'), claim(claim_amount='lots'), CLEAN
+    ]})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['submitted_count'] == 2
+    assert [failure['error'] for failure in body['failed_claims']] == [
+        'patient_id is required', 'service_date must be YYYY-MM-DD', 'claim_amount must be a number'
+    ]
+    assert sorted(row.id for row in ClaimSubmission.query.all()) == sorted(body['submitted_claims'])
+
+
+def test_failed_insert_rolls_back_only_its_claim(app, monkeypatch):
+    monkeypatch.setattr(claims, 'new_record_id', lambda prefix: f'{prefix}DUPLICATE')
+
+    summary = claims.process_claims_batch([CLEAN, claim(patient_id='P002')])
+
+    assert summary['submitted_count'] == 1 and summary['failed_count'] == 1
+    assert summary['failed_claims'][0]['patient_id'] == 'P002'
+    assert [row.patient_id for row in ClaimSubmission.query.all()] == ['P001']
+
+
+def test_submit_rejects_invalid_claims(app):
+    client = app.test_client()
+
+    assert client.post('/claims/submit', json=claim(service_date='not a date')).status_code == 400
+    assert client.post('/claims/submit', json=claim(patient_id='')).get_json()['error'] == \
+        'Invalid claim: patient_id is required'
+    response = client.post('/claims/submit', json=CLEAN)
+    assert response.status_code == 201
+    assert len(response.get_json()['claim_id']) == 35
+    assert ClaimSubmission.query.count() == 1
@@ -0,0 +1,87 @@
+from app.services.code_search import CodeSearchIndex
+from app.services.code_sets import CodeSet, load_code_file, load_code_set, write_code_set
+
+RECORDS = [
+    {'code': 'E11.9', 'description': 'Type 2 diabetes mellitus without complications', 'category': 'Endocrine'},
+    {'code': 'E11.65', 'description': 'Type 2 diabetes mellitus with hyperglycemia', 'category': 'Endocrine'},
+    {'code': 'E10.9', 'description': 'Type 1 diabetes mellitus without complications', 'category': 'Endocrine'},
+    {'code': 'I10', 'description': 'Essential (primary) hypertension', 'category': 'Cardiovascular'},
+    {'code': 'O24.419', 'description': 'Gestational diabetes mellitus in pregnancy, unspecified control',
+     'category': 'Pregnancy'},
+]
+
+
+def codes(results):
+    return [record['code'] for record in results]
+
+
+def test_code_prefix_matches_rank_shortest_first():
+    index = CodeSearchIndex.from_records(RECORDS, 'icd10')
+    assert codes(index.search('e11')) == ['E11.9', 'E11.65']
+    assert codes(index.search('E11.6')) == ['E11.65']
+
+
+def test_all_words_must_match_and_last_word_is_a_prefix():
+    index = CodeSearchIndex.from_records(RECORDS, 'icd10')
+    assert codes(index.search('diabetes hypergly')) == ['E11.65']
+    assert set(codes(index.search('type 2 diab'))) == {'E11.9', 'E11.65'}
+
+
+def test_typo_tolerance():
+    index = CodeSearchIndex.from_records(RECORDS, 'icd10')
+    assert codes(index.search('hypertenson')) == ['I10']
+    assert codes(index.search('gestatoinal')) == ['O24.419']
+
+
+def test_limit_and_lookup():
+    index = CodeSearchIndex.from_records(RECORDS, 'icd10')
+    assert len(index.search('diabetes', limit=2)) == 2
+    assert index.get('e119')['code'] == 'E11.9'
+    assert 'Z99.9' not in index
+
+
+def test_load_code_files(tmp_path):
+    cms = tmp_path / 'icd10cm_codes.txt'
+    cms.write_text('A000    Cholera due to Vibrio cholerae 01, biovar cholerae\nI10     Essential (primary) hypertension\n')
+    csv_file = tmp_path / 'cpt.csv'
+    csv_file.write_text('Code,Description,Category,RVU\n99213,"Office visit, established patient",E&M,1.3\n')
+
+    icd10 = load_code_file(str(cms), 'icd10')
+    cpt = load_code_file(str(csv_file), 'cpt')
+
+    assert codes(icd10) == ['A00.0', 'I10']
+    assert cpt == [{'code': '99213', 'description': 'Office visit, established patient', 'category': 'E&M', 'rvu': 1.3}]
+
+
+def test_compiled_code_set_round_trips(tmp_path):
+    path = str(tmp_path / 'icd10.codeset')
+    write_code_set(RECORDS + [{'code': '99213', 'description': 'Office visit', 'category': 'E&M', 'rvu': 1.3}],
+                   'icd10', path)
+    code_set = CodeSet.open(path)
+
+    assert len(code_set) == len(RECORDS) + 1
+    assert code_set.get('E1165') == RECORDS[1]
+    assert code_set.get('99213')['rvu'] == 1.3
+    assert codes(CodeSearchIndex(code_set).search('gestational diab')) == ['O24.419']
+
+
+def test_release_file_is_compiled_once(tmp_path):
+    release = tmp_path / 'icd10cm_codes.txt'
+    release.write_text('E119    Type 2 diabetes mellitus without complications\n')
+
+    code_set = load_code_set('icd10', str(release), [])
+    compiled = tmp_path / 'icd10cm_codes.txt.codeset'
+    assert compiled.exists()
+    assert code_set.get('E11.9')['description'] == 'Type 2 diabetes mellitus without complications'
+
+    mtime = compiled.stat().st_mtime_ns
+    load_code_set('icd10', str(release), [])
+    assert compiled.stat().st_mtime_ns == mtime
+
+
+def test_search_codes_route(app):
+    client = app.test_client()
+    body = client.post('/medical-coding/search-codes', json={'query': 'visit estab', 'type': 'cpt', 'limit': 2}).get_json()
+    assert codes(body['results']['cpt']) == ['99213', '99214']
+    assert body['results']['icd10'] == []
+    assert body['total_found'] == 2
@@ -0,0 +1,130 @@
+import json
+import time
+from datetime import date
+
+import pytest
+
+from app.models.models import db, EligibilityCheck, InsuranceProvider, Patient
+from app.services import coverage
+from app.services.coverage import CoverageTables, invalidate_coverage_tables, predict_coverage
+
+
+@pytest.fixture
+def patient(app):
+    invalidate_coverage_tables()
+    db.session.add(InsuranceProvider(code='daman', name='Daman', country='UAE',
+                                     coverage_rules={'service_costs': {'dental': 1000},
+                                                     'coverage_likelihood': {'dental': 60}}))
+    patient = Patient(patient_id='P001', first_name='Amal', last_name='Saeed', dob=date(1990, 1, 1),
+                      insurance_provider='daman', policy_status='active',
+                      coverage_details={'coverage_percentage': 90, 'copay': 20})
+    db.session.add(patient)
+    db.session.commit()
+    return patient
+
+
+def wait_for_job(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_prediction_uses_provider_tables(patient):
+    prediction = predict_coverage(patient, 'dental')
+    assert prediction['coverage_likelihood'] == 60
+    assert prediction['estimated_total_cost'] == 1000
+    assert prediction['estimated_patient_cost'] == 100.0
+
+    assert predict_coverage(patient, 'surgery')['estimated_total_cost'] == 15000
+
+
+def test_changed_coverage_and_provider_rules_are_picked_up(patient):
+    assert predict_coverage(patient, 'dental')['estimated_patient_cost'] == 100.0
+
+    patient.coverage_details = {'coverage_percentage': 50}
+    db.session.commit()
+    assert predict_coverage(patient, 'dental')['estimated_patient_cost'] == 500.0
+
+    provider = InsuranceProvider.query.filter_by(code='daman').one()
+    provider.coverage_rules = {'service_costs': {'dental': 2000}}
+    db.session.commit()
+    assert predict_coverage(patient, 'dental')['estimated_total_cost'] == 2000
+
+
+def test_cached_predictions_follow_the_tables_they_were_computed_from(monkeypatch):
+    old = CoverageTables({'daman': ({'dental': 1000}, {'dental': 60})}, generation=1)
+    new = CoverageTables({'daman': ({'dental': 2000}, {'dental': 60})}, generation=2)
+    plan = coverage.plan_key({'coverage_percentage': 90})
+
+    # A reload swaps the module's tables while a request still holds the old ones
+    monkeypatch.setattr(coverage, '_tables', new)
+    assert coverage._predict(old, 'daman', plan, 'dental')[2] == 1000
+    assert coverage._predict(new, 'daman', plan, 'dental')[2] == 2000
+    assert coverage._predict(old, 'daman', plan, 'dental')[2] == 1000
+
+
+def test_check_returns_before_insights_and_attaches_them_later(app, patient):
+    client = app.test_client()
+    body = client.post('/eligibility/check', json={'patient_id': 'P001', 'service_type': 'dental'}).get_json()
+
+    assert body['ai_prediction']['ai_insights_status'] == 'pending'
+    assert body['ai_prediction']['estimated_total_cost'] == 1000
+
+    job = wait_for_job(client, body['ai_insights_job']['job_id'])
+    assert job['status'] == 'completed'
+
+    db.session.expire_all()
+    stored = db.session.get(EligibilityCheck, body['check_id']).ai_prediction
+    assert stored['ai_insights_status'] == 'completed'
+    assert stored['ai_insights']
+    # What the eligibility page merges into the result it already shows
+    assert job['result']['ai_insights'] == stored['ai_insights']
+    assert job['result']['confidence_score'] == stored['confidence_score']
+
+
+def test_batch_check_streams_one_line_per_entry(app, patient):
+    db.session.add(Patient(patient_id='P002', first_name='Omar', last_name='Ali', dob=date(1985, 5, 5),
+                           insurance_provider='daman', policy_status='inactive', coverage_details={}))
+    db.session.commit()
+    client = app.test_client()
+
+    response = client.post('/eligibility/check-batch', json={'checks': [
+        {'patient_id': 'P002', 'service_type': 'surgery'},
+        {'patient_id': 'P404'},
+        {'patient_id': 'P001', 'service_type': 'dental'},
+    ]})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [line.get('patient_id') for line in lines[:3]] == ['P002', 'P404', 'P001']
+    assert lines[0]['eligible'] is False and lines[0]['ai_prediction']['estimated_total_cost'] == 15000
+    assert lines[1]['reason'] == 'Patient not found in system'
+    assert lines[2]['ai_prediction']['estimated_patient_cost'] == 100.0
+    assert lines[3]['summary'] == {'total': 3, 'checked': 2, 'eligible': 1, 'not_found': 1, 'insights_job': None}
+    assert EligibilityCheck.query.count() == 2
+
+
+def test_batch_check_query_count_does_not_grow_with_batch_size(app, patient):
+    from sqlalchemy import event
+    client = app.test_client()
+
+    def count_selects(patient_ids):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            client.post('/eligibility/check-batch', json={'patient_ids': patient_ids}).get_data()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        return len(statements)
+
+    count_selects(['P001'])
+    assert count_selects(['P001'] * 50) == count_selects(['P001'])
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck, DashboardRollup
+from app.services.dashboard_rollups import rebuild_rollups
+from app.services.dashboard_stats import compute_dashboard_stats, compute_dashboard_stats_from_rollups
+
+
+def assert_rollups_match():
+    assert compute_dashboard_stats_from_rollups() == compute_dashboard_stats(concurrent=False)
+
+
+def rollup_rows():
+    return sorted((row.day, row.entity, row.status, row.insurance_provider, row.record_count,
+                   round(row.total_amount, 2)) for row in DashboardRollup.query if row.record_count)
+
+
+def seed():
+    now = datetime.utcnow()
+    patients = [Patient(patient_id=f'P{i:03d}', first_name='Test', last_name=f'Patient{i}',
+                        dob=datetime(1980, 1, 1).date(), insurance_provider=provider)
+                for i, provider in enumerate(['daman', 'tawuniya', 'daman'], start=1)]
+    db.session.add_all(patients)
+    db.session.flush()
+    records = [
+        Claim(patient_id=patients[0].id, status='approved', amount=500.0, submitted_date=now - timedelta(days=2)),
+        Claim(patient_id=patients[1].id, status='pending', amount=250.0, submitted_date=now - timedelta(days=90)),
+        Claim(patient_id=patients[2].id, status='denied', amount=75.5, submitted_date=now - timedelta(days=5)),
+        PriorAuthorization(patient_id=patients[0].id, service_type='surgery', status='pending',
+                           submitted_date=now - timedelta(days=3)),
+        EligibilityCheck(patient_id=patients[1].id, service_type='dental', status='eligible',
+                         check_date=now - timedelta(days=1)),
+    ]
+    db.session.add_all(records)
+    db.session.commit()
+    return patients, records
+
+
+def test_rollups_follow_inserts_updates_and_deletes(app):
+    patients, (claim, _, _, auth, check) = seed()
+    assert_rollups_match()
+
+    # Every attribute is expired by the commit, so the old values have to be loaded
+    claim.status = 'paid'
+    claim.amount = 650.0
+    claim.patient_id = patients[1].id
+    check.check_date = datetime.utcnow() - timedelta(days=60)
+    db.session.commit()
+    assert_rollups_match()
+
+    db.session.delete(claim)
+    db.session.delete(auth)
+    db.session.commit()
+    assert_rollups_match()
+
+
+def test_unchanged_flush_leaves_rollups_alone(app):
+    _, (_, claim, _, _, _) = seed()
+    before = compute_dashboard_stats_from_rollups()
+
+    claim.notes = 'Called the payer'
+    db.session.commit()
+
+    assert compute_dashboard_stats_from_rollups() == before
+    rebuild_rollups()
+    assert compute_dashboard_stats_from_rollups() == before
+
+
+def test_rollups_follow_a_patients_insurer(app):
+    patients, (claim, _, _, _, _) = seed()
+
+    # Expired by the commit: the old insurer has to be loaded
+    patients[0].insurance_provider = 'bupa'
+    patients[2].insurance_provider = None
+    claim.status = 'paid'
+    db.session.commit()
+
+    incremental = rollup_rows()
+    rebuild_rollups()
+    assert incremental == rollup_rows()
+    assert {row[3] for row in incremental} == {'bupa', 'tawuniya', ''}
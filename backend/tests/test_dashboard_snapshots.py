@@ -0,0 +1,89 @@
+import time
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models.models import db, Claim, Patient
+from app.services.dashboard_snapshots import DashboardSnapshots, dashboard_snapshots
+
+
+@pytest.fixture
+def patient(app):
+    patient = Patient(patient_id='P001', first_name='Amal', last_name='Saeed', dob=date(1990, 1, 1))
+    db.session.add(patient)
+    db.session.commit()
+    return patient
+
+
+def add_claim(patient, status='approved'):
+    db.session.add(Claim(patient_id=patient.id, status=status, amount=100.0, submitted_date=datetime.utcnow()))
+    db.session.commit()
+
+
+def count_queries(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return len(statements)
+
+
+def test_payloads_are_built_together_and_served_from_memory(app, patient):
+    add_claim(patient)
+    client = app.test_client()
+
+    stats = client.get('/dashboard/stats').get_json()
+    activity = client.get('/dashboard/recent-activity').get_json()
+    insights = client.get('/dashboard/ai-insights').get_json()
+
+    assert stats['claims']['total'] == 1
+    assert activity['activities'][0]['type'] == 'claim'
+    assert insights['insights'][0]['title'] == 'High Claims Approval Rate'
+    assert stats['generated_at'] == activity['generated_at'] == insights['generated_at']
+    assert stats['staleness_budget_seconds'] == dashboard_snapshots().staleness_budget
+    assert dashboard_snapshots().builds == 1
+
+    assert count_queries(lambda: [client.get('/dashboard/stats') for _ in range(20)]) == 0
+
+
+def test_commit_invalidates_and_etag_revalidates(app, patient):
+    client = app.test_client()
+    first = client.get('/dashboard/stats')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert client.get('/dashboard/stats', headers={'If-None-Match': etag}).status_code == 304
+
+    add_claim(patient, status='denied')
+    second = client.get('/dashboard/stats', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.get_json()['claims']['denied'] == 1
+    assert dashboard_snapshots().builds == 2
+
+
+def test_stale_snapshot_is_verified_without_rebuilding(app, patient):
+    snapshots = DashboardSnapshots(app, interval=0, staleness_budget=0)
+    snapshots.get('stats')
+    snapshots.get('stats')
+    assert snapshots.builds == 1
+
+
+def test_background_refresh_follows_commits(app, patient):
+    snapshots = DashboardSnapshots(app, interval=30, min_interval=0)
+    snapshots.get('stats')
+    snapshots.start()
+    try:
+        add_claim(patient)
+        deadline = time.monotonic() + 5
+        while snapshots.builds < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert snapshots.builds == 2
+        # Served as built by the thread, without rebuilding on the request path
+        assert b'"total":1' in snapshots.get('stats').body
+        assert snapshots.builds == 2
+    finally:
+        snapshots.stop()
@@ -0,0 +1,92 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.models.models import db, Patient, Claim, PriorAuthorization, EligibilityCheck
+from app.services.dashboard_stats import compute_dashboard_stats
+
+NOW = datetime(2024, 6, 30, 12, 0)
+
+
+def legacy_stats(now):
+    """The per-status COUNT queries /dashboard/stats used to run, one at a time"""
+    since = now - timedelta(days=30)
+
+    def count(model, **filters):
+        return model.query.filter_by(**filters).count()
+
+    def recent(column):
+        return column.class_.query.filter(column >= since).count()
+
+    def rate(part, total):
+        return round(part / total * 100, 1) if total > 0 else 0
+
+    claims = {status: count(Claim, status=status) for status in ('pending', 'approved', 'denied', 'submitted')}
+    auths = {status: count(PriorAuthorization, status=status)
+             for status in ('pending', 'approved', 'denied', 'expired')}
+    checks = {status: count(EligibilityCheck, status=status) for status in ('eligible', 'not_eligible', 'pending')}
+    total_claims = Claim.query.count()
+    total_auths = PriorAuthorization.query.count()
+    total_checks = EligibilityCheck.query.count()
+    total_amount = round(db.session.query(func.sum(Claim.amount)).scalar() or 0, 2)
+    approved_amount = round(db.session.query(func.sum(Claim.amount)).filter(Claim.status == 'approved').scalar()
+                            or 0, 2)
+    providers = db.session.query(Patient.insurance_provider, func.count(Patient.id)) \
+        .group_by(Patient.insurance_provider).all()
+
+    return {
+        'overview': {
+            'total_patients': Patient.query.count(),
+            'total_claims': total_claims,
+            'total_prior_auths': total_auths,
+            'total_eligibility_checks': total_checks,
+            'total_claim_amount': total_amount,
+            'approved_amount': approved_amount
+        },
+        'claims': {'total': total_claims, **claims, 'approval_rate': rate(claims['approved'], total_claims),
+                   'total_amount': total_amount, 'approved_amount': approved_amount},
+        'prior_authorizations': {'total': total_auths, **auths,
+                                 'approval_rate': rate(auths['approved'], total_auths)},
+        'eligibility': {'total': total_checks, **checks, 'success_rate': rate(checks['eligible'], total_checks)},
+        'recent_activity': {
+            'claims_last_30_days': recent(Claim.submitted_date),
+            'eligibility_checks_last_30_days': recent(EligibilityCheck.check_date),
+            'prior_auths_last_30_days': recent(PriorAuthorization.submitted_date)
+        },
+        'insurance_providers': [{'name': provider, 'patient_count': n} for provider, n in providers]
+    }
+
+
+def seed(rng):
+    patients = [Patient(patient_id=f'P{i:03d}', first_name='Test', last_name=f'Patient{i}', dob=date(1980, 1, 1),
+                        insurance_provider=rng.choice(['daman', 'tawuniya', 'bupa', None]))
+                for i in range(20)]
+    db.session.add_all(patients)
+    db.session.flush()
+
+    def when():
+        # Dates on both sides of the 30-day window
+        return NOW - timedelta(days=rng.randint(0, 90), hours=rng.randint(0, 23))
+
+    for _ in range(120):
+        patient = rng.choice(patients)
+        db.session.add(Claim(patient_id=patient.id, amount=round(rng.uniform(50, 5000), 2), submitted_date=when(),
+                             status=rng.choice(['pending', 'approved', 'denied', 'submitted', 'paid'])))
+        db.session.add(PriorAuthorization(patient_id=patient.id, service_type='mri', submitted_date=when(),
+                                          status=rng.choice(['pending', 'approved', 'denied', 'expired'])))
+        db.session.add(EligibilityCheck(patient_id=patient.id, service_type='dental', check_date=when(),
+                                        status=rng.choice(['eligible', 'not_eligible', 'pending', 'error'])))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('concurrent', [True, False])
+def test_aggregate_stats_match_per_status_counts(app, concurrent):
+    seed(random.Random(7))
+
+    assert compute_dashboard_stats(now=NOW, concurrent=concurrent) == legacy_stats(NOW)
+
+
+def test_empty_tables(app):
+    assert compute_dashboard_stats(now=NOW) == legacy_stats(NOW)
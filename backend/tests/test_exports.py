@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from app.models.models import db, ClaimSubmission, EligibilityCheck, Patient
+from app.routes import exports
+
+
+def seed_claims(count):
+    db.session.add_all([
+        ClaimSubmission(id=f'CLM{i:04d}', patient_id='P001', status='denied' if i % 2 else 'submitted',
+                        submission_date=date(2024, 1, 1 + i % 28), claim_amount=10.0 * i,
+                        diagnosis_codes=['Z00.00'])
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def test_ndjson_export_streams_every_row(app, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_CHUNK_SIZE', 7)
+    seed_claims(50)
+
+    response = app.test_client().get('/exports/claims')
+
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 50
+    assert [(r['submission_date'], r['id']) for r in rows] == sorted((r['submission_date'], r['id']) for r in rows)
+
+
+def test_csv_export_applies_filters(app):
+    seed_claims(20)
+
+    response = app.test_client().get('/exports/claims?format=csv&status=denied&date_to=2024-01-10')
+
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename=claims-' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert rows and all(row['status'] == 'denied' and row['submission_date'] <= '2024-01-10' for row in rows)
+    assert json.loads(rows[0]['diagnosis_codes']) == ['Z00.00']
+
+
+def test_eligibility_export_includes_patient_identifier(app):
+    patient = Patient(patient_id='P001', first_name='Ahmed', last_name='Hassan', dob=date(1985, 3, 15))
+    db.session.add(patient)
+    db.session.flush()
+    db.session.add_all([
+        EligibilityCheck(patient_id=patient.id, service_type='mri', status='eligible', check_date=datetime(2024, 1, 31, 18)),
+        EligibilityCheck(patient_id=patient.id, service_type='mri', status='eligible', check_date=datetime(2024, 2, 1, 9)),
+    ])
+    db.session.commit()
+
+    response = app.test_client().get('/exports/eligibility-checks?patient_id=P001&date_to=2024-01-31')
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 1
+    assert rows[0]['patient_external_id'] == 'P001'
+
+
+def test_unknown_format_is_rejected(app):
+    assert app.test_client().get('/exports/payments?format=xml').status_code == 400
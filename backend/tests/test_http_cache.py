@@ -0,0 +1,78 @@
+import pytest
+
+from app.models.models import db, InsuranceProvider
+from app.services.http_cache import BodyCache, body_cache
+from app.services.provider_registry import provider_registry
+
+
+@pytest.fixture
+def client(app):
+    provider_registry.invalidate()
+    return app.test_client()
+
+
+def test_etag_and_not_modified(client):
+    first = client.get('/clinical-docs/templates')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'public, max-age=3600'
+    etag = first.headers['ETag']
+
+    second = client.get('/clinical-docs/templates', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+    # Different arguments are a different resource
+    filtered = client.get('/clinical-docs/templates?category=general')
+    assert filtered.headers['ETag'] != etag
+    assert client.get('/clinical-docs/templates?category=general',
+                      headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_rendered_bodies_are_reused(app, client):
+    first = client.get('/clinical-docs/templates')
+    assert len(body_cache()) == 1
+    second = client.get('/clinical-docs/templates')
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert len(body_cache()) == 1
+
+
+def test_errors_are_not_cached(client):
+    response = client.get('/clinical-docs/templates/missing')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+    assert len(body_cache()) == 0
+
+
+def test_provider_changes_change_the_etag(client):
+    db.session.add(InsuranceProvider(code='daman', name='Daman', country='UAE'))
+    db.session.commit()
+    etag = client.get('/eligibility/providers').headers['ETag']
+    assert client.get('/eligibility/providers', headers={'If-None-Match': etag}).status_code == 304
+
+    InsuranceProvider.query.filter_by(code='daman').one().name = 'Daman Health'
+    db.session.commit()
+    response = client.get('/eligibility/providers', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['providers']['daman']['name'] == 'Daman Health'
+
+
+def test_search_codes_get_matches_post(client):
+    posted = client.post('/medical-coding/search-codes', json={'query': 'diabetes', 'type': 'icd10'}).get_json()
+    response = client.get('/medical-coding/search-codes?query=diabetes&type=icd10')
+    assert response.get_json() == posted
+    assert response.headers['Cache-Control'] == 'public, max-age=86400'
+    assert client.get('/medical-coding/search-codes?query=diabetes&type=icd10',
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_body_cache_evicts_least_recently_used():
+    cache = BodyCache(size=2)
+    cache.put('a', b'1', 'application/json')
+    cache.put('b', b'2', 'application/json')
+    cache.get('a')
+    cache.put('c', b'3', 'application/json')
+    assert cache.get('b') is None
+    assert cache.get('a') == (b'1', 'application/json')
+    assert len(cache) == 2
@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+from app.models.models import ClaimSubmission
+from app.routes import claims
+from app.services.job_queue import JobContext, JobQueue, job_queue
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+@pytest.fixture
+def queue(app, tmp_path):
+    """A queue without worker threads; tests run its jobs on their own thread"""
+    queue = JobQueue(path=str(tmp_path / 'queue.db'), workers=0)
+    queue.init_app(app)
+    return queue
+
+
+def test_workers_start_with_the_app(app):
+    assert any(thread.is_alive() for thread in job_queue._threads)
+
+
+def test_enqueued_job_completes(app):
+    def handler(payload, ctx):
+        for done, value in enumerate(payload['values'], start=1):
+            ctx.add_result({'double': value * 2})
+            ctx.report_progress(done)
+        return {'count': len(payload['values'])}
+
+    job_queue.register_handler('test.double', handler)
+    job = wait_for(job_queue, job_queue.enqueue('test.double', {'values': [1, 2, 3]}, total=3))
+
+    assert job['status'] == 'completed'
+    assert job['result'] == {'count': 3}
+    assert job['results'] == [{'double': 2}, {'double': 4}, {'double': 6}]
+    assert job['progress'] == {'done': 3, 'total': 3, 'percent': 100.0}
+
+
+def test_failed_job_keeps_reported_items_only(app, queue):
+    def handler(payload, ctx):
+        ctx.add_result('first')
+        ctx.report_progress(1)
+        ctx.add_result('never committed')
+        raise RuntimeError('payer unreachable')
+
+    queue.register_handler('test.fail', handler)
+    job_id = queue.enqueue('test.fail', {}, total=2)
+    queue._run_job(queue._claim_next_job())
+
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'payer unreachable'
+    assert job['results'] == ['first']
+    assert job['progress']['done'] == 1
+
+
+def test_stale_job_resumes_from_recorded_progress(app, queue):
+    attempts = []
+
+    def handler(payload, ctx):
+        attempts.append((ctx.attempt, ctx.done))
+        for index in range(ctx.done, 4):
+            ctx.add_result(index)
+            ctx.report_progress(index + 1)
+            if ctx.attempt == 1 and index == 1:
+                raise SystemExit  # the worker dies mid-job
+
+    queue.register_handler('test.resume', handler)
+    job_id = queue.enqueue('test.resume', {}, total=4)
+    with pytest.raises(SystemExit):
+        queue._run_job(queue._claim_next_job())
+    assert queue.get(job_id)['status'] == 'running'
+
+    queue.stale_after = 0
+    queue._requeue_stale_jobs()
+    queue._run_job(queue._claim_next_job())
+
+    job = queue.get(job_id)
+    assert attempts == [(1, 0), (2, 2)]
+    assert job['status'] == 'completed'
+    assert job['results'] == [0, 1, 2, 3]
+
+
+def test_resumed_claims_batch_does_not_insert_twice(app, queue, monkeypatch):
+    batch = [{'patient_id': f'P{i:03d}', 'claim_amount': 100 + i, 'diagnosis_codes': ['E11.9'],
+              'procedure_codes': ['99213']} for i in range(5)]
+    queue.register_handler('claims.batch_submit', claims.run_claims_batch_job)
+    job_id = queue.enqueue('claims.batch_submit', {'claims': batch}, total=len(batch))
+    job = queue._claim_next_job()
+
+    # The first attempt commits its claims, then dies before recording them
+    def die(self, done, total=None):
+        raise SystemExit
+
+    monkeypatch.setattr(JobContext, 'report_progress', die)
+    with pytest.raises(SystemExit):
+        queue._run_job(job)
+    assert ClaimSubmission.query.count() == 5
+    monkeypatch.undo()
+
+    queue.stale_after = 0
+    queue._requeue_stale_jobs()
+    queue._run_job(queue._claim_next_job())
+
+    job = queue.get(job_id)
+    assert job['status'] == 'completed'
+    assert job['result'] == {'submitted_count': 5, 'failed_count': 0}
+    assert ClaimSubmission.query.count() == 5
+    assert sorted(item['claim_id'] for item in job['results']) == sorted(
+        row.id for row in ClaimSubmission.query.all())
+
+
+def test_workers_requeue_jobs_of_dead_workers(app, queue):
+    queue.register_handler('test.echo', lambda payload, ctx: payload)
+    job_id = queue.enqueue('test.echo', {'value': 1})
+    queue._claim_next_job()  # its worker dies without finishing it
+
+    queue.stale_after = 0.2
+    queue.workers = 1
+    queue.poll_interval = 0.05
+    queue.start()
+    try:
+        job = wait_for(queue, job_id)
+    finally:
+        queue.stop()
+
+    assert job['status'] == 'completed'
+    assert job['result'] == {'value': 1}
+
+
+def test_sweep_keeps_jobs_this_process_is_running(app, queue):
+    queue.register_handler('test.echo', lambda payload, ctx: payload)
+    job_id = queue.enqueue('test.echo', {})
+    queue._claim_next_job()
+    queue._running.add(job_id)
+
+    queue.stale_after = 0
+    queue._requeue_stale_jobs()
+
+    assert queue.get(job_id)['status'] == 'running'
+    assert queue.get(job_id)['created_at'].endswith('+00:00')
@@ -0,0 +1,44 @@
+from app.services.metrics import (MetricsRegistry, ai_call_duration, http_db_time, http_duration,
+                                  record_ai_call)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('demo_seconds', 'Demo', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, '/a')
+    histogram.observe(0.5, '/a')
+    histogram.observe(5, '/a')
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a"} 3' in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('demo_total', 'Demo', ('route',)).inc('say "hi"\n')
+    assert 'demo_total{route="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_requests_are_timed_by_route(app):
+    client = app.test_client()
+    before = http_duration.count('GET', 'claims', '/claims/list')
+    db_before = http_db_time.count('claims', '/claims/list')
+
+    response = client.get('/claims/list?limit=5')
+    assert 'db;dur=' in response.headers['Server-Timing']
+    assert http_duration.count('GET', 'claims', '/claims/list') == before + 1
+    assert http_db_time.count('claims', '/claims/list') == db_before + 1
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'rcm_http_request_duration_seconds_bucket{method="GET",blueprint="claims",route="/claims/list"' in text
+    assert 'rcm_http_requests_total{method="GET",blueprint="claims",route="/claims/list",status="200"}' in text
+
+
+def test_ai_calls_are_recorded():
+    before = ai_call_duration.count('scrub_claim', 'ok')
+    record_ai_call('scrub_claim', 0.2, 'ok')
+    assert ai_call_duration.count('scrub_claim', 'ok') == before + 1
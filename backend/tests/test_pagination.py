@@ -0,0 +1,105 @@
+from datetime import date
+
+from app.models.models import db, ClaimSubmission, ClinicalDocument, Patient, PriorAuthRequest
+from app.services.pagination import encode_cursor, decode_cursor, MAX_PAGE_SIZE
+
+
+def seed_claims(count):
+    db.session.add_all([
+        ClaimSubmission(id=f'CLM{i:03d}', patient_id='P001', status='submitted' if i % 3 else 'denied',
+                        submission_date=date(2024, 1, 1 + i // 4), claim_amount=100.0 * i)
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def walk(client, url):
+    items, cursor = [], None
+    while True:
+        page_url = url + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(page_url).get_json()
+        items.extend(body['claims'])
+        cursor = body['pagination']['next_cursor']
+        if not body['pagination']['has_more']:
+            assert cursor is None
+            return items
+
+
+def test_pages_cover_every_row_in_order(app):
+    seed_claims(23)
+    client = app.test_client()
+
+    items = walk(client, '/claims/list?limit=5')
+
+    expected = sorted(ClaimSubmission.query.all(), key=lambda c: (c.submission_date, c.id), reverse=True)
+    assert [item['id'] for item in items] == [claim.id for claim in expected]
+
+
+def test_filters_apply_across_pages(app):
+    seed_claims(23)
+    client = app.test_client()
+
+    items = walk(client, '/claims/list?status=denied&limit=2')
+
+    assert {item['status'] for item in items} == {'denied'}
+    assert len(items) == ClaimSubmission.query.filter_by(status='denied').count()
+
+
+def test_total_and_summary_are_optional(app):
+    seed_claims(12)
+    client = app.test_client()
+
+    first = client.get('/claims/list?limit=5&include_total=true').get_json()
+    assert first['pagination']['total'] == 12
+    assert first['summary']['total_claims'] == 12
+
+    second = client.get(f"/claims/list?limit=5&cursor={first['pagination']['next_cursor']}").get_json()
+    assert 'total' not in second['pagination']
+    assert 'summary' not in second
+
+
+def test_limit_is_capped(app):
+    client = app.test_client()
+    body = client.get('/claims/list?limit=100000').get_json()
+    assert body['pagination']['limit'] == MAX_PAGE_SIZE
+
+
+def test_invalid_cursor_is_rejected(app):
+    client = app.test_client()
+    assert client.get('/claims/list?cursor=not-a-cursor').status_code == 400
+    assert client.get('/eligibility/patients?cursor=' + encode_cursor(['a', 'b'])).status_code == 400
+
+
+def test_cursor_round_trips_dates():
+    cursor = encode_cursor([date(2024, 1, 16), 'CLM001'])
+    assert decode_cursor(cursor, [ClaimSubmission.submission_date, ClaimSubmission.id]) == [date(2024, 1, 16), 'CLM001']
+
+
+def test_patients_page_in_id_order(app):
+    db.session.add_all([
+        Patient(patient_id=f'P{i:03d}', first_name='Test', last_name=str(i), dob=date(1990, 1, 1))
+        for i in range(1, 8)
+    ])
+    db.session.commit()
+    client = app.test_client()
+
+    first = client.get('/eligibility/patients?limit=4').get_json()
+    second = client.get(f"/eligibility/patients?limit=4&cursor={first['pagination']['next_cursor']}").get_json()
+
+    ids = [p['patient_id'] for p in first['patients'] + second['patients']]
+    assert ids == [f'P{i:03d}' for i in range(1, 8)]
+    assert second['pagination']['has_more'] is False
+
+
+def test_lists_that_always_had_a_total_still_return_one(app):
+    db.session.add_all([PriorAuthRequest(id=f'PA{i:03d}', patient_id='P001') for i in range(3)] +
+                       [ClinicalDocument(id=f'DOC{i:03d}', patient_id='P001') for i in range(4)])
+    db.session.commit()
+    client = app.test_client()
+
+    auths = client.get('/prior-auth/list?limit=2').get_json()
+    assert auths['total_count'] == auths['pagination']['total'] == 3
+    assert client.get('/clinical-docs/documents?limit=2').get_json()['total_count'] == 4
+
+    skipped = client.get('/prior-auth/list?limit=2&include_total=false').get_json()
+    assert skipped['total_count'] is None and 'total' not in skipped['pagination']
@@ -0,0 +1,25 @@
+from app.models.models import PriorAuthRequest
+
+REQUEST = {'patient_id': 'P001', 'patient_name': 'Test Patient', 'procedure_code': '70553',
+           'procedure_name': 'MRI Brain', 'diagnosis': 'G43.909', 'estimated_cost': 2500}
+
+
+def test_submit_stores_the_request(app):
+    response = app.test_client().post('/prior-auth/submit', json=REQUEST)
+
+    assert response.status_code == 201
+    stored = PriorAuthRequest.query.one()
+    assert (stored.id, stored.patient_id, stored.estimated_cost) == (
+        response.get_json()['authorization_id'], 'P001', 2500)
+
+
+def test_submit_rejects_requests_that_cannot_be_stored(app):
+    client = app.test_client()
+
+    for body, error in [({**REQUEST, 'patient_id': None}, 'patient_id is required'),
+                        ({**REQUEST, 'estimated_cost': 'lots'}, 'estimated_cost must be a number'),
+                        ([REQUEST], 'request must be an object')]:
+        response = client.post('/prior-auth/submit', json=body)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == f'Invalid prior authorization request: {error}'
+    assert PriorAuthRequest.query.count() == 0
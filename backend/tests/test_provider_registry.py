@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import event
+
+from app.models.models import db, DataVersion, InsuranceProvider
+from app.services.data_versions import bump_version
+from app.services.provider_registry import ProviderRegistry, VERSION_NAME, provider_registry
+
+
+@pytest.fixture
+def providers(app):
+    provider_registry.invalidate()
+    db.session.add_all([
+        InsuranceProvider(code='daman', name='Daman', country='UAE'),
+        InsuranceProvider(code='bupa', name='Bupa Arabia', country='Saudi Arabia'),
+        InsuranceProvider(code='old', name='Retired Plan', country='UAE', is_active=False)
+    ])
+    db.session.commit()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self)
+
+
+def test_lookups_by_code_and_name(providers):
+    assert provider_registry.get('daman').name == 'Daman'
+    assert provider_registry.get_by_name('bupa arabia').code == 'bupa'
+    assert provider_registry.get('old').is_active is False
+    assert provider_registry.get('missing') is None
+    assert [provider.code for provider in provider_registry.active()] == ['daman', 'bupa']
+
+
+def test_repeat_lookups_do_not_query(providers):
+    provider_registry.get('daman')
+    with QueryCounter() as counter:
+        for _ in range(100):
+            provider_registry.get('daman')
+            provider_registry.active()
+    assert counter.count == 0
+
+
+def test_commit_bumps_version_and_reloads(providers):
+    version = db.session.get(DataVersion, VERSION_NAME).version
+    generation = provider_registry.snapshot().generation
+
+    provider = InsuranceProvider.query.filter_by(code='daman').one()
+    provider.name = 'Daman Health'
+    db.session.commit()
+
+    assert db.session.get(DataVersion, VERSION_NAME).version == version + 1
+    assert provider_registry.get('daman').name == 'Daman Health'
+    assert provider_registry.snapshot().generation == generation + 1
+
+
+def test_change_from_another_process_is_detected(providers):
+    registry = ProviderRegistry(check_interval=0)
+    assert registry.get('bupa').country == 'Saudi Arabia'
+
+    # Another worker's commit: the rows and version change, but this process's hooks never ran
+    with db.engine.begin() as connection:
+        connection.execute(InsuranceProvider.__table__.update()
+                           .where(InsuranceProvider.code == 'bupa').values(country='KSA'))
+        bump_version(connection, VERSION_NAME)
+
+    assert registry.get('bupa').country == 'KSA'
+
+
+def test_snapshot_is_not_changed_by_callers(providers):
+    db.session.get(InsuranceProvider, 1).contact_info = {'phone': '800'}
+    db.session.commit()
+
+    data = provider_registry.get('daman').to_dict()
+    data['contact_info']['phone'] = 'changed'
+    assert provider_registry.get('daman').contact_info == {'phone': '800'}
+
+
+def test_providers_endpoint_lists_active_providers(app, providers):
+    body = app.test_client().get('/eligibility/providers').get_json()
+    assert set(body['providers']) == {'daman', 'bupa'}
+    assert body['providers']['daman']['name'] == 'Daman'
+    assert body['total_providers'] == 2
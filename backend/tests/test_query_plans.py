@@ -0,0 +1,142 @@
+"""
+Query-plan regression tests for the hot GET routes.
+
+Every SELECT a route issues is captured and run through SQLite's
+EXPLAIN QUERY PLAN. A step that reads a table without an index
+("SCAN claim" rather than "SEARCH claim USING INDEX ..." or
+"SCAN claim USING INDEX ...") fails the test unless it is listed in
+ALLOWED_FULL_SCANS with the reason it is acceptable.
+
+New list/search endpoints should be added to HOT_ROUTES.
+"""
+
+import re
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event, inspect
+
+from app.models.models import (db, Patient, Claim, PriorAuthorization, EligibilityCheck, ClaimSubmission,
+                               PriorAuthRequest, CodingSession, ClinicalDocument, RemittancePayment,
+                               REDUNDANT_INDEXES, ensure_indexes)
+from app.services.pagination import encode_cursor
+
+HOT_ROUTES = [
+    '/dashboard/stats',
+    '/dashboard/recent-activity',
+    '/dashboard/ai-insights',
+    '/eligibility/history/P001',
+    '/eligibility/patients',
+    '/eligibility/patients?cursor=' + encode_cursor([1]),
+    '/claims/list',
+    '/claims/list?status=denied&date_from=2024-01-01',
+    '/claims/list?status=denied&cursor=' + encode_cursor([date(2024, 1, 20), 'CLM009']),
+    '/claims/list?limit=10&include_total=true',
+    '/claims/status/CLM001',
+    '/claims/analytics',
+    '/prior-auth/list',
+    '/prior-auth/list?status=pending',
+    '/prior-auth/list?cursor=' + encode_cursor([date(2024, 1, 20), 'PA009']),
+    '/prior-auth/status/PA001',
+    '/medical-coding/sessions',
+    '/medical-coding/sessions?status=completed',
+    '/medical-coding/analytics',
+    '/clinical-docs/documents',
+    '/clinical-docs/documents?patient_id=P001',
+    '/remittance/payments',
+    '/remittance/payments?status=posted&cursor=' + encode_cursor([datetime(2024, 1, 20), 'PAY009']),
+    '/exports/claims?status=denied&date_from=2024-01-01',
+    '/exports/payments?format=csv',
+    '/exports/eligibility-checks?patient_id=P001&date_to=2024-01-31',
+]
+
+# (route path, table) -> why reading the whole table is expected
+ALLOWED_FULL_SCANS = {
+    ('/eligibility/patients', 'patient'): 'unfiltered page read in primary key order, bounded by LIMIT',
+    ('/medical-coding/analytics', 'coding_session'): 'aggregates over every coding session by design',
+}
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def seed():
+    patient = Patient(patient_id='P001', first_name='Ahmed', last_name='Hassan', dob=date(1985, 3, 15),
+                      insurance_provider='daman', policy_status='active')
+    db.session.add(patient)
+    db.session.flush()
+
+    db.session.add_all([
+        Claim(patient_id=patient.id, status='approved', amount=1200.0, submitted_date=datetime(2024, 1, 10)),
+        PriorAuthorization(patient_id=patient.id, service_type='mri', status='pending',
+                           submitted_date=datetime(2024, 1, 12)),
+        EligibilityCheck(patient_id=patient.id, service_type='general_consultation', status='eligible',
+                         check_date=datetime(2024, 1, 9)),
+        ClaimSubmission(id='CLM001', patient_id='P001', patient_name='Ahmed Hassan', provider='Dr. Sarah Johnson',
+                        submission_date=date(2024, 1, 16), claim_amount=1200.0, status='denied'),
+        PriorAuthRequest(id='PA001', patient_id='P001', patient_name='Ahmed Hassan', procedure_code='70553',
+                         submitted_date=date(2024, 1, 12), status='pending'),
+        CodingSession(id='CS001', patient_id='P001', patient_name='Ahmed Hassan', status='completed',
+                      last_modified=date(2024, 1, 15)),
+        ClinicalDocument(id='DOC001', patient_id='P001', patient_name='Ahmed Hassan', status='draft',
+                         date_created=date(2024, 1, 15), last_modified=date(2024, 1, 15)),
+        RemittancePayment(id='PAY001', claim_id='CLM001', payer='Daman', amount_billed=1200.0,
+                          amount_paid=1000.0, status='posted', posted_at=datetime(2024, 1, 18)),
+    ])
+    db.session.commit()
+
+
+def capture_selects(engine, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def full_scans(engine, statement, parameters):
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    return [match.group(1) for match in (FULL_SCAN.match(row[3]) for row in plan) if match]
+
+
+@pytest.mark.parametrize('url', HOT_ROUTES)
+def test_hot_route_queries_use_indexes(app, url):
+    seed()
+    client = app.test_client()
+
+    statements = capture_selects(db.engine, lambda: client.get(url))
+    assert statements, f'{url} issued no SELECT statements'
+
+    path = url.split('?')[0]
+    for statement, parameters in statements:
+        for table in full_scans(db.engine, statement, parameters):
+            assert (path, table) in ALLOWED_FULL_SCANS, (
+                f'{url} does a full table scan of {table!r}:\n{" ".join(statement.split())}'
+            )
+
+
+def test_routes_respond(app):
+    seed()
+    client = app.test_client()
+    for url in HOT_ROUTES:
+        assert client.get(url).status_code == 200, url
+
+
+def test_redundant_single_column_indexes_are_dropped(app):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('CREATE INDEX ix_claim_submission_status ON claim_submission (status)')
+        connection.exec_driver_sql('CREATE INDEX ix_clinical_document_patient_id ON clinical_document (patient_id)')
+
+    ensure_indexes()
+
+    inspector = inspect(db.engine)
+    for table, names in REDUNDANT_INDEXES.items():
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        assert not existing & set(names), table
@@ -0,0 +1,95 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.models import (db, Patient, Claim, PriorAuthorization, EligibilityCheck, InsuranceProvider,
+                               ClaimSubmission, PriorAuthRequest, CodingSession, ClinicalDocument,
+                               RemittancePayment)
+from app.services.serializers import SERIALIZERS, StdlibJSON, json_backend, serializer_for
+
+ROWS = {
+    Patient: dict(patient_id='P001', first_name='Amal', last_name='Saeed', dob=date(1990, 1, 1),
+                  insurance_provider='daman', coverage_details={'copay': 20}),
+    PriorAuthorization: dict(patient_id=1, service_type='surgery', status='approved',
+                             submitted_date=datetime(2024, 3, 1, 9, 30), approved_date=datetime(2024, 3, 2)),
+    EligibilityCheck: dict(patient_id=1, service_type='dental', status='eligible',
+                           check_date=datetime(2024, 3, 1, 9, 30, 15, 250), ai_prediction={'coverage_likelihood': 70}),
+    InsuranceProvider: dict(code='daman', name='Daman', country='UAE', contact_info={'phone': '800'}),
+    ClaimSubmission: dict(id='CLM001', patient_id='P001', status='submitted', claim_amount=1200.5,
+                          submission_date=date(2024, 3, 1), diagnosis_codes=['J06.9']),
+    PriorAuthRequest: dict(id='PA001', patient_id='P001', status='pending', submitted_date=date(2024, 3, 1)),
+    CodingSession: dict(id='CS001', status='draft', created_date=date(2024, 3, 1), last_modified=date(2024, 3, 2)),
+    ClinicalDocument: dict(id='DOC001', status='draft', date_created=date(2024, 3, 1),
+                           last_modified=date(2024, 3, 2)),
+    RemittancePayment: dict(id='PAY001', claim_id='CLM001', amount_billed=100.0, amount_paid=80.0,
+                            posted_at=datetime(2024, 3, 1), adjustment_codes=['CO-45'])
+}
+
+
+@pytest.mark.parametrize('model', list(SERIALIZERS), ids=lambda model: model.__name__)
+def test_compiled_serializer_matches_to_dict(app, model):
+    patient = Patient(**ROWS[Patient])
+    instance = patient if model is Patient else model(**ROWS[model])
+    db.session.add_all([patient, instance])
+    db.session.commit()
+
+    serializer = serializer_for(model)
+    assert serializer(instance) == instance.to_dict()
+    assert list(serializer(instance)) == list(instance.to_dict())
+
+    # Plain result rows give the same dict as the ORM instance
+    row = db.session.query(*serializer.columns).filter(serializer.columns[0] == instance.id).one()
+    assert serializer.from_row(row) == instance.to_dict()
+    assert serializer(row) == instance.to_dict()
+
+
+def test_backends_agree(app):
+    payload = {'a': [1, 2.5, None, True], 'b': {'nested': 'é'}, 1: 'int key', 'when': date(2024, 3, 1),
+               'amount': Decimal('10.50')}
+    fast = json_backend('auto')
+    assert json.loads(fast.dumps(payload)) == json.loads(StdlibJSON().dumps(payload))
+    # Dates keep Flask's HTTP-date encoding whichever backend is used
+    assert json.loads(fast.dumps({'when': date(2024, 3, 1)}))['when'] == 'Fri, 01 Mar 2024 00:00:00 GMT'
+
+
+def test_json_columns_are_decoded_by_the_backend(app):
+    assert type(db.engine.dialect._json_deserializer.__self__) is type(app.json.backend)
+    # Documents the stdlib wrote with NaN still decode
+    assert json_backend('auto').loads('{"score": NaN, "ok": 1}')['ok'] == 1
+
+
+def test_orjson_falls_back_for_values_it_cannot_encode(app):
+    assert json.loads(json_backend('auto').dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+    with pytest.raises(TypeError):
+        json_backend('auto').dumps({'bad': object()})
+
+
+def test_jsonify_uses_provider(app):
+    with app.test_request_context():
+        from flask import jsonify
+        response = jsonify({'b': 1, 'a': [1, 2]})
+    assert response.get_json() == {'b': 1, 'a': [1, 2]}
+    assert response.mimetype == 'application/json'
+
+
+def test_recent_activity_feed(app):
+    db.session.add(Patient(**ROWS[Patient]))
+    db.session.add_all([
+        Claim(patient_id=1, status='paid', amount=250.0, submitted_date=datetime(2024, 3, 3)),
+        EligibilityCheck(patient_id=1, service_type='dental', status='eligible', check_date=datetime(2024, 3, 2)),
+        PriorAuthorization(patient_id=1, service_type='surgery', status='pending',
+                           submitted_date=datetime(2024, 3, 1))
+    ])
+    db.session.commit()
+
+    activities = app.test_client().get('/dashboard/recent-activity').get_json()['activities']
+    assert activities == [
+        {'type': 'claim', 'id': 1, 'patient_id': 1, 'status': 'paid', 'amount': 250.0,
+         'date': '2024-03-03T00:00:00', 'description': 'Claim $250.0 - paid'},
+        {'type': 'eligibility', 'id': 1, 'patient_id': 1, 'status': 'eligible', 'service_type': 'dental',
+         'date': '2024-03-02T00:00:00', 'description': 'Eligibility check for dental - eligible'},
+        {'type': 'prior_auth', 'id': 1, 'patient_id': 1, 'status': 'pending', 'service_type': 'surgery',
+         'date': '2024-03-01T00:00:00', 'description': 'Prior auth for surgery - pending'}
+    ]
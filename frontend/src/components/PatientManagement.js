@@ -9,6 +9,7 @@ const PatientManagement = () => {
   const [error, setError] = useState(null);
   const [currentPage, setCurrentPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
+  const [pageCursors, setPageCursors] = useState([null]);
   const [selectedPatient, setSelectedPatient] = useState(null);
   const [showEligibilityCheck, setShowEligibilityCheck] = useState(false);
   const [eligibilityResult, setEligibilityResult] = useState(null);
@@ -37,12 +38,20 @@ const PatientManagement = () => {
   const fetchPatients = async () => {
     try {
       setLoading(true);
-      const response = await apiEndpoints.getPatients({ 
-        page: currentPage, 
-        per_page: 10 
-      });
+      const params = { limit: 10, include_total: true };
+      const cursor = pageCursors[currentPage - 1];
+      if (cursor) params.cursor = cursor;
+      const response = await apiEndpoints.getPatients(params);
+      const { pagination } = response.data;
       setPatients(response.data.patients);
-      setTotalPages(response.data.pages);
+      setTotalPages(Math.max(1, Math.ceil(pagination.total / pagination.limit)));
+      if (pagination.next_cursor) {
+        setPageCursors(prev => {
+          const next = prev.slice(0, currentPage);
+          next[currentPage] = pagination.next_cursor;
+          return next;
+        });
+      }
       setError(null);
     } catch (err) {
       setError('Failed to fetch patients');
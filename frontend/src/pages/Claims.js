@@ -18,6 +18,8 @@ const Claims = () => {
   const { t } = useTranslation();
   const [activeTab, setActiveTab] = useState('submit');
   const [claimsList, setClaimsList] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [analytics, setAnalytics] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
@@ -49,6 +51,7 @@ const Claims = () => {
     try {
       const response = await apiEndpoints.getClaimsList();
       setClaimsList(response.data.claims);
+      setNextCursor(response.data.pagination.next_cursor);
     } catch (error) {
       setError('Failed to load claims');
     } finally {
@@ -56,6 +59,20 @@ const Claims = () => {
     }
   };
 
+  // The list is paged by cursor; each click appends the next page
+  const loadMoreClaims = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await apiEndpoints.getClaimsList({ cursor: nextCursor });
+      setClaimsList(prev => [...prev, ...response.data.claims]);
+      setNextCursor(response.data.pagination.next_cursor);
+    } catch (error) {
+      setError('Failed to load more claims');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchAnalytics = async () => {
     setLoading(true);
     try {
@@ -417,6 +434,17 @@ const Claims = () => {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <div className="text-center">
+                    <button
+                      onClick={loadMoreClaims}
+                      disabled={loadingMore}
+                      className="inline-flex items-center px-4 py-2 border border-gray-300 shadow-sm text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+                    >
+                      {loadingMore ? 'Loading...' : 'Load more claims'}
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </div>
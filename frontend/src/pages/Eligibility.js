@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useTranslation } from 'react-i18next';
 import { apiEndpoints } from '../services/api';
 import PatientManagement from '../components/PatientManagement';
@@ -61,6 +61,67 @@ const Eligibility = () => {
     }
   };
 
+  // AI insights are generated by a background job; poll it and merge them in when they arrive
+  const insightsJobId = eligibilityResult?.ai_insights_job?.job_id;
+
+  useEffect(() => {
+    if (!insightsJobId) {
+      return undefined;
+    }
+    let cancelled = false;
+    let timer;
+    let attempts = 0;
+
+    const finish = (status, result) => {
+      setEligibilityResult((current) => {
+        if (!current || current.ai_insights_job?.job_id !== insightsJobId) {
+          return current;
+        }
+        return {
+          ...current,
+          ai_insights_job: null,
+          ai_prediction: {
+            ...current.ai_prediction,
+            ai_insights: result?.ai_insights || [],
+            ai_insights_status: status,
+            confidence_score: result?.confidence_score ?? current.ai_prediction.confidence_score,
+          },
+        };
+      });
+    };
+
+    const poll = async () => {
+      try {
+        const response = await apiEndpoints.getJob(insightsJobId);
+        if (cancelled) {
+          return;
+        }
+        const job = response.data;
+        if (job.status === 'completed' || job.status === 'failed') {
+          finish(job.status, job.result);
+          return;
+        }
+      } catch (error) {
+        console.error('AI insights job error:', error);
+      }
+      attempts += 1;
+      if (cancelled) {
+        return;
+      }
+      if (attempts >= 60) {
+        finish('unavailable', null);
+      } else {
+        timer = setTimeout(poll, 1000);
+      }
+    };
+
+    timer = setTimeout(poll, 500);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [insightsJobId]);
+
   const getStatusIcon = (eligible) => {
     return eligible ? (
       <CheckCircleIcon className="w-6 h-6 text-green-500" />
@@ -279,6 +340,15 @@ const Eligibility = () => {
                   </div>
                 </div>
               </div>
+              {eligibilityResult.ai_prediction.ai_insights_status === 'pending' && (
+                <div className="bg-white shadow rounded-lg">
+                  <div className="px-4 py-5 sm:p-6 flex items-center">
+                    <ClockIcon className="w-5 h-5 mr-2 text-blue-500 animate-pulse" />
+                    <p className="text-sm text-gray-600">Generating AI insights...</p>
+                  </div>
+                </div>
+              )}
+
               {/* AI-Generated Insights */}
               {eligibilityResult.ai_prediction.ai_insights &&
                 Array.isArray(eligibilityResult.ai_prediction.ai_insights) &&
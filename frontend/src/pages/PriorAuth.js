@@ -16,6 +16,8 @@ const PriorAuth = () => {
   const { t } = useTranslation();
   const [activeTab, setActiveTab] = useState('submit');
   const [authList, setAuthList] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [selectedAuth, setSelectedAuth] = useState(null);
@@ -43,6 +45,7 @@ const PriorAuth = () => {
     try {
       const response = await apiEndpoints.getPriorAuthList();
       setAuthList(response.data.authorizations);
+      setNextCursor(response.data.pagination.next_cursor);
     } catch (error) {
       setError('Failed to load authorizations');
     } finally {
@@ -50,6 +53,20 @@ const PriorAuth = () => {
     }
   };
 
+  // The list is paged by cursor; each click appends the next page
+  const loadMoreAuths = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await apiEndpoints.getPriorAuthList({ cursor: nextCursor, include_total: false });
+      setAuthList(prev => [...prev, ...response.data.authorizations]);
+      setNextCursor(response.data.pagination.next_cursor);
+    } catch (error) {
+      setError('Failed to load more authorizations');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setLoading(true);
@@ -355,6 +372,17 @@ const PriorAuth = () => {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <div className="text-center">
+                    <button
+                      onClick={loadMoreAuths}
+                      disabled={loadingMore}
+                      className="inline-flex items-center px-4 py-2 border border-gray-300 shadow-sm text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+                    >
+                      {loadingMore ? 'Loading...' : 'Load more authorizations'}
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </div>
@@ -56,7 +56,7 @@ export const apiEndpoints = {
   // Prior Authorization endpoints
   submitPriorAuth: (authData) => api.post('/prior-auth/submit', authData),
   getPriorAuthStatus: (authId) => api.get(`/prior-auth/status/${authId}`),
-  getPriorAuthList: () => api.get('/prior-auth/list'),
+  getPriorAuthList: (params = {}) => api.get('/prior-auth/list', { params }),
   
   // Claims endpoints
   submitClaim: (claimData) => api.post('/claims/submit', claimData),
@@ -98,6 +98,9 @@ export const apiEndpoints = {
   getDashboardStats: () => api.get('/dashboard/stats'),
   getRecentActivity: () => api.get('/dashboard/recent-activity'),
   getAiInsights: () => api.get('/dashboard/ai-insights'),
+  
+  // Background jobs
+  getJob: (jobId) => api.get(`/jobs/${jobId}`),
 };
 
 export default api;